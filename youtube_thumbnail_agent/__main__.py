@@ -0,0 +1,159 @@
+"""
+Terminal entry point: python -m youtube_thumbnail_agent
+"""
+
+import argparse
+import asyncio
+import os
+import uuid
+from typing import Dict, Optional
+
+from google.genai import types
+
+from .agent import root_agent
+from .constants import APP_NAME
+from .pipeline import run_pipeline
+from .shared_lib.checkpoints import load_checkpoint, next_phase, restore_checkpoint
+from .shared_lib.runtime import create_runner
+from .shared_lib.workspace import workspace_for_session
+from .sub_agents.thumbnail_scraper.tools.scrape_channel import resolve_channel_id
+
+# First message sent for the next phase of a resumed checkpoint
+_RESUME_MESSAGES = {
+    "analyze": "Continue analyzing the remaining thumbnails of {channel}, then create the style guide.",
+    "style_guide": "All thumbnails of {channel} are analyzed. Create the style guide.",
+    "prompt": "The style guide for {channel} is ready. Continue with the video details and prompt.",
+}
+
+
+def _resume_state(channel_name: str, user_id: str, session_id: str) -> Optional[Dict]:
+    """Return the state restored from the user's latest checkpoint of a channel, if any."""
+    resolved = resolve_channel_id(channel_name, os.getenv("YOUTUBE_API_KEY", ""))
+    if resolved["status"] != "success":
+        print(f"[Checkpoints] {resolved['message']}")
+        return None
+
+    checkpoint = load_checkpoint(user_id, resolved["channel_id"])
+    phase = next_phase(checkpoint)
+    if phase == "scrape":
+        print(f"[Checkpoints] No interrupted work found for {channel_name}")
+        return None
+
+    print(
+        f"[Checkpoints] Resuming {channel_name} from session "
+        f"{checkpoint['session_id']} at phase: {phase}"
+    )
+    state = restore_checkpoint(checkpoint, workspace_for_session(session_id))
+    state["resume_phase"] = phase
+    return state
+
+
+async def chat(
+    user_id: str = "local",
+    session_id: Optional[str] = None,
+    resume_channel: Optional[str] = None,
+) -> None:
+    """
+    Chat with the agent in the terminal.
+
+    Sessions and artifacts are stored durably (see shared_lib.runtime), so a
+    session can be resumed after a restart by passing its ID.
+
+    Args:
+        user_id: The user the session belongs to
+        session_id: ID of a session to resume (a new session is created if
+            it does not exist)
+        resume_channel: Channel whose interrupted work (the user's latest
+            checkpoint) a new session starts from, skipping the phases that
+            were already completed
+    """
+    runner = create_runner(root_agent)
+    session = None
+    if session_id:
+        session = runner.session_service.get_session(
+            app_name=APP_NAME, user_id=user_id, session_id=session_id
+        )
+    pending = None
+    if session is None:
+        state = None
+        if resume_channel:
+            session_id = session_id or str(uuid.uuid4())
+            state = _resume_state(resume_channel, user_id, session_id)
+            if state:
+                pending = _RESUME_MESSAGES[state["resume_phase"]].format(
+                    channel=state["channel_name"]
+                )
+        session = runner.session_service.create_session(
+            app_name=APP_NAME, user_id=user_id, session_id=session_id, state=state
+        )
+        print(f"[Session] Started session {session.id}")
+    else:
+        print(f"[Session] Resumed session {session.id} ({len(session.events)} events)")
+    print("Type 'exit' to quit.")
+
+    loop = asyncio.get_running_loop()
+    while True:
+        if pending:
+            text, pending = pending, None
+            print(f"You: {text}")
+        else:
+            try:
+                text = (await loop.run_in_executor(None, input, "You: ")).strip()
+            except EOFError:
+                break
+        if text.lower() in ("exit", "quit"):
+            break
+        if not text:
+            continue
+
+        message = types.Content(role="user", parts=[types.Part(text=text)])
+        async for event in runner.run_async(
+            user_id=user_id, session_id=session.id, new_message=message
+        ):
+            if event.partial or not event.content or not event.content.parts:
+                continue
+            reply = "".join(part.text or "" for part in event.content.parts).strip()
+            if reply:
+                print(f"{event.author}: {reply}")
+
+    print(f"[Session] Resume later with --session {session.id}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="YouTube Thumbnail Style Cloner")
+    parser.add_argument("--user", default="local", help="User ID the session belongs to")
+    parser.add_argument("--session", help="ID of a session to resume")
+    parser.add_argument(
+        "--resume",
+        metavar="CHANNEL",
+        help="Start from the latest checkpoint of a channel (URL, handle or ID)",
+    )
+    parser.add_argument(
+        "--pipeline",
+        metavar="CHANNEL",
+        help="Generate a thumbnail for a channel without a conversation (needs --title)",
+    )
+    parser.add_argument("--title", help="Video title for --pipeline")
+    parser.add_argument("--topic", default="", help="Short video summary for --pipeline")
+    parser.add_argument(
+        "--asset", action="append", default=[], help="Image to include with --pipeline"
+    )
+    args = parser.parse_args()
+    if args.pipeline:
+        if not args.title:
+            parser.error("--pipeline requires --title")
+        result = asyncio.run(
+            run_pipeline(
+                args.pipeline,
+                args.title,
+                args.topic,
+                args.asset,
+                user_id=args.user,
+                session_id=args.session,
+            )
+        )
+        print(f"[Pipeline] {result['status']}: {result['message']}")
+        if result["status"] == "success":
+            print(f"[Pipeline] Exported: {result['export_path']}")
+    else:
+        asyncio.run(chat(args.user, args.session, args.resume))
@@ -1,6 +1,8 @@
 from google.adk.agents import Agent
 
 from .constants import GEMINI_MODEL
+from .shared_lib.callbacks import make_before_model_callback
+from .shared_lib.history import default_compaction
 from .sub_agents.generate_image_agent.agent import generate_image_agent
 from .sub_agents.prompt_generator.agent import prompt_generator
 from .sub_agents.thumbnail_analyzer_agent.agent import thumbnail_analyzer_agent
@@ -11,6 +13,9 @@ thumbnail_agent = Agent(
     name="youtube_thumbnail_generator",
     description="A manager agent that orchestrates the YouTube thumbnail cloning process.",
     model=GEMINI_MODEL,
+    before_model_callback=make_before_model_callback(
+        image_history="reference", compaction=default_compaction()
+    ),
     sub_agents=[
         prompt_generator,
         generate_image_agent,
@@ -38,9 +43,13 @@ thumbnail_agent = Agent(
     
     Delegate to: thumbnail_scraper_agent
     This specialized agent will:
+    - Resume earlier (possibly interrupted) work on the channel from its checkpoint,
+      skipping the phases that were already completed
     - Scrape the latest video thumbnails from the specified channel
     - Download these thumbnails to our reference folder
     - Provide confirmation when the thumbnails are ready for analysis
+    - Detect when the channel matches the style of a previously analyzed channel and
+      offer to reuse that analysis (in which case Phase 3 is skipped)
     
     ## Phase 3: Style Analysis
     
@@ -1,12 +1,117 @@
 GEMINI_MODEL = "gemini-2.5-flash-preview-04-17"
 
 # OpenAI image generation constants
+IMAGE_MODEL = "gpt-image-1"  # Image generation/editing model
 THUMBNAIL_IMAGE_SIZE = "1536x1024"  # Landscape format for YouTube thumbnails
+GENERATION_CACHE_MAX_BYTES = 500 * 1024 * 1024  # LRU budget for cached results
+GENERATION_CACHE_INDEX_FLUSH_SECONDS = 30  # Minimum interval between access-time index writes
+MAX_IMAGE_VARIANTS = 4  # Maximum candidates per create_image call
+MAX_CONCURRENT_VARIANTS = 4  # Variants generated in parallel per call
+DRAFT_IMAGE_QUALITY = "low"  # Fast, cheap renders for feedback iterations
+FINAL_IMAGE_QUALITY = "high"  # Full quality render of the chosen draft
+IMAGE_PARTIAL_IMAGES = 2  # Partial previews streamed per image (0 disables streaming)
+
+# OpenAI client connection pool constants (shared by all sessions and threads)
+OPENAI_MAX_CONNECTIONS = 20  # Maximum concurrent connections to the API
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = 10  # Idle connections kept warm for reuse
+OPENAI_KEEPALIVE_EXPIRY = 120.0  # Seconds an idle connection stays in the pool
+OPENAI_CONNECT_TIMEOUT = 10.0  # Seconds to establish a connection
+OPENAI_READ_TIMEOUT = 300.0  # Seconds to wait for an image to be returned
+OPENAI_MAX_RETRIES = 2  # Retries for connection errors, 429s and 5xx responses
+
+# Image API scheduling constants (process-wide, shared by all sessions)
+IMAGE_API_MAX_CONCURRENCY = 8  # Image requests in flight at once
+IMAGE_API_REQUESTS_PER_MINUTE = 50  # Keep at or below the account's image rate limit
+
+# Upload-once asset references (Files API + Responses image_generation tool)
+USE_ASSET_FILE_REFERENCES = True  # Refer to uploaded inputs by file ID
+IMAGE_REFERENCE_MODEL = "gpt-4.1-mini"  # Model that calls the image_generation tool
+ASSET_REFERENCE_TTL_SECONDS = 24 * 60 * 60  # Re-upload (and delete) files after this
+
+# Uploaded asset ingestion constants
+ASSET_INGEST_WORKERS = 2  # Threads writing uploaded images to disk
+
+# Conversation image history constants (before_model_callback)
+IMAGE_HISTORY_MODE = "reference"  # Older stored images: "reference", "preview" or "keep"
+IMAGE_HISTORY_KEEP_TURNS = 1  # Latest user turns whose images are always sent in full
+IMAGE_HISTORY_PREVIEW_SIZE = 256  # Longest edge of previews in "preview" mode
+
+# Conversation history compaction constants (before_model_callback)
+HISTORY_TOOL_PAYLOAD_KEEP_TURNS = 2  # Latest user turns whose tool payloads are kept in full
+HISTORY_TOOL_PAYLOAD_MAX_CHARS = 1500  # Longer tool arguments/results are shortened
+HISTORY_SUMMARY_KEEP_TURNS = 6  # Latest user turns sent verbatim; older ones are summarized
+HISTORY_SUMMARY_MESSAGE_CHARS = 300  # Characters kept per message in the summary
+HISTORY_WINDOW_TURNS = 12  # User turns kept by the sliding window strategy
+
+# User asset preprocessing constants
+ASSET_PREPROCESS_WORKERS = 2  # Worker processes used to normalize assets
+NORMALIZED_ASSET_MAX_DIMENSION = 1536  # Longest edge used by the image model
+NORMALIZED_JPEG_QUALITY = 90  # JPEG quality for assets without transparency
+
+# Title text overlay constants
+TITLE_FONT_PATH = ""  # Optional .ttf/.otf for title text (otherwise a system bold font)
+
+# Layered compositing constants
+CUTOUT_MIN_COVERAGE = 0.02  # Smallest share of the asset a cutout subject must cover
+CUTOUT_MAX_MISMATCH = 0.12  # Largest mean difference for a cutout mask to count as aligned
+
+# Background generation job constants
+GENERATION_JOB_WORKERS = 8  # Jobs rendered concurrently per process
+GENERATION_JOB_MAX_WAIT_SECONDS = 60  # Longest a status call blocks for a result
+GENERATION_JOB_RETENTION_HOURS = 24  # Finished jobs older than this are deleted
+GENERATION_JOB_PRUNE_INTERVAL_SECONDS = 600  # Minimum interval between job prunes
+
+# Generated thumbnail store constants
+THUMBNAIL_VERSIONS_PER_SESSION = 50  # Newest versions kept per session (finals always kept)
+
+# Session workspace constants
+WORKSPACE_RETENTION_DAYS = 14  # Workspaces idle for longer are deleted (0 keeps forever)
+WORKSPACE_SWEEP_INTERVAL_SECONDS = 60 * 60  # How often idle workspaces are looked for
+
+# YouTube export constants
+EXPORT_SIZE = (1280, 720)  # 16:9 upload size recommended by YouTube
+EXPORT_MAX_BYTES = 2 * 1000 * 1000  # YouTube's 2 MB thumbnail limit (with margin)
+EXPORT_PREVIEW_SIZES = [(640, 360), (320, 180)]  # Small previews emitted alongside
+EXPORT_PREVIEW_QUALITY = 80  # Fixed encode quality for previews
+EXPORT_WORKERS = 2  # Worker processes used to encode exports
+
+# Session and artifact persistence constants
+APP_NAME = "youtube_thumbnail_agent"  # App name sessions and artifacts are stored under
+ARTIFACT_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Artifact bytes kept in memory for reads
+
+# Checkpoint constants
+CHECKPOINT_RETENTION_DAYS = 30  # Checkpoints not updated for longer are deleted (0 keeps all)
+
+# Prompt generation constants
+REFERENCE_ANALYSES_TOP_K = 2  # Most relevant analyses included in the prompt
+
+# State offloading constants
+STATE_OFFLOAD_MIN_CHARS = 512  # Shorter state values stay inline in session state
+STATE_BLOB_CACHE_SIZE = 128  # Offloaded values kept in memory
 
 # Image directory structure constants
 IMAGE_ROOT_DIR = "images"  # Root directory for all images
-REFERENCE_IMAGES_DIR = (
-    f"{IMAGE_ROOT_DIR}/reference_images"  # For scraped/reference thumbnails
-)
-THUMBNAIL_ASSETS_DIR = f"{IMAGE_ROOT_DIR}/assets"  # For user-uploaded assets
-GENERATED_THUMBNAILS_DIR = f"{IMAGE_ROOT_DIR}/generated"  # For generated thumbnails
+WORKSPACES_DIR = f"{IMAGE_ROOT_DIR}/sessions"  # One workspace directory per session
+# Directories inside each session workspace
+REFERENCE_IMAGES_DIR = "reference_images"  # For scraped/reference thumbnails
+THUMBNAIL_ASSETS_DIR = "assets"  # For user-uploaded assets
+GENERATED_THUMBNAILS_DIR = "generated"  # Versioned generated thumbnails
+EXPORTS_DIR = "exports"  # Upload-ready thumbnails and previews
+# Directories shared by all sessions
+IMAGE_CACHE_DIR = f"{IMAGE_ROOT_DIR}/cache"  # For caches and registries
+ASSET_REGISTRY_PATH = f"{IMAGE_CACHE_DIR}/asset_registry.json"  # Uploaded file IDs
+NORMALIZED_ASSETS_DIR = f"{IMAGE_CACHE_DIR}/normalized"  # Preprocessed user assets
+GENERATION_CACHE_DIR = f"{IMAGE_CACHE_DIR}/generations"  # Cached generation results
+GENERATION_JOBS_DIR = f"{IMAGE_ROOT_DIR}/jobs"  # Background generation job records
+THUMBNAIL_PLATES_DIR = f"{IMAGE_CACHE_DIR}/plates"  # Text-free thumbnail plates
+LAYER_CACHE_DIR = f"{IMAGE_CACHE_DIR}/layers"  # Background plates and asset cutouts
+STATE_BLOBS_DIR = f"{IMAGE_ROOT_DIR}/state_blobs"  # Bulky session state values
+SESSION_DB_PATH = f"{IMAGE_ROOT_DIR}/sessions.db"  # SQLite database of sessions and events
+ARTIFACTS_DIR = f"{IMAGE_ROOT_DIR}/artifacts"  # Saved artifact versions
+CHECKPOINTS_DIR = f"{IMAGE_ROOT_DIR}/checkpoints"  # Phase checkpoints per channel and session
+
+# Style similarity index constants
+STYLE_INDEX_DIR = f"{IMAGE_ROOT_DIR}/style_index"  # Vector index of analyzed thumbnails
+STYLE_PACKS_DIR = f"{STYLE_INDEX_DIR}/packs"  # Stored analyses and style guides
+STYLE_MATCH_SAMPLE_SIZE = 3  # Thumbnails of a new channel compared against the index
+STYLE_MATCH_THRESHOLD = 0.9  # Minimum score to suggest reusing a style pack
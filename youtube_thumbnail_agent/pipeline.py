@@ -0,0 +1,348 @@
+"""
+Deterministic pipeline mode.
+
+The conversational manager agent spends a model call at every phase
+transition to decide to delegate to the next sub-agent, although the order
+never changes. For API callers that already know the channel, the video and
+the assets, ThumbnailPipelineAgent runs the phases directly in code:
+
+1. scrape      - scrape_channel (reusing a matching style pack if there is one)
+2. analyze     - the single thumbnail analyzer for each pending thumbnail;
+                 selecting and saving happen in code
+3. style_guide - the style guide generator
+4. prompt      - the prompt generator, with the video details already saved
+5. generate    - create_image, finalize_thumbnail and export_thumbnail
+
+Models are only called where they do the actual work, never for routing.
+Work is resumed from the channel's latest checkpoint, so completed phases
+are skipped.
+"""
+
+import asyncio
+import inspect
+import mimetypes
+from typing import AsyncGenerator, Callable, Dict, Optional, Sequence, Tuple
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+from .constants import APP_NAME, FINAL_IMAGE_QUALITY
+from .shared_lib.asset_ingestion import ingest_images, wait_for_assets
+from .shared_lib.runtime import create_runner
+from .shared_lib.state_blobs import resolve
+from .shared_lib.workspace import get_workspace
+from .sub_agents.generate_image_agent.tools import (
+    create_image,
+    export_thumbnail,
+    finalize_thumbnail,
+)
+from .sub_agents.prompt_generator.agent import prompt_generator, save_video_details
+from .sub_agents.thumbnail_analyzer_agent.sub_agents.single_thumbnail_analyzer_agent import (
+    single_thumbnail_analyzer_agent,
+)
+from .sub_agents.thumbnail_analyzer_agent.sub_agents.style_guide_generator_agent import (
+    style_guide_generator_agent,
+)
+from .sub_agents.thumbnail_analyzer_agent.tools.save_analysis import save_analysis
+from .sub_agents.thumbnail_analyzer_agent.tools.select_thumbnail import select_thumbnail
+from .sub_agents.thumbnail_scraper.tools.resume_checkpoint import resume_checkpoint
+from .sub_agents.thumbnail_scraper.tools.reuse_style_pack import reuse_style_pack
+from .sub_agents.thumbnail_scraper.tools.scrape_channel import scrape_channel
+
+_OK = ("success", "partial_success", "warning")
+
+
+class PipelineError(Exception):
+    """A phase of the pipeline failed."""
+
+    def __init__(self, phase: str, message: str):
+        super().__init__(message)
+        self.phase = phase
+
+
+def _standalone(agent: LlmAgent) -> LlmAgent:
+    """Return a copy of a sub-agent that cannot transfer to other agents."""
+    # The originals already have a parent in the conversational tree, and ADK
+    # allows only one. Copying leaves the originals' parent_agent untouched and
+    # lets the pipeline adopt the copies. The copies share the originals'
+    # sub_agents lists, which is safe: these agents are leaves, and with
+    # transfers disabled nothing walks from a copy to another agent.
+    return agent.model_copy(
+        update={
+            "parent_agent": None,
+            "disallow_transfer_to_parent": True,
+            "disallow_transfer_to_peers": True,
+        }
+    )
+
+
+class ThumbnailPipelineAgent(BaseAgent):
+    """
+    Runs scrape, analyze, style guide, prompt and generate in a fixed order.
+
+    Reads its inputs from session state: pipeline_channel, pipeline_video_title
+    and pipeline_video_topic. The outcome is saved to pipeline_result.
+    """
+
+    analyzer: LlmAgent
+    style_guide_generator: LlmAgent
+    prompt_writer: LlmAgent
+    reuse_style_packs: bool = True
+
+    def __init__(self, name: str, reuse_style_packs: bool = True):
+        analyzer = _standalone(single_thumbnail_analyzer_agent)
+        style_guide_generator = _standalone(style_guide_generator_agent)
+        prompt_writer = _standalone(prompt_generator)
+        super().__init__(
+            name=name,
+            description="Generates a thumbnail for a channel and video without routing turns.",
+            analyzer=analyzer,
+            style_guide_generator=style_guide_generator,
+            prompt_writer=prompt_writer,
+            reuse_style_packs=reuse_style_packs,
+            sub_agents=[analyzer, style_guide_generator, prompt_writer],
+        )
+
+    async def _call_tool(
+        self, ctx: InvocationContext, tool: Callable[..., Dict], **kwargs
+    ) -> Tuple[Dict, Event]:
+        """
+        Call a tool in code and return its result and the event carrying its state changes.
+
+        Synchronous tools (network and image work) run on a worker thread so
+        the event loop stays free; this generator is suspended meanwhile, so
+        the tool context is not touched concurrently.
+        """
+        tool_context = ToolContext(ctx)
+        if inspect.iscoroutinefunction(tool):
+            result = await tool(tool_context=tool_context, **kwargs)
+        else:
+            result = await asyncio.to_thread(tool, tool_context=tool_context, **kwargs)
+        print(f"[Pipeline] {tool.__name__}: {result.get('message', result.get('status'))}")
+        event = Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=tool_context.actions,
+        )
+        return result, event
+
+    def _message(self, ctx: InvocationContext, text: str, **state) -> Event:
+        """Return an event with a progress message and optional state changes."""
+        event = Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+        )
+        event.actions.state_delta.update(state)
+        return event
+
+    async def _run_async_impl(
+        self, ctx: InvocationContext
+    ) -> AsyncGenerator[Event, None]:
+        state = ctx.session.state
+        phase = "scrape"
+        try:
+            channel = state.get("pipeline_channel")
+            if not channel or not state.get("pipeline_video_title"):
+                raise PipelineError(phase, "pipeline_channel and pipeline_video_title must be set")
+
+            # Images in the request are the user's assets
+            blobs = [
+                part.inline_data
+                for part in (ctx.user_content.parts if ctx.user_content else None) or []
+                if part.inline_data and part.inline_data.data
+            ]
+            if blobs:
+                workspace = get_workspace(ToolContext(ctx))
+                await asyncio.to_thread(ingest_images, workspace, blobs)
+                await asyncio.to_thread(wait_for_assets, workspace.session_id)
+
+            # Phase 1: scrape (or pick up where an earlier run stopped)
+            if not state.get("thumbnail_analysis"):
+                result, event = await self._call_tool(ctx, resume_checkpoint, channel_name=channel)
+                yield event
+                if result["status"] == "error":
+                    raise PipelineError(phase, result["message"])
+            if not state.get("thumbnail_analysis"):
+                result, event = await self._call_tool(ctx, scrape_channel, channel_name=channel)
+                yield event
+                if result["status"] not in _OK:
+                    raise PipelineError(phase, result["message"])
+                if self.reuse_style_packs and result.get("style_match"):
+                    result, event = await self._call_tool(
+                        ctx, reuse_style_pack, pack_id=result["style_match"]["pack_id"]
+                    )
+                    yield event
+
+            # Phase 2: analyze each pending thumbnail
+            phase = "analyze"
+            if not state.get("style_guide"):
+                pending = [
+                    name
+                    for name, analysis in state["thumbnail_analysis"].items()
+                    if not analysis
+                ]
+                for filename in pending:
+                    result, event = await self._call_tool(
+                        ctx, select_thumbnail, thumbnail_filename=filename
+                    )
+                    event.actions.state_delta["thumbnail_analysis_result"] = ""
+                    yield event
+                    if result["status"] != "success":
+                        raise PipelineError(phase, result["message"])
+
+                    async for event in self.analyzer.run_async(ctx):
+                        yield event
+                    analysis = resolve(state.get("thumbnail_analysis_result"))
+                    if not analysis:
+                        raise PipelineError(phase, f"No analysis was produced for {filename}")
+
+                    result, event = await self._call_tool(
+                        ctx, save_analysis, thumbnail_filename=filename, analysis=analysis
+                    )
+                    yield event
+                    if result["status"] != "success":
+                        raise PipelineError(phase, result["message"])
+
+            # Phase 3: style guide
+            phase = "style_guide"
+            if not state.get("style_guide"):
+                async for event in self.style_guide_generator.run_async(ctx):
+                    yield event
+                if not state.get("style_guide"):
+                    raise PipelineError(phase, "No style guide was produced")
+
+            # Phase 4: prompt (one left by an earlier run only counts if it is for this video)
+            phase = "prompt"
+            video_title = state["pipeline_video_title"]
+            if not state.get("prompt") or state.get("video_title") != video_title:
+                result, event = await self._call_tool(
+                    ctx,
+                    save_video_details,
+                    video_title=video_title,
+                    topic_summary=state.get("pipeline_video_topic", ""),
+                )
+                event.actions.state_delta["prompt"] = None
+                yield event
+                async for event in self.prompt_writer.run_async(ctx):
+                    yield event
+                if not state.get("prompt"):
+                    raise PipelineError(phase, "No prompt was saved")
+
+            # Phase 5: generate, finalize and export
+            phase = "generate"
+            result, event = await self._call_tool(ctx, create_image, prompt=resolve(state["prompt"]))
+            yield event
+            if result["status"] not in _OK:
+                raise PipelineError(phase, result["message"])
+            if result.get("quality") != FINAL_IMAGE_QUALITY:
+                # Only re-render when the draft tier is below full quality
+                result, event = await self._call_tool(ctx, finalize_thumbnail)
+                yield event
+                if result["status"] not in _OK:
+                    raise PipelineError(phase, result["message"])
+            result, event = await self._call_tool(ctx, export_thumbnail)
+            yield event
+
+            yield self._message(
+                ctx,
+                f"Thumbnail ready: {state.get('thumbnail_path')}",
+                pipeline_result={
+                    "status": "success",
+                    "message": "Thumbnail generated",
+                    "thumbnail_path": state.get("thumbnail_path"),
+                    "export_path": state.get("export_path"),
+                },
+            )
+
+        except PipelineError as e:
+            yield self._message(
+                ctx,
+                f"Pipeline stopped in phase '{e.phase}': {str(e)}",
+                pipeline_result={"status": "error", "phase": e.phase, "message": str(e)},
+            )
+
+
+pipeline_agent = ThumbnailPipelineAgent(name="thumbnail_pipeline")
+
+
+async def run_pipeline(
+    channel: str,
+    video_title: str,
+    video_topic: str = "",
+    asset_paths: Sequence[str] = (),
+    user_id: str = "pipeline",
+    session_id: Optional[str] = None,
+) -> Dict:
+    """
+    Generate a thumbnail for a video in the style of a channel, without a conversation.
+
+    Running again with the same session ID (or on the same channel) resumes
+    the work instead of starting over.
+
+    Args:
+        channel: YouTube channel URL, handle or ID whose style to clone
+        video_title: The exact title of the video
+        video_topic: A 1-2 sentence summary of what the video is about
+        asset_paths: Images (e.g. a photo of the creator) to include
+        user_id: The user the session belongs to
+        session_id: ID of the session to run in (a new one by default)
+
+    Returns:
+        dict: Result containing status and message, plus thumbnail_path and
+            export_path on success
+    """
+    runner = create_runner(pipeline_agent)
+    session = None
+    if session_id:
+        session = runner.session_service.get_session(
+            app_name=APP_NAME, user_id=user_id, session_id=session_id
+        )
+    if session is None:
+        session = runner.session_service.create_session(
+            app_name=APP_NAME,
+            user_id=user_id,
+            session_id=session_id,
+            state={
+                "pipeline_channel": channel,
+                "pipeline_video_title": video_title,
+                "pipeline_video_topic": video_topic,
+            },
+        )
+
+    brief = f"Create a thumbnail for my video.\nTitle: {video_title}"
+    if video_topic:
+        brief += f"\nTopic: {video_topic}"
+    parts = [types.Part(text=brief)]
+    for path in asset_paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        mime_type = mimetypes.guess_type(path)[0] or "image/png"
+        parts.append(types.Part(inline_data=types.Blob(data=data, mime_type=mime_type)))
+
+    async for event in runner.run_async(
+        user_id=user_id,
+        session_id=session.id,
+        new_message=types.Content(role="user", parts=parts),
+    ):
+        if event.author == pipeline_agent.name and event.content and event.content.parts:
+            print(f"[Pipeline] {event.content.parts[0].text}")
+
+    session = runner.session_service.get_session(
+        app_name=APP_NAME, user_id=user_id, session_id=session.id
+    )
+    result = dict(session.state.get("pipeline_result") or {})
+    result.setdefault("status", "error")
+    result.setdefault("message", "The pipeline did not finish")
+    result["session_id"] = session.id
+    return result
+
+
+def run_pipeline_sync(*args, **kwargs) -> Dict:
+    """Blocking version of run_pipeline for scripts."""
+    return asyncio.run(run_pipeline(*args, **kwargs))
@@ -2,11 +2,24 @@
 Shared library for YouTube thumbnail generator agent.
 """
 
-from .callbacks import before_model_callback
+from .callbacks import (
+    before_model_callback,
+    make_before_model_callback,
+    make_offload_output_callback,
+    register_style_pack_callback,
+)
 from .image_utils import delete_image, list_images
+from .state_views import state_instruction
+from .workspace import cleanup_workspace, get_workspace
 
 __all__ = [
     "before_model_callback",
+    "make_before_model_callback",
+    "make_offload_output_callback",
+    "register_style_pack_callback",
     "list_images",
     "delete_image",
+    "state_instruction",
+    "get_workspace",
+    "cleanup_workspace",
 ]
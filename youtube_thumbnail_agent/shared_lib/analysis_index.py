@@ -0,0 +1,148 @@
+"""
+Lightweight offline retrieval index over thumbnail analyses.
+
+Uses a TF-IDF bag-of-words model with cosine similarity so the prompt
+generator can include only the analyses most relevant to the user's video
+instead of every analysis on every turn.
+"""
+
+import hashlib
+import math
+import re
+from collections import Counter, OrderedDict
+from typing import Dict, List, Tuple
+
+_TOKEN_PATTERN = re.compile(r"#?[a-z0-9]+")
+
+_STOPWORDS = frozenset(
+    """
+    a an and are as at be but by for from has have in is it its of on or that
+    the this to was were will with you your i we our they their there which
+    what how who why when where into than then also very more most can
+    """.split()
+)
+
+# Maximum number of indexes kept in memory (keyed by analyses fingerprint)
+_MAX_CACHED_INDEXES = 32
+_INDEX_CACHE: "OrderedDict[str, AnalysisIndex]" = OrderedDict()
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase terms, dropping stopwords and single letters."""
+    return [
+        token
+        for token in _TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and token not in _STOPWORDS
+    ]
+
+
+class AnalysisIndex:
+    """TF-IDF index over a fixed set of named documents."""
+
+    def __init__(self, documents: Dict[str, str]):
+        self.names = list(documents)
+        term_counts = [Counter(tokenize(documents[name])) for name in self.names]
+
+        document_frequency: Counter = Counter()
+        for counts in term_counts:
+            document_frequency.update(counts.keys())
+
+        total = len(self.names)
+        self.idf = {
+            term: math.log((1 + total) / (1 + df)) + 1
+            for term, df in document_frequency.items()
+        }
+        self.vectors = [self._weigh(counts) for counts in term_counts]
+
+    def _weigh(self, counts: Counter) -> Dict[str, float]:
+        """Convert raw term counts to an L2-normalised TF-IDF vector."""
+        vector = {
+            term: (1 + math.log(count)) * self.idf[term]
+            for term, count in counts.items()
+            if term in self.idf
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        if norm == 0:
+            return {}
+        return {term: weight / norm for term, weight in vector.items()}
+
+    def search(self, query: str, top_k: int) -> List[Tuple[str, float]]:
+        """
+        Return the top_k documents most similar to the query.
+
+        Args:
+            query: Free text, e.g. the video title and topic summary
+            top_k: Maximum number of results
+
+        Returns:
+            list: (document name, cosine similarity) pairs, best first
+        """
+        query_vector = self._weigh(Counter(tokenize(query)))
+        scored = []
+        for name, vector in zip(self.names, self.vectors):
+            # Iterate over the shorter vector for the dot product
+            small, large = sorted((query_vector, vector), key=len)
+            score = sum(weight * large.get(term, 0.0) for term, weight in small.items())
+            scored.append((name, score))
+
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:top_k]
+
+
+def _fingerprint(documents: Dict[str, str]) -> str:
+    """Stable digest of the document set, used as the index cache key."""
+    digest = hashlib.sha256()
+    for name in sorted(documents):
+        digest.update(name.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(documents[name].encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def get_analysis_index(analyses: Dict[str, str]) -> AnalysisIndex:
+    """
+    Return an index for the given analyses, reusing a cached one if unchanged.
+
+    Args:
+        analyses: Mapping of thumbnail filename to analysis text
+
+    Returns:
+        AnalysisIndex: Index over the non-empty analyses
+    """
+    documents = {name: text for name, text in analyses.items() if text}
+    key = _fingerprint(documents)
+
+    index = _INDEX_CACHE.get(key)
+    if index is None:
+        index = AnalysisIndex(documents)
+        _INDEX_CACHE[key] = index
+        if len(_INDEX_CACHE) > _MAX_CACHED_INDEXES:
+            _INDEX_CACHE.popitem(last=False)
+    else:
+        _INDEX_CACHE.move_to_end(key)
+
+    return index
+
+
+def retrieve_analyses(
+    analyses: Dict[str, str], query: str, top_k: int
+) -> List[Tuple[str, float]]:
+    """
+    Retrieve the analyses most relevant to a query.
+
+    When the query is empty (e.g. the video title is not known yet) the first
+    top_k analyses are returned with a score of 0.
+
+    Args:
+        analyses: Mapping of thumbnail filename to analysis text
+        query: Video title and/or topic
+        top_k: Maximum number of analyses to return
+
+    Returns:
+        list: (thumbnail filename, similarity score) pairs, best first
+    """
+    index = get_analysis_index(analyses)
+    if not tokenize(query):
+        return [(name, 0.0) for name in index.names[:top_k]]
+    return index.search(query, top_k)
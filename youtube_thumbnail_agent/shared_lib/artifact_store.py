@@ -0,0 +1,233 @@
+"""
+Filesystem implementation of ADK's artifact service.
+
+Every artifact version is a file on disk, so artifacts survive restarts and
+do not accumulate in memory like they do with InMemoryArtifactService. Reads
+go through a small LRU cache bounded by ARTIFACT_CACHE_MAX_BYTES, which keeps
+the memory use of long-running workers flat however many versions exist.
+
+Layout:
+    <root>/<app>/<user>/<session>/<filename>/<version>.bin   (artifact data)
+    <root>/<app>/<user>/<session>/<filename>/<version>.json  (MIME type)
+
+Artifacts with a "user:" filename are shared by all of a user's sessions and
+live under <root>/<app>/<user>/@user/ instead. Quoted session IDs never
+contain "@", so no session directory can collide with it.
+"""
+
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from google.adk.artifacts import BaseArtifactService
+from google.genai import types
+
+from ..constants import ARTIFACT_CACHE_MAX_BYTES, ARTIFACTS_DIR
+
+# Directory of a user's shared "user:" artifacts (never a quoted session ID)
+_USER_SCOPE_DIR = "@user"
+
+
+class FileArtifactService(BaseArtifactService):
+    """Artifact service that stores every version as a file."""
+
+    def __init__(
+        self, root: str = ARTIFACTS_DIR, cache_max_bytes: int = ARTIFACT_CACHE_MAX_BYTES
+    ):
+        self.root = root
+        self.cache_max_bytes = cache_max_bytes
+        self._cache: "OrderedDict[Tuple[str, int], types.Part]" = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _scope_dir(self, app_name: str, user_id: str, session_id: Optional[str]) -> str:
+        """Return the directory holding a session's artifacts (the user's shared ones for None)."""
+        return os.path.join(
+            self.root,
+            quote(app_name, safe=""),
+            quote(user_id, safe=""),
+            quote(session_id, safe="") if session_id is not None else _USER_SCOPE_DIR,
+        )
+
+    def _artifact_dir(
+        self, app_name: str, user_id: str, session_id: str, filename: str
+    ) -> str:
+        """Return the directory holding the versions of one artifact."""
+        if filename.startswith("user:"):
+            session_id = None
+        return os.path.join(
+            self._scope_dir(app_name, user_id, session_id), quote(filename, safe="")
+        )
+
+    @staticmethod
+    def _versions(artifact_dir: str) -> List[int]:
+        """Return the complete versions in an artifact directory, oldest first."""
+        try:
+            names = os.listdir(artifact_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            int(name[: -len(".json")])
+            for name in names
+            if name.endswith(".json") and name[: -len(".json")].isdigit()
+        )
+
+    def _cache_get(self, key: Tuple[str, int]) -> Optional[types.Part]:
+        with self._lock:
+            part = self._cache.get(key)
+            if part is not None:
+                self._cache.move_to_end(key)
+            return part
+
+    def _cache_put(self, key: Tuple[str, int], part: types.Part, size: int) -> None:
+        if size > self.cache_max_bytes:
+            return
+        with self._lock:
+            if key in self._cache:
+                return
+            self._cache[key] = part
+            self._cache_bytes += size
+            while self._cache_bytes > self.cache_max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= _part_size(evicted)
+
+    def _cache_drop(self, directory: str) -> None:
+        """Forget cached versions of artifacts stored in or under a directory."""
+        prefix = directory + os.sep
+        with self._lock:
+            stale = [
+                key
+                for key in self._cache
+                if key[0] == directory or key[0].startswith(prefix)
+            ]
+            for key in stale:
+                self._cache_bytes -= _part_size(self._cache.pop(key))
+
+    def save_artifact(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        filename: str,
+        artifact: types.Part,
+    ) -> int:
+        artifact_dir = self._artifact_dir(app_name, user_id, session_id, filename)
+        os.makedirs(artifact_dir, exist_ok=True)
+
+        if artifact.inline_data is not None:
+            data = artifact.inline_data.data or b""
+            metadata = {"mime_type": artifact.inline_data.mime_type}
+        elif artifact.text is not None:
+            data = artifact.text.encode("utf-8")
+            metadata = {"mime_type": "text/plain", "text": True}
+        else:
+            raise ValueError("Only inline data and text artifacts can be saved")
+
+        # Claim the next version number; O_EXCL keeps concurrent writers apart
+        versions = self._versions(artifact_dir)
+        version = versions[-1] + 1 if versions else 0
+        while True:
+            data_path = os.path.join(artifact_dir, f"{version}.bin")
+            try:
+                fd = os.open(data_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+                break
+            except FileExistsError:
+                version += 1
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+
+        # The metadata file is written last and marks the version as complete
+        metadata_path = os.path.join(artifact_dir, f"{version}.json")
+        tmp_path = f"{metadata_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(metadata, f)
+        os.replace(tmp_path, metadata_path)
+        return version
+
+    def load_artifact(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        filename: str,
+        version: Optional[int] = None,
+    ) -> Optional[types.Part]:
+        artifact_dir = self._artifact_dir(app_name, user_id, session_id, filename)
+        if version is None:
+            versions = self._versions(artifact_dir)
+            if not versions:
+                return None
+            version = versions[-1]
+
+        key = (artifact_dir, version)
+        part = self._cache_get(key)
+        if part is not None:
+            return part
+
+        try:
+            with open(os.path.join(artifact_dir, f"{version}.json")) as f:
+                metadata = json.load(f)
+            with open(os.path.join(artifact_dir, f"{version}.bin"), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+
+        if metadata.get("text"):
+            part = types.Part(text=data.decode("utf-8"))
+        else:
+            part = types.Part(
+                inline_data=types.Blob(data=data, mime_type=metadata.get("mime_type"))
+            )
+        self._cache_put(key, part, len(data))
+        return part
+
+    def list_artifact_keys(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> list[str]:
+        filenames = []
+        for scope in (session_id, None):
+            scope_dir = self._scope_dir(app_name, user_id, scope)
+            if not os.path.isdir(scope_dir):
+                continue
+            for name in os.listdir(scope_dir):
+                filename = unquote(name)
+                # Session artifacts never start with "user:" and vice versa
+                if (scope is None) == filename.startswith("user:"):
+                    filenames.append(filename)
+        return sorted(filenames)
+
+    def delete_artifact(
+        self, *, app_name: str, user_id: str, session_id: str, filename: str
+    ) -> None:
+        artifact_dir = self._artifact_dir(app_name, user_id, session_id, filename)
+        self._cache_drop(artifact_dir)
+        shutil.rmtree(artifact_dir, ignore_errors=True)
+
+    def list_versions(
+        self, *, app_name: str, user_id: str, session_id: str, filename: str
+    ) -> list[int]:
+        return self._versions(
+            self._artifact_dir(app_name, user_id, session_id, filename)
+        )
+
+    def delete_session_artifacts(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        """Delete every artifact of a session (the user's shared ones are kept)."""
+        scope_dir = self._scope_dir(app_name, user_id, session_id)
+        self._cache_drop(scope_dir)
+        shutil.rmtree(scope_dir, ignore_errors=True)
+
+
+def _part_size(part: types.Part) -> int:
+    """Return the number of bytes a cached part holds."""
+    if part.inline_data is not None:
+        return len(part.inline_data.data or b"")
+    return len((part.text or "").encode("utf-8"))
@@ -0,0 +1,149 @@
+"""
+Idempotent ingestion of images uploaded in the conversation.
+
+before_model_callback runs before every model call and sees the same user
+message again and again. Uploaded images are therefore stored under their
+content hash (user_asset_<digest>.<ext>), and digests already stored in a
+workspace are remembered in memory, so a repeated image costs one hash and
+no disk I/O. New images are written on a small thread pool, off the event
+loop, and readers wait for a session's pending writes before listing its
+assets.
+"""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Set
+
+from google.genai import types
+
+from ..constants import ASSET_INGEST_WORKERS
+from .workspace import Workspace, on_workspace_cleanup
+
+_PREFIX = "user_asset_"
+_EXTENSIONS = {"image/jpeg": "jpg", "image/jpg": "jpg"}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+_stored: Dict[str, Set[str]] = {}  # Session ID -> digests stored in its workspace
+_pending: Dict[str, List[Future]] = {}  # Session ID -> writes still in progress
+
+
+def asset_filename(digest: str, mime_type: str) -> str:
+    """Return the file name an uploaded image with this digest is stored under."""
+    extension = _EXTENSIONS.get(mime_type, mime_type.split("/")[-1])
+    return f"{_PREFIX}{digest[:16]}.{extension}"
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Return the shared writer pool, creating it on first use (call with _lock held)."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=ASSET_INGEST_WORKERS, thread_name_prefix="asset-ingest"
+        )
+    return _executor
+
+
+def _write_asset(path: str, data: bytes) -> None:
+    """Write an asset atomically so readers never see a partial file."""
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"[Asset Ingestion] Error saving {path}: {str(e)}")
+        raise
+
+
+def _stored_digests(workspace: Workspace) -> Set[str]:
+    """Return the digest prefixes stored in a workspace (scanned once per process)."""
+    digests = _stored.get(workspace.session_id)
+    if digests is None:
+        digests = {
+            name[len(_PREFIX) :].split(".")[0]
+            for name in os.listdir(workspace.assets_dir)
+            if name.startswith(_PREFIX) and not name.endswith(".tmp")
+        }
+        _stored[workspace.session_id] = digests
+    return digests
+
+
+def ingest_images(workspace: Workspace, blobs: List[types.Blob]) -> List[str]:
+    """
+    Store uploaded images in a workspace unless they are already there.
+
+    Args:
+        workspace: The session's workspace
+        blobs: Inline image data from the conversation
+
+    Returns:
+        list: File names of the images that were new (written in the background)
+    """
+    new_files = []
+    with _lock:
+        stored = _stored_digests(workspace)
+        for blob in blobs:
+            key = hashlib.sha256(blob.data).hexdigest()[:16]
+            if key in stored:
+                continue
+            stored.add(key)
+
+            filename = asset_filename(key, blob.mime_type)
+            future = _get_executor().submit(
+                _write_asset, os.path.join(workspace.assets_dir, filename), blob.data
+            )
+            # A failed write is retried the next time the image is seen
+            future.add_done_callback(
+                lambda f, key=key, stored=stored: f.exception() and stored.discard(key)
+            )
+            pending = _pending.setdefault(workspace.session_id, [])
+            pending[:] = [f for f in pending if not f.done()] + [future]
+            new_files.append(filename)
+    return new_files
+
+
+def stored_asset(workspace: Workspace, blob: types.Blob) -> Optional[str]:
+    """
+    Return the file name an image was stored under, if it was ingested.
+
+    Args:
+        workspace: The session's workspace
+        blob: Inline image data from the conversation
+
+    Returns:
+        str: The asset file name, or None if the image is not stored
+    """
+    key = hashlib.sha256(blob.data).hexdigest()[:16]
+    with _lock:
+        if key not in _stored_digests(workspace):
+            return None
+    return asset_filename(key, blob.mime_type)
+
+
+def wait_for_assets(session_id: str, timeout: float = 30.0) -> None:
+    """
+    Block until the session's pending asset writes have finished.
+
+    Args:
+        session_id: The session ID
+        timeout: Longest time to wait in seconds
+    """
+    with _lock:
+        pending = list(_pending.get(session_id, []))
+    if pending:
+        wait(pending, timeout=timeout)
+
+
+def _forget_session(session_id: str) -> None:
+    """Drop the in-memory bookkeeping of a session whose workspace was removed."""
+    wait_for_assets(session_id)
+    with _lock:
+        _stored.pop(session_id, None)
+        _pending.pop(session_id, None)
+
+
+on_workspace_cleanup(_forget_session)
+
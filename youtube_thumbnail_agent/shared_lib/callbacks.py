@@ -1,106 +1,207 @@
 import base64
 import os
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional, Sequence
 
 from google.adk.agents.callback_context import CallbackContext
 from google.adk.models import LlmRequest, LlmResponse
-
-from ..constants import IMAGE_ROOT_DIR, THUMBNAIL_ASSETS_DIR
-
-
-def ensure_thumbnail_assets_directory_exists():
-    """
-    Ensure that the assets directory exists, creating it if necessary.
-
-    Returns:
-        str: Path to the assets directory
+from google.genai import types
+
+from ..constants import IMAGE_HISTORY_KEEP_TURNS, IMAGE_HISTORY_MODE
+from .asset_ingestion import ingest_images
+from .checkpoints import checkpoint_session
+from .history import (
+    IMAGE_HISTORY_MODES,
+    HistoryStrategy,
+    compact_history,
+    strip_persisted_images,
+)
+from .state_blobs import offload, resolve
+from .style_index import register_style_pack
+from .workspace import get_workspace
+
+
+def make_before_model_callback(
+    image_history: str = IMAGE_HISTORY_MODE,
+    keep_image_turns: int = IMAGE_HISTORY_KEEP_TURNS,
+    compaction: Optional[Sequence[HistoryStrategy]] = None,
+) -> Callable[[CallbackContext, LlmRequest], Optional[LlmResponse]]:
     """
-    # Create the root images directory first
-    os.makedirs(IMAGE_ROOT_DIR, exist_ok=True)
-
-    # Create assets directory
-    assets_dir = THUMBNAIL_ASSETS_DIR
-    if not os.path.exists(assets_dir):
-        os.makedirs(assets_dir)
-        print(f"Created assets directory at {assets_dir}")
-
-    return assets_dir
-
-
-def before_model_callback(
-    callback_context: CallbackContext, llm_request: LlmRequest
-) -> Optional[LlmResponse]:
-    """
-    Callback that executes before the model is called.
-    Detects and saves inline images from user messages to assets folder
-    for use by the generate_image_agent.
+    Create a before_model_callback with its own history settings.
 
     Args:
-        callback_context: The callback context
-        llm_request: The LLM request
+        image_history: How stored images in older turns are sent to the model:
+            "reference" (a text note), "preview" (a small JPEG) or "keep"
+        keep_image_turns: Number of most recent user turns whose images are
+            always sent in full
+        compaction: History strategies applied in order before every model
+            call (see shared_lib.history), or None to send the full history
 
     Returns:
-        Optional[LlmResponse]: None to allow normal processing
+        Callable: The callback
     """
-    agent_name = callback_context.agent_name
-    invocation_id = callback_context.invocation_id
-    print(f"[Image Callback] Processing for agent: {agent_name} (Inv: {invocation_id})")
-
-    # Ensure assets directory exists
-    assets_dir = ensure_thumbnail_assets_directory_exists()
-
-    # Get the last user message parts
-    last_user_message_parts = []
-    if llm_request.contents and llm_request.contents[-1].role == "user":
-        if llm_request.contents[-1].parts:
+    if image_history not in IMAGE_HISTORY_MODES:
+        raise ValueError(f"Unknown image history mode '{image_history}'")
+
+    def before_model_callback(
+        callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        """
+        Callback that executes before the model is called.
+        Detects and saves inline images from user messages to the session's
+        assets folder for use by the generate_image_agent.
+
+        Images are keyed by content hash, so an image already saved by an
+        earlier model call is skipped without touching the disk, and new
+        images are written in the background. Saved images in older turns
+        are then replaced according to the image history setting, and the
+        compaction strategies shrink the rest of the older history.
+
+        Args:
+            callback_context: The callback context
+            llm_request: The LLM request
+
+        Returns:
+            Optional[LlmResponse]: None to allow normal processing
+        """
+        if not llm_request.contents:
+            return None
+
+        # Get the last user message parts
+        last_user_message_parts = []
+        if llm_request.contents[-1].role == "user" and llm_request.contents[-1].parts:
             last_user_message_parts = llm_request.contents[-1].parts
 
-    print(f"[Image Callback] User message parts count: {len(last_user_message_parts)}")
+        images = [
+            part.inline_data
+            for part in last_user_message_parts
+            if part.inline_data
+            and part.inline_data.data
+            and (part.inline_data.mime_type or "").startswith("image/")
+        ]
+
+        # Each session saves its assets to its own workspace
+        workspace = get_workspace(callback_context)
+        if images:
+            saved = ingest_images(workspace, images)
+            if saved:
+                print(
+                    f"[Image Callback] Saving {len(saved)} new image(s) to "
+                    f"{workspace.assets_dir} for agent {callback_context.agent_name}"
+                )
+
+        removed = strip_persisted_images(
+            llm_request, workspace, image_history, keep_image_turns
+        )
+        if removed:
+            print(
+                f"[Image Callback] Removed {removed / 1024:.0f} KB of earlier images "
+                f"from the request for agent {callback_context.agent_name}"
+            )
+
+        if compaction:
+            before, after = compact_history(llm_request, compaction)
+            if after < before:
+                print(
+                    f"[History] Compacted request for agent {callback_context.agent_name}: "
+                    f"~{before} -> ~{after} tokens (saved ~{before - after})"
+                )
+
+        # Continue with normal execution
+        return None
+
+    return before_model_callback
+
+
+# Callback with the default image history setting
+before_model_callback = make_before_model_callback()
+
+
+def make_offload_output_callback(
+    output_key: str,
+) -> Callable[[CallbackContext, LlmResponse], Optional[LlmResponse]]:
+    """
+    Create an after_model_callback that saves the agent's reply like
+    ``output_key`` does, but stores long replies in the blob store and only
+    puts their handle in state.
 
-    # Process any image parts we found
-    image_count = 0
+    Use it instead of ``output_key`` for agents with bulky output, such as
+    thumbnail analyses and the style guide.
 
-    for part in last_user_message_parts:
-        # Debug info
-        print(f"[Image Callback] Examining part type: {type(part)}")
+    Args:
+        output_key: The state key the reply is saved under
 
-        # Make sure it's an image with mime type and data
-        if not hasattr(part, "inline_data") or not part.inline_data:
-            continue
+    Returns:
+        Callable: The callback
+    """
 
-        mime_type = getattr(part.inline_data, "mime_type", None)
-        if not mime_type or not mime_type.startswith("image/"):
-            continue
+    def after_model_callback(
+        callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        content = llm_response.content
+        if llm_response.partial or not content or not content.parts:
+            return None
+        # Like output_key, only the final reply (not a tool call) is saved
+        if any(part.function_call for part in content.parts):
+            return None
 
-        image_data = getattr(part.inline_data, "data", None)
-        if not image_data:
-            continue
+        text = "".join(part.text or "" for part in content.parts)
+        if text:
+            callback_context.state[output_key] = offload(text)
+        return None
 
-        # We have an image to save
-        image_count += 1
-        print(f"[Image Callback] Found image #{image_count}")
+    return after_model_callback
 
-        # Get the file extension from mime type
-        extension = mime_type.split("/")[-1]
-        if extension == "jpeg":
-            extension = "jpg"
 
-        # Generate simple sequential filename
-        image_name = f"user_asset_{image_count}.{extension}"
-        image_path = os.path.join(assets_dir, image_name)
+def register_style_pack_callback(
+    callback_context: CallbackContext,
+) -> Optional[types.Content]:
+    """
+    Callback that executes after the style guide generator.
+    Checkpoints the style guide, then stores the channel's analyses and
+    style guide as a style pack and adds its thumbnails to the style
+    similarity index, so channels with a near-identical style can reuse
+    them later.
 
-        # Save the image
-        try:
-            print(f"[Image Callback] Saving image to: {image_path}")
-            with open(image_path, "wb") as f:
-                f.write(image_data)
-            print(f"[Image Callback] Saved image: {image_name}")
-        except Exception as e:
-            print(f"[Image Callback] Error saving image: {str(e)}")
+    Args:
+        callback_context: The callback context
 
-    # Log the total number of images processed
-    if image_count > 0:
-        print(f"[Image Callback] Saved {image_count} images to {assets_dir}")
+    Returns:
+        Optional[types.Content]: None to keep the agent's own response
+    """
+    state = callback_context.state
+    channel_id = state.get("channel_id")
+    if state.get("style_guide"):
+        checkpoint_session(callback_context, style_guide=state["style_guide"])
+
+    style_guide = resolve(state.get("style_guide"))
+    analyses = {
+        filename: resolve(analysis)
+        for filename, analysis in (state.get("thumbnail_analysis") or {}).items()
+    }
+
+    # Nothing new to index when the analyses came from an existing pack
+    if not channel_id or not style_guide or state.get("style_pack_id"):
+        return None
+
+    reference_dir = get_workspace(callback_context).reference_images_dir
+    image_paths = [
+        os.path.join(reference_dir, filename)
+        for filename, analysis in analyses.items()
+        if analysis and os.path.exists(os.path.join(reference_dir, filename))
+    ]
+    if not image_paths:
+        return None
+
+    try:
+        register_style_pack(
+            pack_id=channel_id,
+            channel_name=state.get("channel_name", channel_id),
+            image_paths=image_paths,
+            analyses=analyses,
+            style_guide=style_guide,
+        )
+        print(f"[Style Index] Registered style pack for channel: {channel_id}")
+    except Exception as e:
+        print(f"[Style Index] Error registering style pack: {str(e)}")
 
-    # Continue with normal execution
     return None
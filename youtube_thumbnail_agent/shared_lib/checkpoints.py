@@ -0,0 +1,242 @@
+"""
+Phase checkpoints for resumable runs.
+
+Progress through the phases is recorded on disk as it happens: the scraped
+thumbnails, each completed analysis and the style guide. Checkpoints are
+keyed by user, channel and session, so when a worker dies halfway through a
+channel, the same user can pick up the latest checkpoint of that channel in
+a new session and skip the work that is already done.
+
+Only interrupted work is resumed: once a thumbnail has been generated the
+checkpoint is marked completed. The video details and the final prompt
+belong to one video and are never checkpointed, so a resumed session always
+continues with its own video at the "prompt" phase at the latest.
+
+Texts are stored as blob handles (see state_blobs) and the scraped
+thumbnails are copied next to the checkpoint, so a checkpoint stays usable
+after its session's workspace is removed.
+
+Layout:
+    <CHECKPOINTS_DIR>/<user>/<channel>/<session>.json
+    <CHECKPOINTS_DIR>/<user>/<channel>/<session>/<thumbnail files>
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import quote
+
+from ..constants import CHECKPOINT_RETENTION_DAYS, CHECKPOINTS_DIR
+from .state_blobs import offload
+from .workspace import Workspace, session_id_of, user_id_of
+
+# Resumable phases in the order they run
+PHASES = ("scrape", "analyze", "style_guide", "prompt")
+
+_lock = threading.Lock()
+
+
+def _channel_dir(user_id: str, channel_id: str) -> str:
+    return os.path.join(
+        CHECKPOINTS_DIR, quote(user_id, safe=""), quote(channel_id, safe="")
+    )
+
+
+def _checkpoint_path(user_id: str, channel_id: str, session_id: str) -> str:
+    return os.path.join(
+        _channel_dir(user_id, channel_id), f"{quote(session_id, safe='')}.json"
+    )
+
+
+def _read(path: str) -> Optional[Dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _prune(channel_dir: str) -> None:
+    """Remove checkpoints of a channel not updated within the retention period."""
+    if CHECKPOINT_RETENTION_DAYS <= 0:
+        return
+    cutoff = time.time() - CHECKPOINT_RETENTION_DAYS * 24 * 60 * 60
+    for name in os.listdir(channel_dir):
+        path = os.path.join(channel_dir, name)
+        if name.endswith(".json") and os.path.getmtime(path) < cutoff:
+            os.remove(path)
+            shutil.rmtree(path[: -len(".json")], ignore_errors=True)
+
+
+def save_checkpoint(
+    user_id: str,
+    channel_id: str,
+    session_id: str,
+    channel_name: Optional[str] = None,
+    thumbnails: Optional[List[str]] = None,
+    thumbnails_dir: Optional[str] = None,
+    analyses: Optional[Dict[str, str]] = None,
+    style_guide: Optional[str] = None,
+    completed: bool = False,
+) -> Dict:
+    """
+    Record the phases a session has completed for a channel.
+
+    Only the given phases are updated. Recording scraped thumbnails starts
+    the checkpoint over, since later phases belong to the earlier scrape.
+    Analyses are merged with the ones already recorded.
+
+    Args:
+        user_id: The user the session belongs to
+        channel_id: The channel being analyzed
+        session_id: The session doing the work
+        channel_name: The channel name as given by the user
+        thumbnails: File names of the scraped thumbnails
+        thumbnails_dir: Directory the scraped thumbnails are in (copied)
+        analyses: Completed analyses (texts or blob handles) by file name
+        style_guide: The style guide (text or blob handle)
+        completed: Whether a thumbnail has been generated from this work
+
+    Returns:
+        dict: The updated checkpoint
+    """
+    path = _checkpoint_path(user_id, channel_id, session_id)
+    with _lock:
+        checkpoint = _read(path) or {}
+        if thumbnails is not None:
+            copy_dir = path[: -len(".json")]
+            shutil.rmtree(copy_dir, ignore_errors=True)
+            os.makedirs(copy_dir, exist_ok=True)
+            for filename in thumbnails:
+                shutil.copy2(os.path.join(thumbnails_dir, filename), copy_dir)
+            checkpoint = {"thumbnails": list(thumbnails), "analyses": {}}
+
+        checkpoint.update(user_id=user_id, channel_id=channel_id, session_id=session_id)
+        if channel_name:
+            checkpoint["channel_name"] = channel_name
+        if analyses:
+            checkpoint.setdefault("analyses", {}).update(
+                {name: offload(text) for name, text in analyses.items() if text}
+            )
+        if style_guide:
+            checkpoint["style_guide"] = offload(style_guide)
+        if completed:
+            checkpoint["completed"] = True
+        checkpoint["updated"] = time.time()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(tmp_path, path)
+        _prune(os.path.dirname(path))
+    return checkpoint
+
+
+def checkpoint_session(context, **phases) -> None:
+    """
+    Record phases for the channel a tool's or callback's session works on.
+
+    Does nothing before a channel has been scraped. Errors are logged rather
+    than raised so a failed checkpoint never fails the phase itself.
+
+    Args:
+        context: A ToolContext or CallbackContext
+        **phases: Keyword arguments of save_checkpoint
+    """
+    channel_id = context.state.get("channel_id")
+    if not channel_id:
+        return
+    try:
+        save_checkpoint(user_id_of(context), channel_id, session_id_of(context), **phases)
+    except (OSError, ValueError) as e:
+        print(f"[Checkpoints] Could not save checkpoint for {channel_id}: {str(e)}")
+
+
+def load_checkpoint(
+    user_id: str, channel_id: str, session_id: Optional[str] = None
+) -> Optional[Dict]:
+    """
+    Load a user's checkpoint of a channel.
+
+    Args:
+        user_id: The user whose checkpoints to search
+        channel_id: The channel ID
+        session_id: The session whose checkpoint to load, or None for the most
+            recently updated checkpoint of the channel from any of the user's
+            sessions
+
+    Returns:
+        dict: The checkpoint, or None if there is none
+    """
+    if session_id is not None:
+        return _read(_checkpoint_path(user_id, channel_id, session_id))
+
+    channel_dir = _channel_dir(user_id, channel_id)
+    if not os.path.isdir(channel_dir):
+        return None
+    checkpoints = [
+        checkpoint
+        for name in os.listdir(channel_dir)
+        if name.endswith(".json")
+        and (checkpoint := _read(os.path.join(channel_dir, name)))
+    ]
+    return max(checkpoints, key=lambda c: c.get("updated", 0), default=None)
+
+
+def next_phase(checkpoint: Optional[Dict]) -> str:
+    """
+    Return the first phase a checkpoint has not completed (see PHASES).
+
+    A completed checkpoint has nothing to resume, so work starts over with
+    "scrape" (where a matching style pack can still be reused).
+    """
+    if not checkpoint or checkpoint.get("completed") or not checkpoint.get("thumbnails"):
+        return "scrape"
+    if not checkpoint.get("style_guide"):
+        analyses = checkpoint.get("analyses") or {}
+        if any(not analyses.get(name) for name in checkpoint["thumbnails"]):
+            return "analyze"
+        return "style_guide"
+    return "prompt"
+
+
+def restore_checkpoint(checkpoint: Dict, workspace: Workspace) -> Dict:
+    """
+    Prepare a session to continue from a checkpoint.
+
+    The checkpointed thumbnails are copied into the session's workspace and
+    the state values of the completed phases are returned.
+
+    Args:
+        checkpoint: A checkpoint from load_checkpoint
+        workspace: The workspace of the session that resumes the work
+
+    Returns:
+        dict: State values to apply to the session
+    """
+    copy_dir = _checkpoint_path(
+        checkpoint["user_id"], checkpoint["channel_id"], checkpoint["session_id"]
+    )[: -len(".json")]
+    analyses = checkpoint.get("analyses") or {}
+    thumbnail_analysis = {}
+    for filename in checkpoint.get("thumbnails") or []:
+        source = os.path.join(copy_dir, filename)
+        if os.path.exists(source):
+            shutil.copy2(source, workspace.reference_images_dir)
+        elif not analyses.get(filename):
+            continue  # Neither the image nor its analysis survived
+        thumbnail_analysis[filename] = analyses.get(filename, "")
+
+    state = {
+        "channel_id": checkpoint["channel_id"],
+        "channel_name": checkpoint.get("channel_name", checkpoint["channel_id"]),
+        "style_pack_id": None,
+        "thumbnail_analysis": thumbnail_analysis,
+    }
+    if checkpoint.get("style_guide"):
+        state["style_guide"] = checkpoint["style_guide"]
+    return state
@@ -0,0 +1,307 @@
+"""
+Rewriting of the conversation history sent to the model.
+
+ADK rebuilds every model request from the whole session, so everything
+said in a long feedback session is re-sent on every turn. Two rewrites keep
+requests small; both only touch the request (ADK copies the contents from
+the session events), never the session itself.
+
+- Images: once an uploaded image is stored in the session's workspace,
+  copies of it in older turns are replaced by a short text reference or a
+  small preview.
+- Compaction: pluggable strategies shrink older turns. They can drop stale
+  tool payloads, summarize older turns or keep a sliding window of turns.
+"""
+
+import io
+import json
+from collections import OrderedDict
+from typing import List, Sequence, Tuple
+
+from google.adk.models import LlmRequest
+from google.genai import types
+from PIL import Image
+
+from ..constants import (
+    HISTORY_SUMMARY_KEEP_TURNS,
+    HISTORY_SUMMARY_MESSAGE_CHARS,
+    HISTORY_TOOL_PAYLOAD_KEEP_TURNS,
+    HISTORY_TOOL_PAYLOAD_MAX_CHARS,
+    HISTORY_WINDOW_TURNS,
+    IMAGE_HISTORY_PREVIEW_SIZE,
+)
+from .asset_ingestion import stored_asset
+from .workspace import Workspace
+
+# How older images are sent: as-is, as a text reference or as a small preview
+IMAGE_HISTORY_MODES = ("keep", "reference", "preview")
+
+# Previews kept in memory, keyed by asset file name
+_MAX_CACHED_PREVIEWS = 64
+_previews: "OrderedDict[str, bytes]" = OrderedDict()
+
+
+def _preview(filename: str, data: bytes) -> bytes:
+    """Return a small JPEG preview of an image, reusing earlier ones."""
+    if filename in _previews:
+        _previews.move_to_end(filename)
+        return _previews[filename]
+
+    with Image.open(io.BytesIO(data)) as source:
+        image = source.convert("RGB")
+    image.thumbnail(
+        (IMAGE_HISTORY_PREVIEW_SIZE, IMAGE_HISTORY_PREVIEW_SIZE),
+        Image.Resampling.LANCZOS,
+    )
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=70)
+
+    _previews[filename] = output.getvalue()
+    if len(_previews) > _MAX_CACHED_PREVIEWS:
+        _previews.popitem(last=False)
+    return _previews[filename]
+
+
+def strip_persisted_images(
+    llm_request: LlmRequest,
+    workspace: Workspace,
+    mode: str = "reference",
+    keep_recent_turns: int = 1,
+) -> int:
+    """
+    Replace stored images in older turns of a request.
+
+    Images in the last keep_recent_turns user turns, and images that were
+    never stored in the workspace, are left untouched.
+
+    Args:
+        llm_request: The request about to be sent to the model
+        workspace: The session's workspace
+        mode: "reference" (a text note naming the asset), "preview" (a small
+            JPEG) or "keep" (no change)
+        keep_recent_turns: Number of most recent user turns sent unchanged
+
+    Returns:
+        int: Number of bytes removed from the request
+    """
+    if mode not in IMAGE_HISTORY_MODES:
+        raise ValueError(f"Unknown image history mode '{mode}'")
+    if mode == "keep" or not llm_request.contents:
+        return 0
+
+    saved = 0
+    older, _ = _split_recent(llm_request.contents, keep_recent_turns)
+    for content in older:
+        for index, part in enumerate(content.parts or []):
+            blob = part.inline_data
+            if not (blob and blob.data and (blob.mime_type or "").startswith("image/")):
+                continue
+            filename = stored_asset(workspace, blob)
+            if filename is None:
+                continue
+
+            if mode == "preview":
+                try:
+                    preview = _preview(filename, blob.data)
+                except Exception as e:
+                    print(f"[Image History] Could not preview {filename}: {str(e)}")
+                    continue
+                content.parts[index] = types.Part(
+                    inline_data=types.Blob(data=preview, mime_type="image/jpeg")
+                )
+                saved += len(blob.data) - len(preview)
+            else:
+                content.parts[index] = types.Part(
+                    text=f"[Image uploaded earlier, saved as asset '{filename}']"
+                )
+                saved += len(blob.data)
+    return saved
+
+
+# Rough token estimates used to report savings
+_CHARS_PER_TOKEN = 4
+_TOKENS_PER_IMAGE = 258
+
+
+def estimate_tokens(contents: List[types.Content]) -> int:
+    """Roughly estimate the number of tokens in request contents."""
+    chars = 0
+    images = 0
+    for content in contents:
+        for part in content.parts or []:
+            if part.text:
+                chars += len(part.text)
+            if part.inline_data:
+                images += 1
+            if part.function_call:
+                chars += len(json.dumps(part.function_call.args or {}, default=str))
+            if part.function_response:
+                chars += len(json.dumps(part.function_response.response or {}, default=str))
+    return chars // _CHARS_PER_TOKEN + images * _TOKENS_PER_IMAGE
+
+
+def _user_turn_starts(contents: List[types.Content]) -> List[int]:
+    """Return the indices of contents where a user turn starts (not tool results)."""
+    return [
+        index
+        for index, content in enumerate(contents)
+        if content.role == "user"
+        and any(part.text or part.inline_data for part in content.parts or [])
+    ]
+
+
+def _split_recent(
+    contents: List[types.Content], keep_recent_turns: int
+) -> Tuple[List[types.Content], List[types.Content]]:
+    """Split contents into (older, recent) at the start of a recent user turn."""
+    starts = _user_turn_starts(contents)
+    if len(starts) <= keep_recent_turns:
+        return [], contents
+    cutoff = starts[-keep_recent_turns] if keep_recent_turns > 0 else len(contents)
+    return contents[:cutoff], contents[cutoff:]
+
+
+def _prepend_note(contents: List[types.Content], note: str) -> List[types.Content]:
+    """Put a note at the start of the first (user) content."""
+    if not contents:
+        return [types.Content(role="user", parts=[types.Part(text=note)])]
+    first = contents[0]
+    return [
+        types.Content(role=first.role, parts=[types.Part(text=note)] + list(first.parts or []))
+    ] + contents[1:]
+
+
+class HistoryStrategy:
+    """A way of shrinking the contents of a model request."""
+
+    def apply(self, contents: List[types.Content]) -> List[types.Content]:
+        """Return the compacted contents (the input may be modified)."""
+        raise NotImplementedError
+
+
+class DropStaleToolPayloads(HistoryStrategy):
+    """
+    Shorten large tool call arguments and tool results in older turns.
+
+    Tool results keep their "status" and "message" so the model still knows
+    what happened; only the bulky payload (full analyses, prompts) goes.
+    """
+
+    def __init__(
+        self,
+        keep_recent_turns: int = HISTORY_TOOL_PAYLOAD_KEEP_TURNS,
+        max_chars: int = HISTORY_TOOL_PAYLOAD_MAX_CHARS,
+    ):
+        self.keep_recent_turns = keep_recent_turns
+        self.max_chars = max_chars
+
+    def _shorten(self, value):
+        if isinstance(value, str) and len(value) > self.max_chars:
+            return f"{value[: self.max_chars]}... [{len(value) - self.max_chars} characters omitted]"
+        return value
+
+    def apply(self, contents: List[types.Content]) -> List[types.Content]:
+        older, recent = _split_recent(contents, self.keep_recent_turns)
+        for content in older:
+            for part in content.parts or []:
+                call = part.function_call
+                if call and call.args:
+                    call.args = {key: self._shorten(value) for key, value in call.args.items()}
+                result = part.function_response
+                if result and result.response:
+                    size = len(json.dumps(result.response, default=str))
+                    if size > self.max_chars:
+                        kept = {
+                            key: self._shorten(result.response[key])
+                            for key in ("status", "message")
+                            if key in result.response
+                        }
+                        kept["omitted"] = f"{size} characters of tool output omitted from history"
+                        result.response = kept
+        return older + recent
+
+
+class SummarizeOlderTurns(HistoryStrategy):
+    """
+    Replace older turns with a compact transcript.
+
+    The summary is extractive (each message clipped to a few hundred
+    characters, tool calls reduced to their names) so it costs no extra
+    model call.
+    """
+
+    def __init__(
+        self,
+        keep_recent_turns: int = HISTORY_SUMMARY_KEEP_TURNS,
+        message_chars: int = HISTORY_SUMMARY_MESSAGE_CHARS,
+    ):
+        self.keep_recent_turns = keep_recent_turns
+        self.message_chars = message_chars
+
+    def apply(self, contents: List[types.Content]) -> List[types.Content]:
+        older, recent = _split_recent(contents, self.keep_recent_turns)
+        if not older:
+            return contents
+
+        lines = []
+        for content in older:
+            speaker = "User" if content.role == "user" else "Assistant"
+            for part in content.parts or []:
+                if part.text and part.text.strip():
+                    text = " ".join(part.text.split())
+                    if len(text) > self.message_chars:
+                        text = f"{text[: self.message_chars]}..."
+                    lines.append(f"{speaker}: {text}")
+                elif part.function_call:
+                    lines.append(f"Assistant called {part.function_call.name}")
+                elif part.function_response:
+                    status = (part.function_response.response or {}).get("status")
+                    lines.append(
+                        f"{part.function_response.name} returned"
+                        + (f" {status}" if status else "")
+                    )
+                elif part.inline_data:
+                    lines.append(f"{speaker} sent an image")
+        note = "[Summary of the earlier conversation]\n" + "\n".join(lines)
+        return _prepend_note(recent, note)
+
+
+class SlidingWindow(HistoryStrategy):
+    """Keep only the most recent user turns (and everything after them)."""
+
+    def __init__(self, max_turns: int = HISTORY_WINDOW_TURNS):
+        self.max_turns = max_turns
+
+    def apply(self, contents: List[types.Content]) -> List[types.Content]:
+        older, recent = _split_recent(contents, self.max_turns)
+        if not older:
+            return contents
+        return _prepend_note(
+            recent, f"[{len(older)} earlier messages omitted from this request]"
+        )
+
+
+def compact_history(
+    llm_request: LlmRequest, strategies: Sequence[HistoryStrategy]
+) -> Tuple[int, int]:
+    """
+    Apply compaction strategies to a request, in order.
+
+    Args:
+        llm_request: The request about to be sent to the model
+        strategies: The strategies to apply
+
+    Returns:
+        tuple: Estimated tokens (before, after)
+    """
+    contents = list(llm_request.contents or [])
+    before = estimate_tokens(contents)
+    for strategy in strategies:
+        contents = strategy.apply(contents)
+    llm_request.contents = contents
+    return before, estimate_tokens(contents)
+
+
+def default_compaction() -> List[HistoryStrategy]:
+    """Return the compaction policy used for long conversational sessions."""
+    return [DropStaleToolPayloads(), SummarizeOlderTurns()]
@@ -7,32 +7,12 @@ from typing import Dict
 
 from google.adk.tools.tool_context import ToolContext
 
-
-def ensure_image_directory_exists():
-    """
-    Ensure that the images directory exists, creating it if necessary.
-
-    Returns:
-        str: Path to the images directory
-    """
-    # Get the absolute path to the repository root
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    repo_root = os.path.abspath(os.path.join(current_dir, "../.."))
-
-    # Create the images directory path
-    images_dir = os.path.join(repo_root, "images")
-
-    # Create the directory if it doesn't exist
-    if not os.path.exists(images_dir):
-        os.makedirs(images_dir)
-        print(f"Created images directory at {images_dir}")
-
-    return images_dir
+from .workspace import get_workspace
 
 
 def list_images(tool_context: ToolContext) -> Dict:
     """
-    List all images saved in the local images directory.
+    List all generated images saved in the session's workspace.
 
     Args:
         tool_context (ToolContext): The tool context
@@ -41,10 +21,7 @@ def list_images(tool_context: ToolContext) -> Dict:
         dict: Status and list of image filenames
     """
     try:
-        # Ensure images directory exists
-        images_dir = ensure_image_directory_exists()
-
-        print(f"[Image Utils] Images directory: {images_dir}")
+        images_dir = get_workspace(tool_context).generated_dir
 
         # Get a list of all image files in the directory
         image_files = []
@@ -100,7 +77,7 @@ def list_images(tool_context: ToolContext) -> Dict:
 
 def delete_image(filename: str, tool_context: ToolContext) -> Dict:
     """
-    Delete an image from the local images directory.
+    Delete a generated image from the session's workspace.
 
     Args:
         filename (str): The name of the image file to delete
@@ -110,11 +87,9 @@ def delete_image(filename: str, tool_context: ToolContext) -> Dict:
         dict: Status and result message
     """
     try:
-        # Ensure images directory exists
-        images_dir = ensure_image_directory_exists()
-
-        # Full path to the image
-        image_path = os.path.join(images_dir, filename)
+        # Full path to the image (never outside the workspace)
+        images_dir = get_workspace(tool_context).generated_dir
+        image_path = os.path.join(images_dir, os.path.basename(filename))
 
         # Check if the file exists
         if not os.path.exists(image_path):
@@ -0,0 +1,89 @@
+"""
+Durable session and artifact services for running the agent locally.
+
+Sessions, events and state are stored in SQLite and artifacts on disk, so a
+restarted worker can resume in-progress sessions, and memory no longer grows
+with every saved PNG version. The workspaces of stored sessions are kept by
+the idle sweep, so a resumed session still finds its thumbnails and layers.
+"""
+
+import os
+from typing import Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.runners import Runner
+from google.adk.sessions import DatabaseSessionService
+from google.adk.sessions.database_session_service import StorageSession
+
+from ..constants import APP_NAME, ARTIFACTS_DIR, SESSION_DB_PATH
+from .artifact_store import FileArtifactService
+from .workspace import cleanup_workspace, retain_workspaces_if
+
+
+class DurableSessionService(DatabaseSessionService):
+    """
+    SQLite session service that also removes a deleted session's files.
+
+    Deleting a session deletes its artifacts (when an artifact service is
+    given) and its workspace directory. Workspaces of sessions in the
+    database are never removed by the idle sweep.
+    """
+
+    def __init__(
+        self,
+        db_path: str = SESSION_DB_PATH,
+        artifact_service: Optional[FileArtifactService] = None,
+    ):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        super().__init__(f"sqlite:///{db_path}")
+        self.artifact_service = artifact_service
+        retain_workspaces_if(os.path.abspath(db_path), self.has_session)
+
+    def has_session(self, session_id: str) -> bool:
+        """Whether a session with this ID is stored (for any app or user)."""
+        with self.DatabaseSessionFactory() as db:
+            return (
+                db.query(StorageSession.id)
+                .filter(StorageSession.id == session_id)
+                .first()
+                is not None
+            )
+
+    def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        super().delete_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+        if self.artifact_service:
+            self.artifact_service.delete_session_artifacts(
+                app_name=app_name, user_id=user_id, session_id=session_id
+            )
+        cleanup_workspace(session_id)
+
+
+def create_runner(
+    agent: BaseAgent,
+    db_path: str = SESSION_DB_PATH,
+    artifacts_dir: str = ARTIFACTS_DIR,
+    app_name: str = APP_NAME,
+) -> Runner:
+    """
+    Create a runner backed by the durable session and artifact services.
+
+    Args:
+        agent: The root agent to run
+        db_path: Path of the SQLite session database
+        artifacts_dir: Directory artifacts are stored in
+        app_name: Name sessions and artifacts are stored under
+
+    Returns:
+        Runner: The runner
+    """
+    artifact_service = FileArtifactService(artifacts_dir)
+    return Runner(
+        app_name=app_name,
+        agent=agent,
+        session_service=DurableSessionService(db_path, artifact_service),
+        artifact_service=artifact_service,
+    )
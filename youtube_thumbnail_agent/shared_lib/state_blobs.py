@@ -0,0 +1,133 @@
+"""
+Local blob store for bulky session state values.
+
+Thumbnail analyses, the style guide and the final prompt are long texts.
+Kept in session state, they would be copied into every state delta and
+re-serialized whenever the session is saved or replayed. Instead they are
+written once to a content-addressed store on disk and state only holds a
+handle ("blob:sha256:<digest>"). Readers call resolve() when they actually
+need the text, e.g. when an instruction template renders it.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from ..constants import STATE_BLOB_CACHE_SIZE, STATE_BLOBS_DIR, STATE_OFFLOAD_MIN_CHARS
+
+_HANDLE_PREFIX = "blob:sha256:"
+
+# Recently used blobs kept in memory, keyed by digest
+_cache: "OrderedDict[str, str]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def is_blob_handle(value: Any) -> bool:
+    """Return True if a state value is a handle to a stored blob."""
+    return isinstance(value, str) and value.startswith(_HANDLE_PREFIX)
+
+
+def _blob_path(digest: str) -> str:
+    """Return where a blob is stored (sharded by the first two hex digits)."""
+    return os.path.join(STATE_BLOBS_DIR, digest[:2], f"{digest}.txt")
+
+
+def _remember(digest: str, text: str) -> None:
+    """Add a blob to the in-memory cache (call with _lock held)."""
+    _cache[digest] = text
+    _cache.move_to_end(digest)
+    if len(_cache) > STATE_BLOB_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def put_blob(text: str) -> str:
+    """
+    Store a text and return its handle.
+
+    Identical texts share one blob, so storing a value again is free.
+
+    Args:
+        text: The text to store
+
+    Returns:
+        str: Handle to put in session state
+    """
+    data = text.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    path = _blob_path(digest)
+
+    # The file decides whether the blob exists; the handle is only returned
+    # (and the text cached) once the blob is durable
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    with _lock:
+        _remember(digest, text)
+    return f"{_HANDLE_PREFIX}{digest}"
+
+
+def get_blob(handle: str) -> str:
+    """
+    Load the text behind a handle.
+
+    Args:
+        handle: A handle returned by put_blob
+
+    Returns:
+        str: The stored text
+
+    Raises:
+        ValueError: If the handle is malformed or the blob is corrupt
+        FileNotFoundError: If the blob is missing from the store
+    """
+    if not is_blob_handle(handle):
+        raise ValueError(f"Not a blob handle: {handle!r}")
+    digest = handle[len(_HANDLE_PREFIX) :]
+
+    with _lock:
+        if digest in _cache:
+            _cache.move_to_end(digest)
+            return _cache[digest]
+
+    with open(_blob_path(digest), "rb") as f:
+        data = f.read()
+    if hashlib.sha256(data).hexdigest() != digest:
+        raise ValueError(f"Blob {digest} is corrupt")
+
+    text = data.decode("utf-8")
+    with _lock:
+        _remember(digest, text)
+    return text
+
+
+def offload(value: Any) -> Any:
+    """
+    Return what to store in state for a value.
+
+    Strings of at least STATE_OFFLOAD_MIN_CHARS characters are replaced by a
+    handle; shorter values (and non-strings) are stored inline as before.
+    """
+    if isinstance(value, str) and len(value) >= STATE_OFFLOAD_MIN_CHARS:
+        return put_blob(value)
+    return value
+
+
+def resolve(value: Any) -> Any:
+    """
+    Return the actual value of a state entry, loading it if it is a handle.
+
+    A blob that cannot be loaded resolves to an empty string so one missing
+    file does not break an agent's instruction.
+    """
+    if not is_blob_handle(value):
+        return value
+    try:
+        return get_blob(value)
+    except (OSError, ValueError) as e:
+        print(f"[State Blobs] Could not load {value}: {str(e)}")
+        return ""
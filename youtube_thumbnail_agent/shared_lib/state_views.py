@@ -0,0 +1,193 @@
+"""
+State projection helpers for agent instructions.
+
+Agents declare which slices of session state they need ("views") and only
+those slices are rendered into the instruction, instead of interpolating
+whole state values such as the full ``thumbnail_analysis`` dictionary.
+
+Bulky values are kept in the blob store (see state_blobs) and state only
+holds their handles; views load them only when they are rendered.
+"""
+
+import re
+from typing import Callable, Dict
+
+from google.adk.agents.readonly_context import ReadonlyContext
+
+from ..constants import REFERENCE_ANALYSES_TOP_K
+from .analysis_index import retrieve_analyses
+from .state_blobs import resolve
+
+# A view takes the session state and returns the text to render in its place
+StateView = Callable[[Dict], str]
+
+_PLACEHOLDER_PATTERN = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+
+# What ADK treats as a placeholder when it scans the rendered instruction again
+_ADK_PLACEHOLDER_PATTERN = re.compile(r"{+[^{}]*}+")
+_ADK_STATE_NAME_PATTERN = re.compile(
+    r"(?:(?:app|user|temp):)?[A-Za-z_][A-Za-z0-9_]*\??|artifact\..*"
+)
+
+# Breaks a placeholder without visibly changing the text
+_ZERO_WIDTH_SPACE = "\u200b"
+
+
+def _escape_braces(text: str) -> str:
+    """
+    ADK scans the rendered instruction for ``{placeholders}`` again, so text
+    coming from state values must not contain any it would substitute. Only
+    those are broken up (with a zero-width space after the opening brace);
+    other braces, e.g. in JSON snippets, are left as they are.
+    """
+
+    def _break(match: re.Match) -> str:
+        placeholder = match.group(0)
+        name = placeholder.lstrip("{").rstrip("}").strip()
+        if not _ADK_STATE_NAME_PATTERN.fullmatch(name):
+            return placeholder
+        braces = len(placeholder) - len(placeholder.lstrip("{"))
+        return placeholder[:braces] + _ZERO_WIDTH_SPACE + placeholder[braces:]
+
+    return _ADK_PLACEHOLDER_PATTERN.sub(_break, text)
+
+
+def _analyses(state: Dict) -> Dict[str, str]:
+    """
+    Return the thumbnail_analysis dictionary from state (empty if missing).
+
+    Values are blob handles (or short inline texts), and an empty string for
+    thumbnails not analyzed yet; use _analysis_texts for the texts.
+    """
+    return state.get("thumbnail_analysis") or {}
+
+
+def _analysis_texts(state: Dict) -> Dict[str, str]:
+    """Return the completed analyses with their texts loaded."""
+    return {
+        name: resolve(analysis)
+        for name, analysis in _analyses(state).items()
+        if analysis
+    }
+
+
+def pending_thumbnails(state: Dict) -> str:
+    """View: filenames of thumbnails that still need to be analyzed."""
+    pending = [name for name, analysis in _analyses(state).items() if not analysis]
+    if not pending:
+        return "(none - all thumbnails have been analyzed)"
+    return "\n".join(f"- {name}" for name in pending)
+
+
+def analysis_progress(state: Dict) -> str:
+    """View: a one-line summary of how many thumbnails have been analyzed."""
+    analyses = _analyses(state)
+    done = sum(1 for analysis in analyses.values() if analysis)
+    return f"{done} of {len(analyses)} thumbnails analyzed"
+
+
+def current_thumbnail(state: Dict) -> str:
+    """View: the filename currently selected for analysis."""
+    return state.get("thumbnail_to_analyze") or "(no thumbnail selected)"
+
+
+def current_analysis_status(state: Dict) -> str:
+    """View: whether the selected thumbnail already has a saved analysis."""
+    filename = state.get("thumbnail_to_analyze")
+    if not filename:
+        return "(no thumbnail selected)"
+    if _analyses(state).get(filename):
+        return f"{filename} already has a saved analysis"
+    return f"{filename} has not been analyzed yet"
+
+
+def all_analyses(state: Dict) -> str:
+    """View: every completed analysis, formatted as one section per thumbnail."""
+    sections = [
+        f"### {name}\n{analysis}" for name, analysis in _analysis_texts(state).items()
+    ]
+    if not sections:
+        return "(no analyses available)"
+    return "\n\n".join(sections)
+
+
+def video_details(state: Dict) -> str:
+    """View: the video title and topic saved by the prompt generator."""
+    title = state.get("video_title")
+    if not title:
+        return "(not provided yet)"
+    topic = state.get("video_topic")
+    return f"Title: {title}" + (f"\nTopic: {topic}" if topic else "")
+
+
+def reference_analyses(state: Dict) -> str:
+    """
+    View: the analyses most relevant to the user's video.
+
+    Retrieval uses the saved video title and topic as the query, so the
+    prompt only carries REFERENCE_ANALYSES_TOP_K analyses however many
+    thumbnails were analyzed.
+    """
+    analyses = _analysis_texts(state)
+    query = f"{state.get('video_title') or ''} {state.get('video_topic') or ''}"
+    matches = retrieve_analyses(analyses, query, REFERENCE_ANALYSES_TOP_K)
+    if not matches:
+        return "(no analyses available)"
+    return "\n\n".join(f"### {name}\n{analyses[name]}" for name, _ in matches)
+
+
+def render_template(template: str, state: Dict, views: Dict[str, StateView]) -> str:
+    """
+    Render ``{name}`` placeholders in a template using the declared views.
+
+    Placeholders that are not declared views fall back to the state value
+    (loaded from the blob store if it was offloaded).
+    Unknown placeholders are left untouched so ADK can resolve them as usual.
+
+    Args:
+        template: Instruction template containing ``{name}`` placeholders
+        state: Session state to project
+        views: Mapping of placeholder name to view function
+
+    Returns:
+        str: The rendered instruction
+    """
+
+    def _replace(match: re.Match) -> str:
+        name = match.group(1)
+        if name in views:
+            return _escape_braces(views[name](state))
+        if name in state:
+            return _escape_braces(str(resolve(state[name])))
+        return match.group(0)
+
+    return _PLACEHOLDER_PATTERN.sub(_replace, template)
+
+
+def state_instruction(
+    template: str, **views: StateView
+) -> Callable[[ReadonlyContext], str]:
+    """
+    Build an ADK instruction provider that renders only the declared state views.
+
+    Example:
+        instruction=state_instruction(
+            "Pending thumbnails:\\n{pending_thumbnails}",
+            pending_thumbnails=pending_thumbnails,
+        )
+
+    Args:
+        template: Instruction template containing ``{name}`` placeholders
+        **views: View functions keyed by placeholder name
+
+    Returns:
+        Callable: Instruction provider accepted by ``LlmAgent(instruction=...)``
+    """
+
+    def _provider(context: ReadonlyContext) -> str:
+        state = context.state
+        state = state.to_dict() if hasattr(state, "to_dict") else dict(state)
+        return render_template(template, state, views)
+
+    return _provider
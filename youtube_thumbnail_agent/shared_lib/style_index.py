@@ -0,0 +1,293 @@
+"""
+Similarity index over the thumbnails of every analyzed channel.
+
+Each analyzed channel is stored as a "style pack" (its analyses, style guide
+and per-thumbnail feature vectors). Feature vectors combine a colour palette
+histogram, a coarse luminance layout and a perceptual difference hash, and
+are queried with random-hyperplane LSH so a new channel can be matched to an
+existing pack before paying for a fresh analysis.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import numpy as np
+from PIL import Image
+
+from ..constants import STYLE_INDEX_DIR, STYLE_PACKS_DIR
+
+# Relative weight of each feature block in the cosine similarity
+_PALETTE_WEIGHT = 0.5
+_LAYOUT_WEIGHT = 0.3
+_HASH_WEIGHT = 0.2
+
+# LSH parameters: several short hashes keep recall high for small libraries
+_LSH_TABLES = 8
+_LSH_BITS = 10
+_LSH_SEED = 1234
+# Below this many candidates the query falls back to an exact scan
+_MIN_CANDIDATES = 32
+
+_INDEX_FILE = "index.npz"
+
+
+def _pack_path(pack_id: str) -> str:
+    """Return where a style pack is stored (the ID is quoted, so it stays one directory)."""
+    return os.path.join(STYLE_PACKS_DIR, quote(pack_id, safe=""), "pack.json")
+
+
+def _crop_letterbox(image: Image.Image) -> Image.Image:
+    """Crop 4:3 YouTube thumbnails (16:9 content with black bars) to 16:9."""
+    width, height = image.size
+    if width / height < 1.6:
+        content_height = int(width * 9 / 16)
+        top = (height - content_height) // 2
+        image = image.crop((0, top, width, top + content_height))
+    return image
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    """Scale a vector to unit L2 norm (zero vectors are returned unchanged)."""
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+def compute_style_features(image_path: str) -> np.ndarray:
+    """
+    Compute a unit-length style feature vector for a thumbnail.
+
+    Args:
+        image_path: Path to the thumbnail image
+
+    Returns:
+        np.ndarray: Feature vector (cosine similarity == dot product)
+    """
+    with Image.open(image_path) as source:
+        image = _crop_letterbox(source.convert("RGB"))
+
+    # Palette: saturation/value weighted hue histogram plus S and V histograms
+    hsv = np.asarray(image.resize((64, 36)).convert("HSV"), dtype=np.float32) / 255.0
+    hue, sat, val = hsv[..., 0].ravel(), hsv[..., 1].ravel(), hsv[..., 2].ravel()
+    hue_hist, _ = np.histogram(hue, bins=12, range=(0, 1), weights=sat * val)
+    sat_hist, _ = np.histogram(sat, bins=4, range=(0, 1))
+    val_hist, _ = np.histogram(val, bins=4, range=(0, 1))
+    palette = np.sqrt(
+        np.concatenate(
+            [
+                hue_hist / max(hue_hist.sum(), 1e-6),
+                sat_hist / sat_hist.sum(),
+                val_hist / val_hist.sum(),
+            ]
+        )
+    )
+
+    # Layout: 4x4 luminance grid, centred so unrelated layouts score near zero
+    grid = np.asarray(image.convert("L").resize((4, 4)), dtype=np.float32).ravel()
+    layout = grid - grid.mean()
+
+    # Perceptual hash: 64-bit difference hash encoded as +/-1
+    small = np.asarray(image.convert("L").resize((9, 8)), dtype=np.float32)
+    dhash = np.where(small[:, 1:] > small[:, :-1], 1.0, -1.0).ravel()
+
+    return np.concatenate(
+        [
+            _unit(palette) * np.sqrt(_PALETTE_WEIGHT),
+            _unit(layout) * np.sqrt(_LAYOUT_WEIGHT),
+            _unit(dhash) * np.sqrt(_HASH_WEIGHT),
+        ]
+    ).astype(np.float32)
+
+
+class StyleIndex:
+    """Approximate nearest-neighbour index of thumbnail feature vectors."""
+
+    def __init__(self, index_dir: str = STYLE_INDEX_DIR):
+        self.index_dir = index_dir
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.pack_ids: List[str] = []
+        self._planes: Optional[np.ndarray] = None
+        self._buckets: List[Dict[int, List[int]]] = []
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        """Load persisted vectors from disk, if any."""
+        path = os.path.join(self.index_dir, _INDEX_FILE)
+        if not os.path.exists(path):
+            return
+        with np.load(path) as data:
+            self.vectors = data["vectors"].astype(np.float32)
+            self.pack_ids = [str(pack_id) for pack_id in data["pack_ids"]]
+        self._rebuild_buckets()
+
+    def _save(self) -> None:
+        """Persist vectors atomically."""
+        os.makedirs(self.index_dir, exist_ok=True)
+        path = os.path.join(self.index_dir, _INDEX_FILE)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, vectors=self.vectors, pack_ids=np.array(self.pack_ids))
+        os.replace(tmp_path, path)
+
+    def _hash_codes(self, vectors: np.ndarray) -> np.ndarray:
+        """Return one integer LSH code per table for each vector."""
+        bits = (np.einsum("tbd,nd->ntb", self._planes, vectors) > 0).astype(np.int64)
+        return (bits << np.arange(_LSH_BITS)).sum(axis=2)
+
+    def _rebuild_buckets(self) -> None:
+        """Recompute the LSH tables for the current vectors."""
+        self._buckets = [{} for _ in range(_LSH_TABLES)]
+        if not len(self.pack_ids):
+            return
+        rng = np.random.default_rng(_LSH_SEED)
+        self._planes = rng.standard_normal(
+            (_LSH_TABLES, _LSH_BITS, self.vectors.shape[1])
+        ).astype(np.float32)
+        for row, codes in enumerate(self._hash_codes(self.vectors)):
+            for table, code in enumerate(codes):
+                self._buckets[table].setdefault(int(code), []).append(row)
+
+    def add_pack(self, pack_id: str, vectors: np.ndarray) -> None:
+        """
+        Add (or replace) the vectors belonging to a style pack.
+
+        Args:
+            pack_id: Style pack identifier
+            vectors: One feature vector per thumbnail in the pack
+        """
+        with self._lock:
+            keep = [i for i, existing in enumerate(self.pack_ids) if existing != pack_id]
+            kept = self.vectors[keep] if len(keep) else np.zeros((0, vectors.shape[1]))
+            self.vectors = np.vstack([kept, vectors]).astype(np.float32)
+            self.pack_ids = [self.pack_ids[i] for i in keep] + [pack_id] * len(vectors)
+            self._rebuild_buckets()
+            self._save()
+
+    def query(self, vector: np.ndarray, top_k: int = 10) -> List[Tuple[str, float]]:
+        """
+        Find the thumbnails most similar to a feature vector.
+
+        Args:
+            vector: Query feature vector
+            top_k: Maximum number of neighbours
+
+        Returns:
+            list: (pack_id, cosine similarity) pairs, best first
+        """
+        with self._lock:
+            if not len(self.pack_ids):
+                return []
+
+            candidates = set()
+            for table, code in enumerate(self._hash_codes(vector[None, :])[0]):
+                candidates.update(self._buckets[table].get(int(code), []))
+            if len(candidates) < min(_MIN_CANDIDATES, len(self.pack_ids)):
+                rows = np.arange(len(self.pack_ids))
+            else:
+                rows = np.fromiter(candidates, dtype=np.int64)
+
+            scores = self.vectors[rows] @ vector
+            order = np.argsort(-scores)[:top_k]
+            return [(self.pack_ids[rows[i]], float(scores[i])) for i in order]
+
+
+_style_index: Optional[StyleIndex] = None
+_style_index_lock = threading.Lock()
+
+
+def get_style_index() -> StyleIndex:
+    """Return the process-wide style index, loading it on first use."""
+    global _style_index
+    with _style_index_lock:
+        if _style_index is None:
+            _style_index = StyleIndex()
+        return _style_index
+
+
+def match_style_pack(image_paths: List[str]) -> Optional[Dict]:
+    """
+    Match a channel's thumbnails against all stored style packs.
+
+    A pack's score is the mean, over the query thumbnails, of the best
+    similarity to any thumbnail in that pack.
+
+    Args:
+        image_paths: Paths to the first few thumbnails of the new channel
+
+    Returns:
+        dict: Best match with pack_id, channel_name and score, or None
+    """
+    index = get_style_index()
+    per_pack: Dict[str, List[float]] = {}
+    for path in image_paths:
+        best: Dict[str, float] = {}
+        for pack_id, score in index.query(compute_style_features(path)):
+            best[pack_id] = max(score, best.get(pack_id, -1.0))
+        for pack_id, score in best.items():
+            per_pack.setdefault(pack_id, []).append(score)
+
+    if not per_pack or not image_paths:
+        return None
+
+    pack_id, scores = max(per_pack.items(), key=lambda item: sum(item[1]))
+    pack = load_style_pack(pack_id) or {}
+    return {
+        "pack_id": pack_id,
+        "channel_name": pack.get("channel_name", pack_id),
+        "score": round(sum(scores) / len(image_paths), 3),
+    }
+
+
+def register_style_pack(
+    pack_id: str,
+    channel_name: str,
+    image_paths: List[str],
+    analyses: Dict[str, str],
+    style_guide: str,
+) -> None:
+    """
+    Store a channel's analyses and style guide and index its thumbnails.
+
+    Args:
+        pack_id: Style pack identifier (the resolved channel ID)
+        channel_name: Channel name as provided by the user
+        image_paths: Paths to the analyzed thumbnails
+        analyses: Mapping of thumbnail filename to analysis text
+        style_guide: The generated style guide
+    """
+    path = _pack_path(pack_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "pack_id": pack_id,
+                "channel_name": channel_name,
+                "analyses": analyses,
+                "style_guide": style_guide,
+            },
+            f,
+        )
+    os.replace(tmp_path, path)
+
+    vectors = np.stack([compute_style_features(path) for path in image_paths])
+    get_style_index().add_pack(pack_id, vectors)
+
+
+def load_style_pack(pack_id: str) -> Optional[Dict]:
+    """
+    Load a stored style pack.
+
+    Args:
+        pack_id: Style pack identifier
+
+    Returns:
+        dict: The pack contents, or None if it does not exist
+    """
+    path = _pack_path(pack_id)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
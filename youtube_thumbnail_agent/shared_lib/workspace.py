@@ -0,0 +1,227 @@
+"""
+Per-session workspaces.
+
+Every session gets its own directory tree for reference thumbnails, user
+assets, generated thumbnails and exports, so one process can serve many
+simultaneous sessions without them overwriting each other's files.
+Content-addressed caches (normalized assets, generation results, layers)
+stay shared between sessions.
+
+ADK has no session-end hook, so workspaces are removed explicitly with
+cleanup_workspace() when a session is deleted, and workspaces idle for
+longer than the retention period are swept periodically. Workspaces that a
+registered retention check still claims (e.g. of sessions kept in a session
+database) are never swept.
+"""
+
+import os
+import re
+import shutil
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from ..constants import (
+    EXPORTS_DIR,
+    GENERATED_THUMBNAILS_DIR,
+    REFERENCE_IMAGES_DIR,
+    THUMBNAIL_ASSETS_DIR,
+    WORKSPACE_RETENTION_DAYS,
+    WORKSPACE_SWEEP_INTERVAL_SECONDS,
+    WORKSPACES_DIR,
+)
+
+DEFAULT_SESSION_ID = "default"
+
+# Seconds between marking a workspace as active
+_TOUCH_INTERVAL_SECONDS = 60
+
+_cleanup_hooks = []
+_retention_checks: Dict[str, Callable[[str], bool]] = {}
+_sweep_lock = threading.Lock()
+_last_sweep = 0.0
+_last_touch: Dict[str, float] = {}  # Workspace root -> when it was last marked active
+
+
+class Workspace(NamedTuple):
+    """Directories belonging to one session."""
+
+    session_id: str
+    root: str
+    reference_images_dir: str
+    assets_dir: str
+    generated_dir: str
+    exports_dir: str
+
+
+def _dirname(session_id: str) -> str:
+    """Return a filesystem-safe directory name for a session ID."""
+    name = re.sub(r"[^A-Za-z0-9_.-]", "_", session_id or DEFAULT_SESSION_ID).strip(".")
+    return name[:128] or DEFAULT_SESSION_ID
+
+
+def workspace_for_session(session_id: Optional[str]) -> Workspace:
+    """
+    Return the workspace of a session, creating its directories if needed.
+
+    Args:
+        session_id: The session ID (None for the shared default workspace)
+
+    Returns:
+        Workspace: The session's directories
+    """
+    session_id = session_id or DEFAULT_SESSION_ID
+    root = os.path.join(WORKSPACES_DIR, _dirname(session_id))
+    workspace = Workspace(
+        session_id=session_id,
+        root=root,
+        reference_images_dir=os.path.join(root, REFERENCE_IMAGES_DIR),
+        assets_dir=os.path.join(root, THUMBNAIL_ASSETS_DIR),
+        generated_dir=os.path.join(root, GENERATED_THUMBNAILS_DIR),
+        exports_dir=os.path.join(root, EXPORTS_DIR),
+    )
+    # Create the directories and mark the workspace as active for the idle
+    # sweep, at most once a minute so hot paths stay free of disk I/O
+    now = time.monotonic()
+    last_touch = _last_touch.get(root)
+    if last_touch is None or now - last_touch > _TOUCH_INTERVAL_SECONDS:
+        for directory in workspace[2:]:
+            os.makedirs(directory, exist_ok=True)
+        os.utime(root)
+        _last_touch[root] = now
+        _maybe_sweep()
+    return workspace
+
+
+def session_id_of(context) -> str:
+    """Return the session ID of a ToolContext or CallbackContext ("default" without one)."""
+    if context is None:
+        return DEFAULT_SESSION_ID
+    return context._invocation_context.session.id
+
+
+def user_id_of(context) -> str:
+    """Return the user ID of a ToolContext or CallbackContext."""
+    return context._invocation_context.session.user_id
+
+
+def get_workspace(context) -> Workspace:
+    """
+    Return the workspace of the session a tool or callback runs in.
+
+    Args:
+        context: A ToolContext or CallbackContext (or None for the default workspace)
+
+    Returns:
+        Workspace: The session's directories
+    """
+    return workspace_for_session(session_id_of(context))
+
+
+def on_workspace_cleanup(hook) -> None:
+    """Register a function called with the session ID when a workspace is removed."""
+    _cleanup_hooks.append(hook)
+
+
+def retain_workspaces_if(name: str, check: Callable[[str], bool]) -> None:
+    """
+    Register a check that keeps idle workspaces from being swept.
+
+    The check is called with the workspace's directory name (the session ID
+    for ordinary IDs) and keeps the workspace if it returns True. Registering
+    a check under an existing name replaces it.
+
+    Args:
+        name: Name of the check, e.g. the session database it consults
+        check: Function deciding whether a workspace is still in use
+    """
+    _retention_checks[name] = check
+
+
+def _is_retained(name: str) -> bool:
+    """Whether any retention check claims a workspace (errors keep it too)."""
+    for check_name, check in list(_retention_checks.items()):
+        try:
+            if check(name):
+                return True
+        except Exception as e:
+            print(f"[Workspace] Retention check {check_name} failed for {name}: {str(e)}")
+            return True
+    return False
+
+
+def cleanup_workspace(session_id: str) -> bool:
+    """
+    Remove a session's workspace and any per-session state kept in memory.
+
+    Call this when a session is deleted.
+
+    Args:
+        session_id: The session ID
+
+    Returns:
+        bool: True if a workspace was removed
+    """
+    root = os.path.join(WORKSPACES_DIR, _dirname(session_id))
+    _last_touch.pop(root, None)
+    for hook in _cleanup_hooks:
+        try:
+            hook(session_id)
+        except Exception as e:
+            print(f"[Workspace] Cleanup hook failed for {session_id}: {str(e)}")
+    if not os.path.isdir(root):
+        return False
+    shutil.rmtree(root, ignore_errors=True)
+    print(f"[Workspace] Removed workspace of session {session_id}")
+    return True
+
+
+def sweep_idle_workspaces(max_idle_days: float = WORKSPACE_RETENTION_DAYS) -> List[str]:
+    """
+    Remove workspaces that have not been used for longer than max_idle_days.
+
+    Workspaces claimed by a retention check are kept.
+
+    Args:
+        max_idle_days: Idle period after which a workspace is removed (0 keeps all)
+
+    Returns:
+        list: Session directory names that were removed
+    """
+    if max_idle_days <= 0 or not os.path.isdir(WORKSPACES_DIR):
+        return []
+    cutoff = time.time() - max_idle_days * 24 * 60 * 60
+    removed = []
+    for name in os.listdir(WORKSPACES_DIR):
+        root = os.path.join(WORKSPACES_DIR, name)
+        if (
+            os.path.isdir(root)
+            and os.path.getmtime(root) < cutoff
+            and not _is_retained(name)
+        ):
+            cleanup_workspace(name)
+            removed.append(name)
+
+    # Forget workspaces removed by other means so their touch entries don't pile up
+    for root in list(_last_touch):
+        if not os.path.isdir(root):
+            _last_touch.pop(root, None)
+    return removed
+
+
+def _maybe_sweep() -> None:
+    """
+    Sweep idle workspaces at most once per sweep interval.
+
+    The sweep runs on a background thread: cleanup hooks may wait for
+    pending work, which must not hold up the session that triggered it.
+    """
+    global _last_sweep
+    now = time.monotonic()
+    with _sweep_lock:
+        if _last_sweep and now - _last_sweep < WORKSPACE_SWEEP_INTERVAL_SECONDS:
+            return
+        _last_sweep = now
+    threading.Thread(
+        target=sweep_idle_workspaces, name="workspace-sweep", daemon=True
+    ).start()
@@ -5,7 +5,13 @@ Agent for generating YouTube thumbnail images from prompts and reference assets.
 from google.adk.agents import Agent
 
 from ...constants import GEMINI_MODEL
-from .tools.create_image import create_image
+from ...shared_lib.callbacks import make_before_model_callback
+from .tools.asset_layers import composite_thumbnail, place_asset, remove_asset
+from .tools.create_image import create_image, finalize_thumbnail
+from .tools.export_thumbnail import export_thumbnail
+from .tools.image_jobs import cancel_image_job, get_image_job, submit_image_job
+from .tools.select_variant import select_thumbnail_variant
+from .tools.set_thumbnail_text import set_thumbnail_text
 
 # Remove the edit_image import as we'll use create_image for everything
 # from .tools.edit_image import edit_image
@@ -14,7 +20,21 @@ generate_image_agent = Agent(
     name="generate_image_agent",
     description="An agent that generates YouTube thumbnail images from prompts and automatically incorporates assets.",
     model=GEMINI_MODEL,
-    tools=[create_image],
+    # Uploads are used from the assets folder; the model only needs their names
+    before_model_callback=make_before_model_callback(image_history="reference"),
+    tools=[
+        create_image,
+        select_thumbnail_variant,
+        finalize_thumbnail,
+        submit_image_job,
+        get_image_job,
+        cancel_image_job,
+        set_thumbnail_text,
+        place_asset,
+        remove_asset,
+        composite_thumbnail,
+        export_thumbnail,
+    ],
     instruction="""
     You are the YouTube Thumbnail Image Generator, responsible for taking refined prompts
     and generating actual thumbnail images using OpenAI's image generation API.
@@ -45,11 +65,70 @@ generate_image_agent = Agent(
     
     ## Tool Available to You
     
-    You have one tool at your disposal:
+    You have eleven tools at your disposal:
     
-    create_image - Generates a new image from a text prompt
+    create_image - Generates a new draft image from a text prompt (fast, lower quality)
     - Parameters:
       - prompt (string): Detailed description of the image to create
+      - force_new_variant (boolean, optional): Set to true only when the user explicitly asks
+        for a different take on the exact same prompt. Identical requests otherwise return
+        the previously generated image instantly.
+      - num_variants (integer, optional): Number of candidates to generate in parallel (1-4).
+        Use it when the user wants options to choose from. Variants are ranked by local
+        quality metrics (contrast, saturation, title readability, subject clarity) and the
+        best one becomes the current thumbnail.
+
+    select_thumbnail_variant - Makes another variant from the last generation the current thumbnail
+    - Parameters:
+      - variant (integer): The variant number reported by create_image
+
+    finalize_thumbnail - Re-renders the current draft at full quality, using it as the reference
+    - Parameters:
+      - notes (string, optional): Small final touches to apply while re-rendering
+
+    submit_image_job - Starts a draft generation in the background and returns a job_id right away
+    - Parameters: the same as create_image
+
+    get_image_job - Checks on a background job; once it is done the thumbnail is saved exactly
+    like create_image would save it and the same result is returned
+    - Parameters:
+      - job_id (string): The job_id returned by submit_image_job
+      - wait_seconds (integer, optional): How long to wait for the job to finish (max 60)
+    - While the job runs, the newest partial preview is saved as the
+      'youtube_thumbnail_preview.png' artifact so the user can see it taking shape
+
+    cancel_image_job - Stops a background job that the user no longer wants
+    - Parameters:
+      - job_id (string): The job_id returned by submit_image_job
+
+    set_thumbnail_text - Replaces the title text of the current thumbnail locally, without
+    regenerating the image. The text style follows the channel's style guide.
+    - Parameters:
+      - text (string): The exact title text
+      - position (string, optional): e.g. "top-left", "bottom-center", "center-right"
+      - color (string, optional): Text color name or hex code
+      - outline_color (string, optional): Outline color name or hex code
+      - size (number, optional): Font size as a fraction of the image height (e.g. 0.15)
+
+    place_asset - Places, moves or resizes one of the user's assets on a layered thumbnail.
+    The asset's original pixels are kept (the face is never redrawn).
+    - Parameters:
+      - asset_filename (string): The asset's file name
+      - x, y (number, optional): Center of the asset, 0-1 from the left / top edge
+      - scale (number, optional): Asset height as a fraction of the image height
+
+    remove_asset - Removes a placed asset from the layered thumbnail
+    - Parameters:
+      - asset_filename (string): The asset's file name
+
+    composite_thumbnail - Rebuilds the layered thumbnail, optionally with a new background
+    - Parameters:
+      - background_prompt (string, optional): Description of a new background
+
+    export_thumbnail - Exports the current thumbnail as a 1280x720 file under YouTube's 2 MB limit
+    - Parameters:
+      - fit (string, optional): "crop" (default) or "pad" to keep the whole image
+      - image_format (string, optional): "jpeg" (default) or "webp"
     
     ## How to Generate Thumbnails
     
@@ -58,6 +137,8 @@ generate_image_agent = Agent(
     1. Call the create_image tool with the complete prompt exactly as provided
     2. Report the result to the user, including the filename and location
     3. If assets were used, mention which ones were incorporated
+    4. If several variants were generated, list them with their scores and say which one
+       was picked; call select_thumbnail_variant if the user prefers another one
     
     If the user asks for changes to an existing thumbnail:
     
@@ -67,6 +148,38 @@ generate_image_agent = Agent(
     4. The system will automatically use the previous thumbnail as reference
     5. Report the results, highlighting how their feedback was incorporated
     
+    ## Background Jobs
+
+    Use submit_image_job instead of create_image when generating several variants or when the
+    user wants to keep chatting while the image renders. Tell the user the job has started,
+    then call get_image_job (with wait_seconds) until its status is no longer "pending".
+    Mention new partial previews as they appear. If the user says the preview is heading
+    in the wrong direction, call cancel_image_job and start over with an adjusted prompt.
+
+    ## Text-Only Changes
+
+    When the user only wants to change the title text (wording, color, size or placement),
+    call set_thumbnail_text instead of create_image. The first call prepares a text-free
+    version of the thumbnail; later text changes are applied instantly. Use create_image
+    for any change to the image itself.
+
+    ## Layered Thumbnails
+
+    When the user wants their own photo to look exactly like the upload, or wants to move,
+    resize, swap or remove an asset, use place_asset / remove_asset. These re-composite
+    locally without regenerating the image. Only a change to the background needs
+    composite_thumbnail with a background_prompt. Calling create_image afterwards replaces
+    the layered thumbnail with a fully generated one.
+
+    ## Drafts and Final Render
+
+    All create_image calls produce quick drafts so feedback iterations stay fast. Once the
+    user approves a draft (for example "looks good", "that's the one", "finalize it"),
+    call finalize_thumbnail to produce the full quality thumbnail and report its filepath.
+    Never finalize without the user's approval. Then call export_thumbnail and report the
+    upload-ready file, its size and the previews. Suggest fit "pad" if the crop would cut
+    off text or faces near the top or bottom edge.
+
     ## Communication Guidelines
     
     - Be helpful and concise
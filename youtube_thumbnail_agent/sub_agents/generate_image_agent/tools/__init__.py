@@ -2,4 +2,9 @@
 Image generation and editing tools for YouTube thumbnails.
 """
 
-from .create_image import create_image
+from .create_image import create_image, finalize_thumbnail
+from .select_variant import select_thumbnail_variant
+from .image_jobs import cancel_image_job, get_image_job, submit_image_job
+from .set_thumbnail_text import set_thumbnail_text
+from .asset_layers import composite_thumbnail, place_asset, remove_asset
+from .export_thumbnail import export_thumbnail
@@ -0,0 +1,255 @@
+"""
+Tools for building a thumbnail from layers: background, asset cutouts and title.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from typing import Dict
+
+import google.genai.types as types
+from google.adk.tools.tool_context import ToolContext
+
+from ....constants import FINAL_IMAGE_QUALITY
+from ....shared_lib.asset_ingestion import wait_for_assets
+from ....shared_lib.workspace import get_workspace, session_id_of
+from .assets import load_image_file
+from .create_image import (
+    ImageGenerationError,
+    render_thumbnails,
+    thumbnail_state_snapshot,
+)
+from .layers import compose_layers, cutout_asset, store_background
+from .openai_client import get_openai_client
+from .set_thumbnail_text import current_text_style
+from .text_overlay import render_text_overlay
+from .thumbnail_store import get_thumbnail_store
+
+BACKGROUND_FROM_THUMBNAIL_PROMPT = (
+    "Remove every person, face, product and piece of text from the first reference "
+    "image and fill those areas with the surrounding background. Keep the background, "
+    "colors, lighting and style exactly as they are."
+)
+BACKGROUND_SUFFIX = (
+    "Background only: no people, no faces, no text. Leave clear space for a "
+    "subject on one side and a title on the other."
+)
+
+# Where a newly placed asset goes: right of center, filling most of the height
+_DEFAULT_PLACEMENT = {"x": 0.72, "y": 0.55, "scale": 0.85}
+
+
+def _ensure_background(
+    tool_context: ToolContext, layers: Dict, background_prompt: str
+) -> None:
+    """Create the background layer if missing or a new one is requested."""
+    background = layers.get("background")
+    if background and os.path.exists(background) and not background_prompt:
+        return
+
+    snapshot = thumbnail_state_snapshot(tool_context)
+    if background_prompt:
+        prompt = f"{background_prompt.strip()}. {BACKGROUND_SUFFIX}"
+        snapshot["thumbnail_generated"] = False
+    elif tool_context.state.get("thumbnail_generated"):
+        # Keep the look of the current thumbnail, minus its subjects and text
+        prompt = BACKGROUND_FROM_THUMBNAIL_PROMPT
+    elif tool_context.state.get("thumbnail_prompt"):
+        prompt = f"{tool_context.state['thumbnail_prompt']}. {BACKGROUND_SUFFIX}"
+    else:
+        raise ImageGenerationError(
+            "No background yet. Describe one with background_prompt or generate a thumbnail first."
+        )
+
+    rendered = render_thumbnails(
+        prompt,
+        snapshot,
+        final=tool_context.state.get("thumbnail_quality") == FINAL_IMAGE_QUALITY,
+        use_assets=False,
+    )
+    layers["background"] = store_background(rendered.variants[0][1])
+
+
+def _publish_composite(tool_context: ToolContext, layers: Dict) -> Dict:
+    """Composite the layers (plus any title) and make it the current thumbnail."""
+    started_at = time.monotonic()
+    image_bytes = compose_layers(layers["background"], layers["assets"])
+    title = tool_context.state.get("thumbnail_title")
+    if title:
+        image_bytes = render_text_overlay(
+            image_bytes, title, current_text_style(tool_context)
+        )
+
+    filename = "youtube_thumbnail.png"
+    try:
+        artifact_version = tool_context.save_artifact(
+            filename=filename,
+            artifact=types.Part(
+                inline_data=types.Blob(data=image_bytes, mime_type="image/png")
+            ),
+        )
+    except Exception as e:
+        return {
+            "status": "warning",
+            "message": f"Thumbnail composited but could not be saved as an artifact: {str(e)}",
+        }
+
+    filepath = get_thumbnail_store().save(
+        session_id_of(tool_context),
+        image_bytes,
+        "composite",
+        prompt=f"Layers: {', '.join(layer['asset'] for layer in layers['assets']) or 'background only'}",
+        parents=[layers["background"]]
+        + [layer["cutout"] for layer in layers["assets"]],
+        elapsed_seconds=time.monotonic() - started_at,
+    )["path"]
+
+    tool_context.state["thumbnail_generated"] = True
+    tool_context.state["thumbnail_path"] = filepath
+    tool_context.state["image_filename"] = filename
+    tool_context.state["image_version"] = artifact_version
+    tool_context.state["thumbnail_layers"] = layers
+    tool_context.state["text_overlay_digest"] = hashlib.sha256(image_bytes).hexdigest()
+
+    return {
+        "status": "success",
+        "message": f"Thumbnail composited and saved as artifact '{filename}' (version {artifact_version}) and local file '{filepath}'",
+        "filepath": filepath,
+        "artifact_filename": filename,
+        "artifact_version": artifact_version,
+        "layers": {
+            "background": os.path.basename(layers["background"]),
+            "assets": [
+                {key: layer[key] for key in ("asset", "x", "y", "scale")}
+                for layer in layers["assets"]
+            ],
+            "title": title or None,
+        },
+    }
+
+
+def _current_layers(tool_context: ToolContext) -> Dict:
+    """Return a copy of the layer stack (empty if the thumbnail is not layered)."""
+    layers = tool_context.state.get("thumbnail_layers") or {}
+    return {
+        "background": layers.get("background"),
+        "assets": [dict(layer) for layer in layers.get("assets", [])],
+    }
+
+
+async def place_asset(
+    asset_filename: str,
+    tool_context: ToolContext,
+    x: float = -1.0,
+    y: float = -1.0,
+    scale: float = 0.0,
+) -> Dict:
+    """
+    Place, move or resize a user asset on the layered thumbnail.
+
+    The asset keeps its original pixels: it is cut out once (cached) and
+    composited locally, so repositioning or scaling needs no image API call.
+
+    Args:
+        asset_filename (str): Name of the file in the assets directory
+        tool_context (ToolContext): The tool context
+        x (float, optional): Horizontal center of the asset, 0 (left) to 1 (right)
+        y (float, optional): Vertical center of the asset, 0 (top) to 1 (bottom)
+        scale (float, optional): Asset height as a fraction of the image height
+
+    Returns:
+        dict: Result containing status and message
+    """
+    assets_dir = get_workspace(tool_context).assets_dir
+    await asyncio.to_thread(wait_for_assets, session_id_of(tool_context))
+    asset = load_image_file(os.path.join(assets_dir, os.path.basename(asset_filename)))
+    if asset is None:
+        return {
+            "status": "error",
+            "message": f"Asset '{asset_filename}' not found in {assets_dir}",
+        }
+
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        return {
+            "status": "error",
+            "message": "OPENAI_API_KEY not found in environment variables",
+        }
+
+    layers = _current_layers(tool_context)
+    try:
+        # Cutouts and backgrounds call the image API; keep them off the loop
+        cutout = await asyncio.to_thread(
+            cutout_asset, get_openai_client(api_key), asset, session_id_of(tool_context)
+        )
+        await asyncio.to_thread(_ensure_background, tool_context, layers, "")
+    except ImageGenerationError as e:
+        return {"status": "error", "message": str(e)}
+    except Exception as e:
+        return {"status": "error", "message": f"Error preparing layers: {str(e)}"}
+
+    layer = next(
+        (item for item in layers["assets"] if item["asset"] == asset.filename), None
+    )
+    if layer is None:
+        layer = {"asset": asset.filename, **_DEFAULT_PLACEMENT}
+        layers["assets"].append(layer)
+    layer["cutout"] = cutout
+    if x >= 0:
+        layer["x"] = min(x, 1.0)
+    if y >= 0:
+        layer["y"] = min(y, 1.0)
+    if scale > 0:
+        layer["scale"] = min(scale, 2.0)
+
+    return _publish_composite(tool_context, layers)
+
+
+def remove_asset(asset_filename: str, tool_context: ToolContext) -> Dict:
+    """
+    Remove a placed asset from the layered thumbnail.
+
+    Args:
+        asset_filename (str): Name of the asset to remove
+        tool_context (ToolContext): The tool context
+
+    Returns:
+        dict: Result containing status and message
+    """
+    layers = _current_layers(tool_context)
+    name = os.path.basename(asset_filename)
+    remaining = [layer for layer in layers["assets"] if layer["asset"] != name]
+    if len(remaining) == len(layers["assets"]):
+        return {"status": "error", "message": f"Asset '{name}' is not placed on the thumbnail"}
+
+    layers["assets"] = remaining
+    return _publish_composite(tool_context, layers)
+
+
+async def composite_thumbnail(
+    tool_context: ToolContext, background_prompt: str = ""
+) -> Dict:
+    """
+    Rebuild the thumbnail from its layers, optionally with a new background.
+
+    Without a background_prompt the existing background is reused (or, the
+    first time, derived from the current thumbnail with its subjects and text
+    removed). Placed assets and the title are composited on top locally.
+
+    Args:
+        tool_context (ToolContext): The tool context
+        background_prompt (str, optional): Description of a new background
+
+    Returns:
+        dict: Result containing status and message
+    """
+    layers = _current_layers(tool_context)
+    try:
+        await asyncio.to_thread(_ensure_background, tool_context, layers, background_prompt)
+    except ImageGenerationError as e:
+        return {"status": "error", "message": str(e)}
+    except Exception as e:
+        return {"status": "error", "message": f"Error creating the background: {str(e)}"}
+
+    return _publish_composite(tool_context, layers)
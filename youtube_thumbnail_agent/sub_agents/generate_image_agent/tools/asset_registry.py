@@ -0,0 +1,220 @@
+"""
+Upload-once registry for image inputs.
+
+Each distinct input image (keyed by content digest) is uploaded once through
+the OpenAI Files API and referred to by file ID afterwards, so feedback
+iterations no longer resend every asset as multipart bytes. Generation with
+file references goes through the Responses API image_generation tool; the
+caller falls back to an inline images.edit upload when the references are
+rejected (BadRequestError/NotFoundError).
+"""
+
+import base64
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from openai import BadRequestError, NotFoundError, OpenAI
+
+from ....constants import (
+    ASSET_REFERENCE_TTL_SECONDS,
+    ASSET_REGISTRY_PATH,
+    IMAGE_PARTIAL_IMAGES,
+    IMAGE_REFERENCE_MODEL,
+    THUMBNAIL_IMAGE_SIZE,
+)
+from .assets import ImageInput
+
+
+class AssetRegistry:
+    """Persistent mapping of content digest to uploaded file ID with expiry."""
+
+    def __init__(self, path: str = ASSET_REGISTRY_PATH):
+        self.path = path
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[Asset Registry] Ignoring unreadable registry: {str(e)}")
+
+    def _save(self) -> None:
+        """Write the registry atomically (caller holds the lock)."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.path)
+
+    def get(self, digest: str) -> Optional[str]:
+        """Return the file ID for a digest, or None if unknown or expired."""
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry and entry["expires_at"] > time.time():
+                return entry["file_id"]
+            return None
+
+    def put(self, digest: str, file_id: str) -> None:
+        """Record an uploaded file."""
+        with self._lock:
+            self._entries[digest] = {
+                "file_id": file_id,
+                "expires_at": time.time() + ASSET_REFERENCE_TTL_SECONDS,
+            }
+            self._save()
+
+    def invalidate(self, digest: str) -> Optional[str]:
+        """Forget a digest, returning its file ID if one was recorded."""
+        with self._lock:
+            entry = self._entries.pop(digest, None)
+            if entry:
+                self._save()
+            return entry["file_id"] if entry else None
+
+    def pop_expired(self) -> List[str]:
+        """Remove expired entries and return their file IDs."""
+        with self._lock:
+            now = time.time()
+            expired = [d for d, e in self._entries.items() if e["expires_at"] <= now]
+            file_ids = [self._entries.pop(digest)["file_id"] for digest in expired]
+            if expired:
+                self._save()
+            return file_ids
+
+
+_registry: Optional[AssetRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_asset_registry() -> AssetRegistry:
+    """Return the process-wide asset registry, loading it on first use."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = AssetRegistry()
+        return _registry
+
+
+def _delete_files(client: OpenAI, file_ids: List[str]) -> None:
+    """Best-effort deletion of uploaded files that are no longer referenced."""
+    for file_id in file_ids:
+        try:
+            client.files.delete(file_id)
+        except Exception as e:
+            print(f"[Asset Registry] Could not delete file {file_id}: {str(e)}")
+
+
+def ensure_uploaded(client: OpenAI, image: ImageInput) -> str:
+    """
+    Return a file ID for an image, uploading it only if it is not registered.
+
+    Args:
+        client: The OpenAI client
+        image: The loaded image
+
+    Returns:
+        str: The file ID
+    """
+    registry = get_asset_registry()
+    _delete_files(client, registry.pop_expired())
+
+    file_id = registry.get(image.digest)
+    if file_id:
+        return file_id
+
+    uploaded = client.files.create(file=image.as_upload(), purpose="vision")
+    registry.put(image.digest, uploaded.id)
+    print(f"[Asset Registry] Uploaded {image.filename} as {uploaded.id}")
+    return uploaded.id
+
+
+def _consume_response_stream(stream, on_partial: Callable[[int, bytes], None]):
+    """Forward partial images from a streamed response and return the final response."""
+    with stream:
+        for event in stream:
+            if event.type == "response.image_generation_call.partial_image":
+                on_partial(
+                    event.partial_image_index, base64.b64decode(event.partial_image_b64)
+                )
+            elif event.type == "response.completed":
+                return event.response
+            elif event.type in ("response.failed", "response.incomplete"):
+                raise ValueError(f"Image generation {event.type.split('.')[-1]}")
+    raise ValueError("The response stream ended without a result")
+
+
+def generate_with_references(
+    client: OpenAI,
+    prompt: str,
+    images: List[ImageInput],
+    size: str = THUMBNAIL_IMAGE_SIZE,
+    quality: str = "auto",
+    on_partial: Optional[Callable[[int, bytes], None]] = None,
+) -> str:
+    """
+    Generate an image from a prompt and input images referenced by file ID.
+
+    If the API rejects the request because of a missing or expired file,
+    the inputs whose file IDs the error names are removed from the registry
+    so the next attempt re-uploads them. The files themselves are not
+    deleted, since other sessions may be using the same IDs. Errors are
+    re-raised for the caller to decide whether to fall back to an inline
+    upload.
+
+    Args:
+        client: The OpenAI client
+        prompt: The image prompt
+        images: Input images, the main reference first
+        size: Output image size
+        quality: Rendering quality ("low", "medium", "high" or "auto")
+        on_partial: Called with (partial index, image bytes) for each partial
+            preview; when given, the response is streamed
+
+    Returns:
+        str: The generated image encoded in base64
+    """
+    file_ids = [ensure_uploaded(client, image) for image in images]
+
+    tool = {"type": "image_generation", "size": size, "quality": quality}
+    if on_partial is not None:
+        tool["partial_images"] = IMAGE_PARTIAL_IMAGES
+
+    try:
+        response = client.responses.create(
+            model=IMAGE_REFERENCE_MODEL,
+            input=[
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "input_text", "text": prompt},
+                        *[
+                            {"type": "input_image", "file_id": file_id, "detail": "auto"}
+                            for file_id in file_ids
+                        ],
+                    ],
+                }
+            ],
+            tools=[tool],
+            tool_choice={"type": "image_generation"},
+            stream=on_partial is not None,
+        )
+        if on_partial is not None:
+            response = _consume_response_stream(response, on_partial)
+    except (BadRequestError, NotFoundError) as e:
+        # Only forget files the error names; a 400 about the prompt says
+        # nothing about the uploads
+        registry = get_asset_registry()
+        for image, file_id in zip(images, file_ids):
+            if file_id in str(e):
+                registry.invalidate(image.digest)
+        raise
+
+    for item in response.output:
+        if item.type == "image_generation_call" and item.result:
+            return item.result
+
+    raise ValueError("No image data returned from the API")
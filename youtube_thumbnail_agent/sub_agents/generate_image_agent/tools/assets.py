@@ -0,0 +1,106 @@
+"""
+Asset loading stage for image generation.
+
+Each input image is read exactly once into memory and handed to the OpenAI
+SDK as a ``(filename, bytes, mime_type)`` tuple, so no file handles are kept
+open during (or leaked after) the API call. Files are filtered by their real
+image signature rather than by extension.
+"""
+
+import hashlib
+import os
+from typing import List, NamedTuple, Optional, Tuple
+
+# Image formats accepted by the images.edit endpoint, detected by magic bytes
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_JPEG_SIGNATURE = b"\xff\xd8\xff"
+_HEADER_SIZE = 12
+
+
+class ImageInput(NamedTuple):
+    """An input image loaded into memory."""
+
+    path: str
+    data: bytes
+    mime_type: str
+    digest: str  # SHA-256 of the content
+
+    @property
+    def filename(self) -> str:
+        return os.path.basename(self.path)
+
+    def as_upload(self) -> Tuple[str, bytes, str]:
+        """Return the file tuple accepted by the OpenAI SDK."""
+        return (self.filename, self.data, self.mime_type)
+
+
+def sniff_image_type(header: bytes) -> Optional[str]:
+    """
+    Detect an accepted image type from the first bytes of a file.
+
+    Args:
+        header: At least the first 12 bytes of the file
+
+    Returns:
+        str: The MIME type, or None if the data is not a PNG, JPEG or WebP image
+    """
+    if header.startswith(_PNG_SIGNATURE):
+        return "image/png"
+    if header.startswith(_JPEG_SIGNATURE):
+        return "image/jpeg"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def load_image_file(path: str) -> Optional[ImageInput]:
+    """
+    Read an image file once, returning None if it is not an accepted image.
+
+    Args:
+        path: Path to the file
+
+    Returns:
+        ImageInput: The loaded image, or None
+    """
+    if not os.path.isfile(path):
+        return None
+
+    with open(path, "rb") as f:
+        data = f.read()
+
+    mime_type = sniff_image_type(data[:_HEADER_SIZE])
+    if mime_type is None:
+        print(f"[Assets] Skipping non-image file: {path}")
+        return None
+
+    return ImageInput(
+        path=path,
+        data=data,
+        mime_type=mime_type,
+        digest=hashlib.sha256(data).hexdigest(),
+    )
+
+
+def load_asset_images(assets_dir: str) -> List[ImageInput]:
+    """
+    Load every image in the assets directory, in filename order.
+
+    Args:
+        assets_dir: Directory containing user assets
+
+    Returns:
+        list: The loaded images (non-image files are skipped)
+    """
+    if not os.path.isdir(assets_dir):
+        return []
+
+    images = []
+    for name in sorted(os.listdir(assets_dir)):
+        if name.endswith(".tmp"):
+            # An upload still being written
+            continue
+        image = load_image_file(os.path.join(assets_dir, name))
+        if image is not None:
+            images.append(image)
+    return images
@@ -2,212 +2,528 @@
 Tool for creating images using OpenAI's image generation API with asset incorporation.
 """
 
+import asyncio
 import base64
-import glob
 import os
-from typing import Dict, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
 
 import google.genai.types as types
 from google.adk.tools.tool_context import ToolContext
-from openai import OpenAI
+from openai import BadRequestError, NotFoundError, OpenAI
 
 from ....constants import (
-    GENERATED_THUMBNAILS_DIR,
-    IMAGE_ROOT_DIR,
-    THUMBNAIL_ASSETS_DIR,
+    DRAFT_IMAGE_QUALITY,
+    FINAL_IMAGE_QUALITY,
+    IMAGE_MODEL,
+    IMAGE_PARTIAL_IMAGES,
+    MAX_CONCURRENT_VARIANTS,
+    MAX_IMAGE_VARIANTS,
     THUMBNAIL_IMAGE_SIZE,
+    USE_ASSET_FILE_REFERENCES,
 )
+from ....shared_lib.asset_ingestion import wait_for_assets
+from ....shared_lib.checkpoints import checkpoint_session
+from ....shared_lib.workspace import session_id_of, workspace_for_session
+from .asset_registry import generate_with_references
+from .assets import ImageInput, load_asset_images, load_image_file
+from .generation_cache import generation_key, get_generation_cache, variant_key
+from .image_scheduler import get_image_scheduler
+from .image_scoring import rank_variants
+from .openai_client import get_openai_client
+from .preprocess import normalize_assets
+from .thumbnail_store import get_thumbnail_store
 
 
-def create_image(
+# Artifact that receives a new version for every partial preview
+PREVIEW_ARTIFACT_FILENAME = "youtube_thumbnail_preview.png"
+
+
+class ImageGenerationError(Exception):
+    """Raised when the image API fails to return an image."""
+
+
+class GenerationCancelled(ImageGenerationError):
+    """Raised when a generation is cancelled before its image arrives."""
+
+
+def _image_from_stream(stream, on_partial: Callable[[int, bytes], None]) -> Optional[str]:
+    """Forward partial images from an images stream and return the final image."""
+    with stream:
+        for event in stream:
+            if event.type.endswith(".partial_image"):
+                on_partial(event.partial_image_index, base64.b64decode(event.b64_json))
+            elif event.type.endswith(".completed"):
+                return event.b64_json
+    return None
+
+
+def _request_image(
+    client: OpenAI,
+    prompt: str,
+    input_images: List[ImageInput],
+    has_previous_thumbnail: bool,
+    quality: str,
+    session_id: str,
+    on_partial: Optional[Callable[[int, bytes], None]] = None,
+) -> bytes:
+    """
+    Call the image API and return the generated PNG bytes.
+
+    Every request waits for a slot from the process-wide image scheduler.
+    With on_partial the request is streamed and partial previews are passed
+    on as they arrive.
+
+    Args:
+        client: The OpenAI client
+        prompt: The cleaned image prompt
+        input_images: Reference images (previous thumbnail first, then assets)
+        has_previous_thumbnail: Whether the first input is the previous thumbnail
+        quality: Rendering quality passed to the API
+        session_id: Session the request is queued under
+        on_partial: Called with (partial index, image bytes) for each preview
+
+    Returns:
+        bytes: The generated image
+    """
+    scheduler = get_image_scheduler()
+    final = quality == FINAL_IMAGE_QUALITY
+    stream_options = (
+        {"stream": True, "partial_images": IMAGE_PARTIAL_IMAGES} if on_partial else {}
+    )
+    image_base64 = None
+    if input_images:
+        if not has_previous_thumbnail:
+            source = "assets"
+        elif len(input_images) > 1:
+            source = "previous thumbnail and assets"
+        else:
+            source = "previous thumbnail"
+
+        # Refer to already uploaded inputs by file ID when possible
+        if USE_ASSET_FILE_REFERENCES:
+            try:
+                with scheduler.slot(session_id, final):
+                    image_base64 = generate_with_references(
+                        client,
+                        prompt,
+                        input_images,
+                        quality=quality,
+                        on_partial=on_partial,
+                    )
+            except (BadRequestError, NotFoundError) as e:
+                # Only rejected file references are worth an inline retry;
+                # timeouts, server errors and rate limits would just cost
+                # a second generation
+                print(
+                    f"[Create Image] File references were rejected, uploading inline: {str(e)}"
+                )
+            except GenerationCancelled:
+                raise
+            except Exception as e:
+                raise ImageGenerationError(
+                    f"Error generating image with {source}: {str(e)}"
+                ) from e
+
+        # OpenAI images.edit requires at least one image
+        if image_base64 is None:
+            try:
+                with scheduler.slot(session_id, final):
+                    response = client.images.edit(
+                        model=IMAGE_MODEL,
+                        image=[image.as_upload() for image in input_images],
+                        prompt=prompt,
+                        n=1,
+                        size=THUMBNAIL_IMAGE_SIZE,
+                        quality=quality,
+                        **stream_options,
+                    )
+                    if on_partial:
+                        image_base64 = _image_from_stream(response, on_partial)
+                        response = None
+            except GenerationCancelled:
+                raise
+            except Exception as e:
+                raise ImageGenerationError(
+                    f"Error generating image with {source}: {str(e)}"
+                ) from e
+    else:
+        # No assets and no previous thumbnail - use the generate endpoint
+        try:
+            with scheduler.slot(session_id, final):
+                response = client.images.generate(
+                    model=IMAGE_MODEL,
+                    prompt=prompt,
+                    n=1,
+                    size=THUMBNAIL_IMAGE_SIZE,
+                    quality=quality,
+                    **stream_options,
+                )
+                if on_partial:
+                    image_base64 = _image_from_stream(response, on_partial)
+                    response = None
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            raise ImageGenerationError(f"Error generating image: {str(e)}") from e
+
+    # Get the base64 image data
+    if image_base64 is None:
+        if not (response and response.data and len(response.data) > 0):
+            raise ImageGenerationError("No data returned from the API")
+        image_base64 = response.data[0].b64_json
+        if not image_base64:
+            raise ImageGenerationError("No image data returned from the API")
+
+    return base64.b64decode(image_base64)
+
+
+async def create_image(
     prompt: str,
     tool_context: Optional[ToolContext] = None,
+    force_new_variant: bool = False,
+    num_variants: int = 1,
 ) -> Dict:
     """
-    Create an image using OpenAI's image generation API with gpt-image-1 model,
+    Create a draft image using OpenAI's image generation API with gpt-image-1 model,
     automatically incorporating any assets from the assets directory.
 
     Behavior:
+    - Drafts render at a fast, low quality setting; finalize_thumbnail
+      re-renders the chosen draft at full quality
     - First time: Uses only assets from assets directory (if any)
     - Subsequent edits: Uses both the previously generated thumbnail AND assets
+    - Input images are uploaded once and referred to by file ID afterwards,
+      falling back to an inline upload if the references cannot be used
+    - Identical requests return the cached image unless force_new_variant is set
+    - With num_variants > 1, variants are generated concurrently, saved as
+      separate artifacts and ranked locally; the best becomes the current one
+    - Image API calls run on worker threads, so other sessions keep running
 
     Args:
         prompt (str): The prompt to generate an image from
         tool_context (ToolContext, optional): The tool context
+        force_new_variant (bool): Generate a new image even if an identical
+            request is cached
+        num_variants (int): Number of candidate images to generate (max 4)
+
+    Returns:
+        dict: Result containing status and message
+    """
+    return await _create_thumbnail(
+        prompt, tool_context, force_new_variant, num_variants, final=False
+    )
+
+
+async def finalize_thumbnail(tool_context: ToolContext, notes: str = "") -> Dict:
+    """
+    Re-render the current draft thumbnail at full quality.
+
+    The draft is used as the main reference so the composition, text and
+    subjects carry over; only the rendering quality changes.
+
+    Args:
+        tool_context (ToolContext): The tool context
+        notes (str, optional): Final touches to apply while re-rendering
 
     Returns:
         dict: Result containing status and message
     """
+    draft_prompt = tool_context.state.get("thumbnail_prompt")
+    if not tool_context.state.get("thumbnail_generated") or not draft_prompt:
+        return {
+            "status": "error",
+            "message": "No draft thumbnail to finalize. Generate one with create_image first.",
+        }
+
+    final_prompt = (
+        "Re-render the first reference image, the approved draft of this YouTube "
+        "thumbnail, at full quality. Keep its composition, text, colors and subjects "
+        f"exactly as they are. Original prompt: {draft_prompt}"
+    )
+    if notes.strip():
+        final_prompt += f" Final touches: {notes.strip()}"
+
+    return await _create_thumbnail(final_prompt, tool_context, False, 1, final=True)
+
+
+class RenderedThumbnails(NamedTuple):
+    """Images produced by render_thumbnails, ready to be published."""
+
+    prompt: str
+    final: bool
+    quality: str
+    fingerprint: str
+    cache_key: str
+    asset_paths: List[str]
+    is_first_generation: bool
+    variants: List[Tuple[int, bytes, Dict]]  # (index, image bytes, metrics), best first
+    from_cache: bool
+    errors: List[str]
+    parent_path: Optional[str] = None  # Previous thumbnail used as the main reference
+    elapsed_seconds: float = 0.0
+
+
+def thumbnail_state_snapshot(tool_context: Optional[ToolContext]) -> Dict:
+    """
+    Copy the state values render_thumbnails depends on.
+
+    Args:
+        tool_context: The tool context, if any
+
+    Returns:
+        dict: The previous thumbnail and cache bookkeeping values plus the
+            session ID and its assets directory
+    """
+    if not tool_context:
+        return {
+            "session_id": session_id_of(None),
+            "assets_dir": workspace_for_session(None).assets_dir,
+        }
+    snapshot = {
+        key: tool_context.state.get(key)
+        for key in (
+            "thumbnail_generated",
+            "thumbnail_path",
+            "thumbnail_request_fingerprint",
+            "thumbnail_cache_key",
+        )
+    }
+    # Image API requests are queued fairly per session
+    snapshot["session_id"] = session_id_of(tool_context)
+    snapshot["assets_dir"] = workspace_for_session(snapshot["session_id"]).assets_dir
+    return snapshot
+
+
+def render_thumbnails(
+    prompt: str,
+    snapshot: Dict,
+    force_new_variant: bool = False,
+    num_variants: int = 1,
+    final: bool = False,
+    on_progress: Optional[Callable[[int, int, bytes], None]] = None,
+    cancel_event: Optional[threading.Event] = None,
+    use_assets: bool = True,
+) -> RenderedThumbnails:
+    """
+    Generate and rank thumbnails without touching the session.
+
+    This is the slow part of create_image. It only reads the state snapshot,
+    so it can also run on a background worker. With on_progress the image
+    requests are streamed and every partial preview is passed on.
+
+    Args:
+        prompt: The prompt to generate an image from
+        snapshot: Values from thumbnail_state_snapshot()
+        force_new_variant: Bypass the generation cache
+        num_variants: Number of candidate images to generate
+        final: Render at full quality instead of the draft tier
+        on_progress: Called with (variant index, partial index, image bytes)
+        cancel_event: Stops the generation at the next preview once set
+        use_assets: Include the user's assets as reference images
+
+    Returns:
+        RenderedThumbnails: The generated images, best first
+
+    Raises:
+        ImageGenerationError: If no image could be generated
+        GenerationCancelled: If cancel_event was set
+    """
+    quality = FINAL_IMAGE_QUALITY if final else DRAFT_IMAGE_QUALITY
+    started_at = time.monotonic()
+
+    # Get API key from environment
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        raise ImageGenerationError("OPENAI_API_KEY not found in environment variables")
+
+    client = get_openai_client(api_key)
+
+    # Clean up prompt if needed
+    clean_prompt = prompt.strip()
+
+    # Add YouTube thumbnail context if not mentioned
+    if "youtube thumbnail" not in clean_prompt.lower():
+        clean_prompt = f"YouTube thumbnail: {clean_prompt}"
+
+    # Load every image asset of the session once (non-image files are skipped),
+    # after any upload still being written has landed
+    assets_dir = snapshot.get("assets_dir")
+    if use_assets and assets_dir:
+        wait_for_assets(snapshot.get("session_id"))
+    asset_images = load_asset_images(assets_dir) if use_assets and assets_dir else []
+
+    # Track all asset paths for reporting
+    asset_paths = [image.path for image in asset_images]
+
+    # Upload normalized (oriented, downscaled, metadata-free) variants
+    asset_inputs = normalize_assets(asset_images)
+    input_images = list(asset_inputs)
+
+    # Check if we already have a generated thumbnail to use as reference
+    previous_thumbnail = None
+    if snapshot.get("thumbnail_generated") is True:
+        previous_thumbnail_path = snapshot.get("thumbnail_path")
+        if previous_thumbnail_path:
+            previous_thumbnail = load_image_file(previous_thumbnail_path)
+
+    if previous_thumbnail is not None:
+        # The previous thumbnail goes first so it acts as the main reference
+        input_images.insert(0, previous_thumbnail)
+        asset_paths.insert(0, previous_thumbnail.path)
+
+    # Identical requests (prompt, size, model and inputs) reuse a cached result
+    fingerprint = generation_key(
+        clean_prompt,
+        THUMBNAIL_IMAGE_SIZE,
+        IMAGE_MODEL,
+        [image.digest for image in asset_inputs],
+        quality=quality,
+    )
+    if (
+        previous_thumbnail is not None
+        and snapshot.get("thumbnail_request_fingerprint") == fingerprint
+    ):
+        # Repeating the request that produced the previous thumbnail, so
+        # reuse its key and inputs (a new variant must not edit the old one)
+        cache_key = snapshot.get("thumbnail_cache_key")
+        input_images = list(asset_inputs)
+        previous_thumbnail = None
+    else:
+        cache_key = generation_key(
+            clean_prompt,
+            THUMBNAIL_IMAGE_SIZE,
+            IMAGE_MODEL,
+            [image.digest for image in input_images],
+            quality=quality,
+        )
+
+    num_variants = max(1, min(num_variants, MAX_IMAGE_VARIANTS))
+
+    def _check_cancelled() -> None:
+        if cancel_event is not None and cancel_event.is_set():
+            raise GenerationCancelled("Generation cancelled")
+
+    def _generate_variant(index: int) -> Tuple[bytes, bool]:
+        _check_cancelled()
+
+        on_partial = None
+        if IMAGE_PARTIAL_IMAGES and (on_progress or cancel_event):
+
+            def on_partial(partial_index: int, image_bytes: bytes) -> None:
+                _check_cancelled()
+                if on_progress:
+                    on_progress(index, partial_index, image_bytes)
+
+        return get_generation_cache().get_or_create(
+            variant_key(cache_key, index),
+            lambda: _request_image(
+                client,
+                clean_prompt,
+                input_images,
+                previous_thumbnail is not None,
+                quality,
+                snapshot.get("session_id", "default"),
+                on_partial,
+            ),
+            force=force_new_variant,
+        )
+
+    # Variants are generated concurrently, each one a separate API call
+    results = {}
+    errors = []
+    with ThreadPoolExecutor(
+        max_workers=min(num_variants, MAX_CONCURRENT_VARIANTS)
+    ) as executor:
+        futures = {
+            executor.submit(_generate_variant, index): index
+            for index in range(num_variants)
+        }
+        for future in as_completed(futures):
+            # A failed variant must not discard the ones that succeeded
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                errors.append(str(e))
+
+    _check_cancelled()
+    if not results:
+        raise ImageGenerationError(errors[0])
+
+    # Rank the variants with local image metrics; the best one becomes current
+    indices = sorted(results)
+    ranking = rank_variants([results[index][0] for index in indices])
+    variants = [
+        (indices[position], results[indices[position]][0], metrics)
+        for position, metrics in ranking
+    ]
+
+    return RenderedThumbnails(
+        prompt=clean_prompt,
+        final=final,
+        quality=quality,
+        fingerprint=fingerprint,
+        cache_key=cache_key,
+        asset_paths=asset_paths,
+        is_first_generation=not snapshot.get("thumbnail_generated", False),
+        variants=variants,
+        from_cache=results[variants[0][0]][1],
+        errors=errors,
+        parent_path=previous_thumbnail.path if previous_thumbnail is not None else None,
+        elapsed_seconds=time.monotonic() - started_at,
+    )
+
+
+def save_preview_artifact(tool_context: ToolContext, image_bytes: bytes) -> Optional[int]:
+    """
+    Save a partial preview as a new version of the preview artifact.
+
+    Args:
+        tool_context: The tool context
+        image_bytes: The partial image
+
+    Returns:
+        int: The artifact version, or None if it could not be saved
+    """
     try:
-        # Get API key from environment
-        api_key = os.environ.get("OPENAI_API_KEY")
-        if not api_key:
-            return {
-                "status": "error",
-                "message": "OPENAI_API_KEY not found in environment variables",
-            }
+        return tool_context.save_artifact(
+            filename=PREVIEW_ARTIFACT_FILENAME,
+            artifact=types.Part(
+                inline_data=types.Blob(data=image_bytes, mime_type="image/png")
+            ),
+        )
+    except Exception as e:
+        print(f"[Create Image] Could not save preview artifact: {str(e)}")
+        return None
 
-        client = OpenAI(api_key=api_key)
-
-        # Clean up prompt if needed
-        clean_prompt = prompt.strip()
-
-        # Add YouTube thumbnail context if not mentioned
-        if "youtube thumbnail" not in clean_prompt.lower():
-            clean_prompt = f"YouTube thumbnail: {clean_prompt}"
-
-        # Initialize response variable
-        response = None
-        asset_paths = []
-
-        # Ensure root images directory exists
-        os.makedirs(IMAGE_ROOT_DIR, exist_ok=True)
-
-        # First, check assets directory - we'll need this regardless
-        assets_dir = THUMBNAIL_ASSETS_DIR
-
-        # Create the directory if it doesn't exist
-        if not os.path.exists(assets_dir):
-            os.makedirs(assets_dir, exist_ok=True)
-
-        # List all files in the assets directory
-        asset_files_paths = glob.glob(os.path.join(assets_dir, "*"))
-
-        # Track all asset paths for reporting
-        for asset_path in asset_files_paths:
-            asset_paths.append(asset_path)
-
-        # Check if we already have a generated thumbnail to use as reference
-        if tool_context and tool_context.state.get("thumbnail_generated") is True:
-            previous_thumbnail_path = tool_context.state.get("thumbnail_path")
-
-            if previous_thumbnail_path and os.path.exists(previous_thumbnail_path):
-                # Add the previous thumbnail path to our assets list for reporting
-                if previous_thumbnail_path not in asset_paths:
-                    asset_paths.append(previous_thumbnail_path)
-
-                try:
-                    # OpenAI images.edit requires at least one image
-                    # If we have a previous thumbnail AND other assets, we want to use both
-
-                    if asset_files_paths:
-                        # We have both - use previous thumbnail as main and incorporate other assets
-                        try:
-                            # Generate using previous thumbnail and all assets
-                            # Direct array literal works better with type checking
-                            asset_file_objects = [
-                                open(path, "rb") for path in asset_files_paths
-                            ]
-                            all_files = [
-                                open(previous_thumbnail_path, "rb")
-                            ] + asset_file_objects
-
-                            try:
-                                response = client.images.edit(
-                                    model="gpt-image-1",
-                                    # Use direct array literal which has the correct typing
-                                    image=[
-                                        open(previous_thumbnail_path, "rb"),
-                                        *[
-                                            open(path, "rb")
-                                            for path in asset_files_paths
-                                        ],
-                                    ],
-                                    prompt=clean_prompt,
-                                    n=1,
-                                    size=THUMBNAIL_IMAGE_SIZE,
-                                )
-                            finally:
-                                # Close all files
-                                for file in all_files:
-                                    file.close()
-                        except Exception as e:
-                            return {
-                                "status": "error",
-                                "message": f"Error generating image with previous thumbnail and assets: {str(e)}",
-                            }
-                    else:
-                        # We only have the previous thumbnail
-                        with open(previous_thumbnail_path, "rb") as previous_thumbnail:
-                            response = client.images.edit(
-                                model="gpt-image-1",
-                                image=previous_thumbnail,
-                                prompt=clean_prompt,
-                                n=1,
-                                size=THUMBNAIL_IMAGE_SIZE,
-                            )
-
-                except Exception as e:
-                    return {
-                        "status": "error",
-                        "message": f"Error generating image with previous thumbnail: {str(e)}",
-                    }
-            else:
-                # Previous thumbnail path is invalid - fall back to normal flow
-                # (This will be handled in the next section)
-                pass
-        else:
-            # No previous thumbnail exists yet - use normal asset flow
-            # This will be handled in the next section if we don't have a response yet
-            pass
-
-        # If we don't have a response yet (no previous thumbnail or error), try with assets
-        if response is None:
-            if asset_files_paths:
-                # We have assets but no previous thumbnail (or couldn't use it)
-                try:
-                    # Open all asset files and pass them to the API
-                    asset_file_objects = [
-                        open(path, "rb") for path in asset_files_paths
-                    ]
-
-                    try:
-                        # Generate the image using edit endpoint with all assets
-                        # Use direct array literal to avoid typing issues
-                        response = client.images.edit(
-                            model="gpt-image-1",
-                            image=[open(path, "rb") for path in asset_files_paths],
-                            prompt=clean_prompt,
-                            n=1,
-                            size=THUMBNAIL_IMAGE_SIZE,
-                        )
-                    finally:
-                        # Ensure all file handles are closed properly
-                        for file in asset_file_objects:
-                            file.close()
-
-                except Exception as e:
-                    return {
-                        "status": "error",
-                        "message": f"Error generating image with assets: {str(e)}",
-                    }
-            else:
-                # No assets and no previous thumbnail - use the generate endpoint
-                response = client.images.generate(
-                    model="gpt-image-1",
-                    prompt=clean_prompt,
-                    n=1,
-                    size=THUMBNAIL_IMAGE_SIZE,
-                )
 
-        # Get the base64 image data
-        if response and response.data and len(response.data) > 0:
-            image_base64 = response.data[0].b64_json
-            if image_base64:
-                image_bytes = base64.b64decode(image_base64)
-            else:
-                return {
-                    "status": "error",
-                    "message": "No image data returned from the API",
-                }
-        else:
-            return {
-                "status": "error",
-                "message": "No data returned from the API",
-            }
+def publish_thumbnails(
+    rendered: RenderedThumbnails, tool_context: Optional[ToolContext]
+) -> Dict:
+    """
+    Save rendered thumbnails as artifacts and local files and update the state.
+
+    Args:
+        rendered: Output of render_thumbnails()
+        tool_context: The tool context, if any
 
-        # Use simple filename as requested
-        filename = "youtube_thumbnail.png"
+    Returns:
+        dict: Result containing status and message
+    """
+    num_variants = len(rendered.variants) + len(rendered.errors)
+    session_id = session_id_of(tool_context)
+
+    variants = []
+    for index, image_bytes, metrics in rendered.variants:
+        # Use simple filename as requested (numbered when there are variants)
+        if rendered.final:
+            filename = "youtube_thumbnail_final.png"
+        elif num_variants == 1:
+            filename = "youtube_thumbnail.png"
+        else:
+            filename = f"youtube_thumbnail_variant_{index + 1}.png"
 
         # Save as an artifact if tool_context is provided
         artifact_version = None
@@ -222,12 +538,6 @@ def create_image(
                 artifact_version = tool_context.save_artifact(
                     filename=filename, artifact=image_artifact
                 )
-
-                # Update state to indicate a thumbnail has been generated
-                tool_context.state["thumbnail_generated"] = True
-                tool_context.state["image_filename"] = filename
-                tool_context.state["image_version"] = artifact_version
-
             except ValueError as e:
                 # Handle the case where artifact_service is not configured
                 return {
@@ -241,54 +551,138 @@ def create_image(
                     "message": f"Image generated but encountered an error saving as artifact: {str(e)}",
                 }
 
-        # Create directory for local file saving
-        os.makedirs(GENERATED_THUMBNAILS_DIR, exist_ok=True)
-
-        # Save the image locally as well
-        filepath = os.path.join(GENERATED_THUMBNAILS_DIR, filename)
-        with open(filepath, "wb") as f:
-            f.write(image_bytes)
-
-        # Update state with thumbnail path
-        if tool_context:
-            tool_context.state["thumbnail_path"] = filepath
-            tool_context.state["thumbnail_generated"] = True
-
-        # Return success with artifact details if available
-        if artifact_version is not None:
-            return {
-                "status": "success",
-                "message": f"Image created successfully and saved as artifact '{filename}' (version {artifact_version}) and local file '{filepath}'",
+        # Save the image locally as a new version of this session's thumbnail
+        filepath = get_thumbnail_store().save(
+            session_id,
+            image_bytes,
+            "final" if rendered.final else "draft",
+            prompt=rendered.prompt,
+            parents=[rendered.parent_path],
+            elapsed_seconds=rendered.elapsed_seconds,
+        )["path"]
+
+        variants.append(
+            {
+                "variant": index + 1,
                 "filepath": filepath,
                 "artifact_filename": filename,
                 "artifact_version": artifact_version,
-                "assets_used": (
-                    [os.path.basename(path) for path in asset_paths]
-                    if asset_paths
-                    else []
-                ),
-                "thumbnail_generated": True,
-                "is_first_generation": not (
-                    tool_context
-                    and tool_context.state.get("thumbnail_generated", False)
-                ),
+                "metrics": metrics,
             }
+        )
+
+    best = variants[0]
+    filename = best["artifact_filename"]
+    filepath = best["filepath"]
+    artifact_version = best["artifact_version"]
+    from_cache = rendered.from_cache
+    quality = rendered.quality
+
+    # Update state to indicate a thumbnail has been generated
+    if tool_context:
+        tool_context.state["thumbnail_generated"] = True
+        if artifact_version is not None:
+            tool_context.state["image_filename"] = filename
+            tool_context.state["image_version"] = artifact_version
+        tool_context.state["thumbnail_path"] = filepath
+        tool_context.state["thumbnail_request_fingerprint"] = rendered.fingerprint
+        tool_context.state["thumbnail_cache_key"] = rendered.cache_key
+        tool_context.state["thumbnail_variants"] = variants if num_variants > 1 else []
+        tool_context.state["thumbnail_quality"] = quality
+        # A generated thumbnail replaces any layered composite
+        tool_context.state["thumbnail_layers"] = None
+        if rendered.final:
+            tool_context.state["final_thumbnail_path"] = filepath
         else:
-            return {
-                "status": "success",
-                "message": f"Image created successfully and saved as local file '{filepath}'",
-                "filepath": filepath,
-                "assets_used": (
-                    [os.path.basename(path) for path in asset_paths]
-                    if asset_paths
-                    else []
-                ),
-                "thumbnail_generated": True,
-                "is_first_generation": not (
-                    tool_context
-                    and tool_context.state.get("thumbnail_generated", False)
-                ),
+            tool_context.state["thumbnail_prompt"] = rendered.prompt
+        # The channel's work has produced a thumbnail; nothing left to resume
+        checkpoint_session(tool_context, completed=True)
+
+    cache_note = " (identical request, returned from cache)" if from_cache else ""
+    cache_note += f" [{'final' if rendered.final else 'draft'} quality]"
+    if num_variants > 1:
+        cache_note += (
+            f". Generated {len(variants)} variants; variant {best['variant']} "
+            f"ranked best (score {best['metrics']['score']}) and is now the current thumbnail"
+        )
+
+    asset_paths = rendered.asset_paths
+
+    # Return success with artifact details if available
+    if artifact_version is not None:
+        result = {
+            "status": "success",
+            "message": f"Image created successfully and saved as artifact '{filename}' (version {artifact_version}) and local file '{filepath}'{cache_note}",
+            "filepath": filepath,
+            "artifact_filename": filename,
+            "artifact_version": artifact_version,
+            "assets_used": (
+                [os.path.basename(path) for path in asset_paths]
+                if asset_paths
+                else []
+            ),
+            "thumbnail_generated": True,
+            "quality": quality,
+            "cached": from_cache,
+            "is_first_generation": rendered.is_first_generation,
+        }
+    else:
+        result = {
+            "status": "success",
+            "message": f"Image created successfully and saved as local file '{filepath}'{cache_note}",
+            "filepath": filepath,
+            "assets_used": (
+                [os.path.basename(path) for path in asset_paths]
+                if asset_paths
+                else []
+            ),
+            "thumbnail_generated": True,
+            "quality": quality,
+            "cached": from_cache,
+            "is_first_generation": rendered.is_first_generation,
+        }
+
+    if num_variants > 1:
+        result["variants"] = [
+            {
+                "variant": variant["variant"],
+                "filepath": variant["filepath"],
+                "score": variant["metrics"]["score"],
+                "metrics": variant["metrics"],
             }
+            for variant in variants
+        ]
+        if rendered.errors:
+            result["failed_variants"] = rendered.errors
+
+    return result
+
 
+async def _create_thumbnail(
+    prompt: str,
+    tool_context: Optional[ToolContext],
+    force_new_variant: bool,
+    num_variants: int,
+    final: bool,
+) -> Dict:
+    """
+    Render and publish thumbnails for create_image and finalize_thumbnail.
+
+    Nobody can see previews before a synchronous call returns, so requests
+    are not streamed here; partial previews are only for background jobs.
+    """
+    try:
+        # Rendering waits for scheduler slots and the API; keep it off the loop
+        rendered = await asyncio.to_thread(
+            render_thumbnails,
+            prompt,
+            thumbnail_state_snapshot(tool_context),
+            force_new_variant,
+            num_variants,
+            final,
+        )
+        return publish_thumbnails(rendered, tool_context)
+    except ImageGenerationError as e:
+        return {"status": "error", "message": str(e)}
     except Exception as e:
         return {"status": "error", "message": f"Error creating image: {str(e)}"}
@@ -0,0 +1,196 @@
+"""
+YouTube-ready export of generated thumbnails.
+
+The generated 1536x1024 (3:2) PNG is cropped or padded to 1280x720 (16:9)
+and encoded as JPEG or WebP at the highest quality that stays under
+YouTube's size limit, found by binary search. Small preview sizes are
+produced alongside. Encodes run concurrently in a process pool.
+"""
+
+import io
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageFilter
+
+from ....constants import (
+    EXPORT_MAX_BYTES,
+    EXPORT_PREVIEW_QUALITY,
+    EXPORT_PREVIEW_SIZES,
+    EXPORT_SIZE,
+    EXPORT_WORKERS,
+)
+
+_FORMATS = {"jpeg": ("JPEG", "jpg", "image/jpeg"), "webp": ("WEBP", "webp", "image/webp")}
+_MIN_QUALITY = 30
+_MAX_QUALITY = 95
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def fit_to_frame(image: Image.Image, size: Tuple[int, int], mode: str) -> Image.Image:
+    """
+    Fit an image to an exact frame size.
+
+    Args:
+        image: The source image
+        size: Target (width, height)
+        mode: "crop" to fill the frame (trimming the overflow evenly) or "pad"
+            to fit the whole image over a blurred, enlarged copy of itself
+
+    Returns:
+        Image.Image: RGB image of exactly the target size
+    """
+    image = image.convert("RGB")
+    width, height = size
+    scale = (max if mode == "crop" else min)(width / image.width, height / image.height)
+    resized = image.resize(
+        (round(image.width * scale), round(image.height * scale)),
+        Image.Resampling.LANCZOS,
+    )
+    if mode == "crop":
+        left = (resized.width - width) // 2
+        top = (resized.height - height) // 2
+        return resized.crop((left, top, left + width, top + height))
+
+    fill_scale = max(width / image.width, height / image.height)
+    backdrop = image.resize(
+        (round(image.width * fill_scale), round(image.height * fill_scale)),
+        Image.Resampling.BILINEAR,
+    )
+    left = (backdrop.width - width) // 2
+    top = (backdrop.height - height) // 2
+    frame = backdrop.crop((left, top, left + width, top + height)).filter(
+        ImageFilter.GaussianBlur(24)
+    )
+    frame.paste(resized, ((width - resized.width) // 2, (height - resized.height) // 2))
+    return frame
+
+
+def _encode(image: Image.Image, image_format: str, quality: int) -> bytes:
+    output = io.BytesIO()
+    options = {"quality": quality}
+    if image_format == "JPEG":
+        options.update(optimize=True, progressive=True)
+    else:
+        options["method"] = 6
+    image.save(output, format=image_format, **options)
+    return output.getvalue()
+
+
+def encode_under_limit(
+    raw: bytes, size: Tuple[int, int], image_format: str, max_bytes: int
+) -> Tuple[bytes, int]:
+    """
+    Encode at the highest quality whose output fits in max_bytes (runs in a worker).
+
+    Args:
+        raw: RGB pixel data
+        size: Image (width, height)
+        image_format: Pillow format name ("JPEG" or "WEBP")
+        max_bytes: Size ceiling
+
+    Returns:
+        tuple: (encoded bytes, quality used); the lowest quality is returned
+            if nothing fits
+    """
+    image = Image.frombytes("RGB", size, raw)
+    best = None
+    low, high = _MIN_QUALITY, _MAX_QUALITY
+    while low <= high:
+        quality = (low + high) // 2
+        data = _encode(image, image_format, quality)
+        if len(data) <= max_bytes:
+            best = (data, quality)
+            low = quality + 1
+        else:
+            high = quality - 1
+    return best or (_encode(image, image_format, _MIN_QUALITY), _MIN_QUALITY)
+
+
+def encode_preview(
+    raw: bytes, size: Tuple[int, int], preview_size: Tuple[int, int], image_format: str
+) -> bytes:
+    """Downscale and encode a preview at a fixed quality (runs in a worker)."""
+    image = Image.frombytes("RGB", size, raw).resize(
+        preview_size, Image.Resampling.LANCZOS
+    )
+    return _encode(image, image_format, EXPORT_PREVIEW_QUALITY)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Return the shared encoding pool, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=EXPORT_WORKERS)
+        return _executor
+
+
+def _reset_executor() -> None:
+    """Discard a broken pool so the next call creates a fresh one."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def export_image(
+    image_bytes: bytes,
+    mode: str = "crop",
+    image_format: str = "jpeg",
+    max_bytes: int = EXPORT_MAX_BYTES,
+) -> Dict:
+    """
+    Produce the upload-ready export and previews of a thumbnail.
+
+    Args:
+        image_bytes: The encoded source thumbnail
+        mode: "crop" or "pad" (see fit_to_frame)
+        image_format: "jpeg" or "webp"
+        max_bytes: Size ceiling of the main export
+
+    Returns:
+        dict: "extension", "mime_type", "export" (bytes), "quality" and
+            "previews" (list of (width, height, bytes))
+    """
+    pil_format, extension, mime_type = _FORMATS[image_format]
+    with Image.open(io.BytesIO(image_bytes)) as source:
+        frame = fit_to_frame(source, EXPORT_SIZE, mode)
+    raw = frame.tobytes()
+
+    tasks: List[Tuple] = [(encode_under_limit, raw, frame.size, pil_format, max_bytes)]
+    tasks += [
+        (encode_preview, raw, frame.size, preview_size, pil_format)
+        for preview_size in EXPORT_PREVIEW_SIZES
+    ]
+
+    results = None
+    try:
+        executor = _get_executor()
+        futures = [executor.submit(*task) for task in tasks]
+        results = [future.result() for future in futures]
+    except BrokenProcessPool as e:
+        print(f"[Export] Process pool broke, encoding inline: {str(e)}")
+        _reset_executor()
+    except (OSError, RuntimeError) as e:
+        print(f"[Export] Process pool unavailable, encoding inline: {str(e)}")
+        _reset_executor()
+    if results is None:
+        results = [task[0](*task[1:]) for task in tasks]
+
+    data, quality = results[0]
+    return {
+        "extension": extension,
+        "mime_type": mime_type,
+        "export": data,
+        "quality": quality,
+        "previews": [
+            (width, height, preview)
+            for (width, height), preview in zip(EXPORT_PREVIEW_SIZES, results[1:])
+        ],
+    }
@@ -0,0 +1,122 @@
+"""
+Tool for exporting the current thumbnail in a YouTube-ready format.
+"""
+
+import asyncio
+import os
+from typing import Dict, List, Tuple
+
+import google.genai.types as types
+from google.adk.tools.tool_context import ToolContext
+
+from ....constants import EXPORT_MAX_BYTES
+from ....shared_lib.workspace import get_workspace
+from .export import export_image
+
+
+def _write_export(
+    thumbnail_path: str, exports_dir: str, fit: str, image_format: str
+) -> Tuple[Dict, str, str, List[Dict]]:
+    """
+    Encode the thumbnail for upload and write the export and its previews.
+
+    Returns:
+        tuple: (export_image() result, filename, file path, preview descriptions)
+    """
+    with open(thumbnail_path, "rb") as f:
+        exported = export_image(f.read(), fit, image_format)
+
+    extension = exported["extension"]
+    stem = os.path.splitext(os.path.basename(thumbnail_path))[0]
+
+    filename = f"{stem}_youtube.{extension}"
+    filepath = os.path.join(exports_dir, filename)
+    with open(filepath, "wb") as f:
+        f.write(exported["export"])
+
+    previews = []
+    for width, height, data in exported["previews"]:
+        preview_path = os.path.join(exports_dir, f"{stem}_{width}x{height}.{extension}")
+        with open(preview_path, "wb") as f:
+            f.write(data)
+        previews.append({"filepath": preview_path, "bytes": len(data)})
+    return exported, filename, filepath, previews
+
+
+async def export_thumbnail(
+    tool_context: ToolContext, fit: str = "crop", image_format: str = "jpeg"
+) -> Dict:
+    """
+    Export the current thumbnail as a 1280x720 file ready for upload to YouTube.
+
+    The image is encoded at the highest quality that stays under YouTube's
+    2 MB limit, and small previews are written alongside it.
+
+    Args:
+        tool_context (ToolContext): The tool context
+        fit (str, optional): "crop" to fill 16:9 by trimming the top and bottom,
+            or "pad" to keep the whole image on a blurred backdrop
+        image_format (str, optional): "jpeg" or "webp"
+
+    Returns:
+        dict: Result containing status and message
+    """
+    thumbnail_path = tool_context.state.get("thumbnail_path")
+    if not tool_context.state.get("thumbnail_generated") or not thumbnail_path:
+        return {
+            "status": "error",
+            "message": "No thumbnail to export. Generate one with create_image first.",
+        }
+
+    fit = fit.strip().lower() or "crop"
+    image_format = image_format.strip().lower().replace("jpg", "jpeg") or "jpeg"
+    if fit not in ("crop", "pad"):
+        return {"status": "error", "message": f"Unknown fit '{fit}'. Use 'crop' or 'pad'."}
+    if image_format not in ("jpeg", "webp"):
+        return {
+            "status": "error",
+            "message": f"Unknown format '{image_format}'. Use 'jpeg' or 'webp'.",
+        }
+
+    exports_dir = get_workspace(tool_context).exports_dir
+    try:
+        # Encoding searches several quality levels; keep it off the loop
+        exported, filename, filepath, previews = await asyncio.to_thread(
+            _write_export, thumbnail_path, exports_dir, fit, image_format
+        )
+    except Exception as e:
+        return {"status": "error", "message": f"Error exporting the thumbnail: {str(e)}"}
+
+    try:
+        artifact_version = tool_context.save_artifact(
+            filename=filename,
+            artifact=types.Part(
+                inline_data=types.Blob(
+                    data=exported["export"], mime_type=exported["mime_type"]
+                )
+            ),
+        )
+    except Exception as e:
+        return {
+            "status": "warning",
+            "message": f"Thumbnail exported to '{filepath}' but could not be saved as an artifact: {str(e)}",
+            "filepath": filepath,
+        }
+
+    tool_context.state["export_path"] = filepath
+
+    size = len(exported["export"])
+    result = {
+        "status": "success",
+        "message": f"Thumbnail exported as artifact '{filename}' (version {artifact_version}) and local file '{filepath}' ({size / 1000000:.2f} MB, quality {exported['quality']})",
+        "filepath": filepath,
+        "artifact_filename": filename,
+        "artifact_version": artifact_version,
+        "bytes": size,
+        "quality": exported["quality"],
+        "previews": previews,
+    }
+    if size > EXPORT_MAX_BYTES:
+        result["status"] = "warning"
+        result["message"] += ". It is still over YouTube's 2 MB limit even at the lowest quality."
+    return result
@@ -0,0 +1,211 @@
+"""
+Persistent cache of generated images.
+
+Results are keyed by the normalized prompt, output size, model and the
+digests of every input image, so an identical request (a retry after a
+crash, a double-click) returns the stored image instead of paying for a new
+generation. Entries are evicted least-recently-used once the cache exceeds
+its byte budget, and concurrent identical requests share one generation.
+Access times are tracked in memory and written to the index with every new
+entry or at most every GENERATION_CACHE_INDEX_FLUSH_SECONDS on hits.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ....constants import (
+    GENERATION_CACHE_DIR,
+    GENERATION_CACHE_INDEX_FLUSH_SECONDS,
+    GENERATION_CACHE_MAX_BYTES,
+)
+
+_INDEX_FILE = "index.json"
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so cosmetic prompt differences share a cache entry."""
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+def generation_key(
+    prompt: str, size: str, model: str, input_digests: List[str], **options
+) -> str:
+    """
+    Compute the cache key for a generation request.
+
+    Args:
+        prompt: The image prompt
+        size: Output image size
+        model: Image model name
+        input_digests: Digests of the input images, in request order
+        **options: Any other request options that change the output
+
+    Returns:
+        str: Hex digest identifying the request
+    """
+    payload = {
+        "prompt": normalize_prompt(prompt),
+        "size": size,
+        "model": model,
+        "inputs": input_digests,
+        "options": options,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def variant_key(key: str, index: int) -> str:
+    """Return the cache key of the index-th variant of a request (0 is the key itself)."""
+    if index == 0:
+        return key
+    return hashlib.sha256(f"{key}:variant:{index}".encode()).hexdigest()
+
+
+class GenerationCache:
+    """On-disk LRU cache of generated image bytes, bounded by total size."""
+
+    def __init__(
+        self,
+        cache_dir: str = GENERATION_CACHE_DIR,
+        max_bytes: int = GENERATION_CACHE_MAX_BYTES,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, List] = {}
+        self._index: Dict[str, Dict] = {}
+        self._last_flush = time.time()
+
+        index_path = os.path.join(cache_dir, _INDEX_FILE)
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, encoding="utf-8") as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[Generation Cache] Ignoring unreadable index: {str(e)}")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def _save_index(self) -> None:
+        """Write the index atomically (caller holds the lock)."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        index_path = os.path.join(self.cache_dir, _INDEX_FILE)
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, index_path)
+        self._last_flush = time.time()
+
+    def _evict(self, keep: str) -> None:
+        """Drop least recently used entries, except keep, until under the byte budget."""
+        total = sum(entry["size"] for entry in self._index.values())
+        for key, entry in sorted(
+            self._index.items(), key=lambda item: item[1]["last_access"]
+        ):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            total -= entry["size"]
+            del self._index[key]
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached image for a key, or None."""
+        with self._lock:
+            if key not in self._index:
+                return None
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                del self._index[key]
+                self._save_index()
+                return None
+            # Hits only bump the in-memory access time; losing a few of those
+            # on a crash merely makes eviction slightly less accurate
+            self._index[key]["last_access"] = time.time()
+            if time.time() - self._last_flush >= GENERATION_CACHE_INDEX_FLUSH_SECONDS:
+                self._save_index()
+            return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store an image and evict old entries if over budget."""
+        if len(data) > self.max_bytes:
+            print(
+                f"[Generation Cache] Not caching {len(data)} bytes, "
+                f"larger than the {self.max_bytes} byte budget"
+            )
+            return
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{self._path(key)}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+            self._index[key] = {"size": len(data), "last_access": time.time()}
+            self._evict(keep=key)
+            self._save_index()
+
+    def get_or_create(
+        self, key: str, create: Callable[[], bytes], force: bool = False
+    ) -> Tuple[bytes, bool]:
+        """
+        Return the cached image for a key, generating and storing it if missing.
+
+        Concurrent callers with the same key wait for a single generation.
+
+        Args:
+            key: Cache key from generation_key()
+            create: Function that generates the image bytes
+            force: Skip the lookup and always generate a new variant
+
+        Returns:
+            tuple: (image bytes, whether the result came from the cache)
+        """
+        if not force:
+            cached = self.get(key)
+            if cached is not None:
+                return cached, True
+
+        # Waiters share one lock per key; it is dropped when the last one leaves
+        with self._lock:
+            inflight = self._inflight.setdefault(key, [threading.Lock(), 0])
+            inflight[1] += 1
+
+        try:
+            with inflight[0]:
+                if not force:
+                    # Another caller may have produced it while we waited
+                    cached = self.get(key)
+                    if cached is not None:
+                        return cached, True
+                data = create()
+                self.put(key, data)
+                return data, False
+        finally:
+            with self._lock:
+                inflight[1] -= 1
+                if inflight[1] == 0:
+                    self._inflight.pop(key, None)
+
+
+_cache: Optional[GenerationCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_generation_cache() -> GenerationCache:
+    """Return the process-wide generation cache, loading it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = GenerationCache()
+        return _cache
@@ -0,0 +1,478 @@
+"""
+Background queue for thumbnail generation jobs.
+
+Submitting a job returns a job ID immediately while a bounded thread pool
+renders the thumbnails, so one process can keep many generations in flight
+without blocking agent turns. Every job has a JSON record on disk, with its
+rendered images next to it, and a later tool call publishes the result
+into the session. Workers never touch the tool context.
+
+Image requests are streamed: each partial preview is written next to the
+job record as it arrives, and a running job can be cancelled, which stops
+it at its next preview.
+
+Job directories are deleted when their session's workspace is cleaned up,
+and finished jobs older than GENERATION_JOB_RETENTION_HOURS are pruned in
+the background as new jobs are submitted.
+"""
+
+import asyncio
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from ....constants import (
+    GENERATION_JOB_PRUNE_INTERVAL_SECONDS,
+    GENERATION_JOB_RETENTION_HOURS,
+    GENERATION_JOB_WORKERS,
+    GENERATION_JOBS_DIR,
+)
+from ....shared_lib.workspace import on_workspace_cleanup
+from .create_image import (
+    GenerationCancelled,
+    ImageGenerationError,
+    RenderedThumbnails,
+    render_thumbnails,
+)
+
+_RECORD_FILE = "job.json"
+_JOB_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+# Job statuses that have not produced a result yet
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class JobStore:
+    """Persistent job records and rendered images, one directory per job."""
+
+    def __init__(self, jobs_dir: str = GENERATION_JOBS_DIR):
+        self.jobs_dir = jobs_dir
+        self._lock = threading.Lock()
+
+    def _record_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, job_id, _RECORD_FILE)
+
+    def _write(self, record: Dict) -> None:
+        """Write a record atomically (caller holds the lock)."""
+        path = self._record_path(record["job_id"])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f)
+        os.replace(tmp_path, path)
+
+    def create(self, record: Dict) -> None:
+        """Store a new job record."""
+        with self._lock:
+            self._write(record)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Return a job record, or None if the ID is unknown."""
+        if not _JOB_ID_PATTERN.fullmatch(job_id):
+            return None
+        with self._lock:
+            try:
+                with open(self._record_path(job_id), encoding="utf-8") as f:
+                    return json.load(f)
+            except FileNotFoundError:
+                return None
+
+    def records(self) -> List[Dict]:
+        """Return every readable job record."""
+        try:
+            job_ids = os.listdir(self.jobs_dir)
+        except FileNotFoundError:
+            return []
+        records = []
+        for job_id in job_ids:
+            try:
+                record = self.get(job_id)
+            except (OSError, ValueError):
+                continue
+            if record:
+                records.append(record)
+        return records
+
+    def delete(self, job_id: str) -> None:
+        """Delete a job record and its images."""
+        if not _JOB_ID_PATTERN.fullmatch(job_id):
+            return
+        with self._lock:
+            shutil.rmtree(os.path.join(self.jobs_dir, job_id), ignore_errors=True)
+
+    def update(self, job_id: str, **fields) -> Dict:
+        """Merge fields into a job record and return the updated record."""
+        with self._lock:
+            with open(self._record_path(job_id), encoding="utf-8") as f:
+                record = json.load(f)
+            record.update(fields)
+            self._write(record)
+            return record
+
+    def update_if_status(self, job_id: str, statuses, **fields) -> Dict:
+        """
+        Merge fields into a job record only if its status is one of statuses.
+
+        The status is re-read under the store lock, so an outcome written in
+        the meantime is never overwritten.
+
+        Args:
+            job_id: The job ID
+            statuses: Statuses the record must still have
+            **fields: Fields to merge
+
+        Returns:
+            dict: The updated record, or the current one if it was not updated
+        """
+        with self._lock:
+            with open(self._record_path(job_id), encoding="utf-8") as f:
+                record = json.load(f)
+            if record["status"] in statuses:
+                record.update(fields)
+                self._write(record)
+            return record
+
+    def claim(self, job_id: str, field: str) -> bool:
+        """Set a boolean field if it is not set yet; False if it already was."""
+        with self._lock:
+            with open(self._record_path(job_id), encoding="utf-8") as f:
+                record = json.load(f)
+            if record.get(field):
+                return False
+            record[field] = True
+            self._write(record)
+            return True
+
+    def save_preview(
+        self, job_id: str, variant_index: int, partial_index: int, image_bytes: bytes
+    ) -> Dict:
+        """
+        Write a partial preview next to the job record and record the progress.
+
+        Args:
+            job_id: The job ID
+            variant_index: Variant the preview belongs to
+            partial_index: Index of the preview within the variant
+            image_bytes: The partial image
+
+        Returns:
+            dict: The updated job record
+        """
+        path = os.path.join(
+            self.jobs_dir, job_id, f"preview_{variant_index + 1}_{partial_index + 1}.png"
+        )
+        with open(path, "wb") as f:
+            f.write(image_bytes)
+
+        with self._lock:
+            with open(self._record_path(job_id), encoding="utf-8") as f:
+                record = json.load(f)
+            progress = record.get("progress") or {"partial_images": 0}
+            progress["partial_images"] += 1
+            progress["latest_preview"] = path
+            progress["updated_at"] = time.time()
+            record["progress"] = progress
+            self._write(record)
+            return record
+
+    def save_rendered(self, job_id: str, rendered: RenderedThumbnails) -> Dict:
+        """
+        Write rendered images next to the job record.
+
+        Args:
+            job_id: The job ID
+            rendered: Output of render_thumbnails()
+
+        Returns:
+            dict: JSON-serializable description of the render
+        """
+        job_dir = os.path.join(self.jobs_dir, job_id)
+        variants = []
+        for index, image_bytes, metrics in rendered.variants:
+            path = os.path.join(job_dir, f"variant_{index + 1}.png")
+            with open(path, "wb") as f:
+                f.write(image_bytes)
+            variants.append({"index": index, "path": path, "metrics": metrics})
+        return {**rendered._asdict(), "variants": variants}
+
+    def load_rendered(self, record: Dict) -> RenderedThumbnails:
+        """Rebuild the RenderedThumbnails of a completed job."""
+        render = dict(record["render"])
+        variants = []
+        for variant in render["variants"]:
+            with open(variant["path"], "rb") as f:
+                variants.append((variant["index"], f.read(), variant["metrics"]))
+        render["variants"] = variants
+        return RenderedThumbnails(**render)
+
+
+class GenerationQueue:
+    """Bounded executor that renders thumbnails in the background."""
+
+    def __init__(
+        self, store: JobStore, max_workers: int = GENERATION_JOB_WORKERS
+    ):
+        self.store = store
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="thumbnail-job"
+        )
+        self._futures: Dict[str, Future] = {}
+        self._cancel_events: Dict[str, threading.Event] = {}
+        # Jobs of cleaned-up sessions, deleted as soon as they stop running
+        self._discarded = set()
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+    def submit(
+        self,
+        session_id: str,
+        prompt: str,
+        snapshot: Dict,
+        force_new_variant: bool = False,
+        num_variants: int = 1,
+        final: bool = False,
+    ) -> str:
+        """
+        Queue a generation and return its job ID.
+
+        Args:
+            session_id: Session the result will be published to
+            prompt: The image prompt
+            snapshot: Values from thumbnail_state_snapshot()
+            force_new_variant: Bypass the generation cache
+            num_variants: Number of candidate images to generate
+            final: Render at full quality instead of the draft tier
+
+        Returns:
+            str: The job ID
+        """
+        self._maybe_prune()
+        job_id = uuid.uuid4().hex
+        self.store.create(
+            {
+                "job_id": job_id,
+                "session_id": session_id,
+                "prompt": prompt,
+                "status": "queued",
+                "created_at": time.time(),
+            }
+        )
+
+        cancel_event = threading.Event()
+        with self._lock:
+            self._cancel_events[job_id] = cancel_event
+            future = self._executor.submit(
+                self._run,
+                job_id,
+                prompt,
+                snapshot,
+                force_new_variant,
+                num_variants,
+                final,
+                cancel_event,
+            )
+            self._futures[job_id] = future
+        future.add_done_callback(lambda _: self._forget(job_id))
+        return job_id
+
+    def _forget(self, job_id: str) -> None:
+        with self._lock:
+            self._futures.pop(job_id, None)
+            self._cancel_events.pop(job_id, None)
+            discarded = job_id in self._discarded
+            self._discarded.discard(job_id)
+        if discarded:
+            self.store.delete(job_id)
+
+    def _maybe_prune(self) -> None:
+        """Prune old jobs on a background thread, at most once per interval."""
+        with self._lock:
+            now = time.time()
+            if now - self._last_prune < GENERATION_JOB_PRUNE_INTERVAL_SECONDS:
+                return
+            self._last_prune = now
+        threading.Thread(
+            target=self.prune, name="thumbnail-job-prune", daemon=True
+        ).start()
+
+    def prune(self, max_age_hours: float = GENERATION_JOB_RETENTION_HOURS) -> int:
+        """
+        Delete jobs that finished more than max_age_hours ago.
+
+        Jobs left active by a previous process count from their creation.
+
+        Args:
+            max_age_hours: Age after which a finished job is deleted
+
+        Returns:
+            int: Number of jobs deleted
+        """
+        cutoff = time.time() - max_age_hours * 3600
+        pruned = 0
+        for record in self.store.records():
+            with self._lock:
+                active = record["job_id"] in self._futures
+            finished_at = record.get("finished_at") or record.get("created_at", 0)
+            if not active and finished_at < cutoff:
+                self.store.delete(record["job_id"])
+                pruned += 1
+        if pruned:
+            print(f"[Generation Jobs] Pruned {pruned} finished jobs")
+        return pruned
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued or running job.
+
+        A queued job never starts; a running job stops at its next partial
+        preview.
+
+        Args:
+            job_id: The job ID
+
+        Returns:
+            bool: True if the job was still active
+        """
+        with self._lock:
+            future = self._futures.get(job_id)
+            cancel_event = self._cancel_events.get(job_id)
+        if future is None:
+            return False
+
+        cancel_event.set()
+        if future.cancel():
+            # It never started, so _run will not record the outcome
+            try:
+                self.store.update(job_id, status="cancelled", finished_at=time.time())
+            except FileNotFoundError:
+                pass  # Its session was cleaned up and the job already deleted
+        return True
+
+    def cancel_session(self, session_id: str) -> int:
+        """
+        Cancel every active job of a session and delete all of its jobs.
+
+        Cancelled jobs are deleted once their worker stops.
+
+        Args:
+            session_id: The session ID
+
+        Returns:
+            int: Number of jobs cancelled
+        """
+        cancelled = 0
+        for record in self.store.records():
+            if record["session_id"] != session_id:
+                continue
+            job_id = record["job_id"]
+            with self._lock:
+                active = job_id in self._futures
+                if active:
+                    self._discarded.add(job_id)
+            if active and self.cancel(job_id):
+                cancelled += 1
+            # Jobs no longer running are deleted now, _forget deletes the rest
+            with self._lock:
+                finished = job_id not in self._futures
+                if finished:
+                    self._discarded.discard(job_id)
+            if finished:
+                self.store.delete(job_id)
+        return cancelled
+
+    def _run(
+        self,
+        job_id: str,
+        prompt: str,
+        snapshot: Dict,
+        force_new_variant: bool,
+        num_variants: int,
+        final: bool,
+        cancel_event: threading.Event,
+    ) -> None:
+        """Render a job and record the outcome."""
+        self.store.update(job_id, status="running", started_at=time.time())
+        try:
+            rendered = render_thumbnails(
+                prompt,
+                snapshot,
+                force_new_variant,
+                num_variants,
+                final,
+                on_progress=lambda variant, partial, image_bytes: self.store.save_preview(
+                    job_id, variant, partial, image_bytes
+                ),
+                cancel_event=cancel_event,
+            )
+            render = self.store.save_rendered(job_id, rendered)
+            self.store.update(
+                job_id, status="completed", finished_at=time.time(), render=render
+            )
+        except GenerationCancelled:
+            self.store.update(job_id, status="cancelled", finished_at=time.time())
+        except ImageGenerationError as e:
+            self.store.update(
+                job_id, status="failed", finished_at=time.time(), error=str(e)
+            )
+        except Exception as e:
+            self.store.update(
+                job_id,
+                status="failed",
+                finished_at=time.time(),
+                error=f"Error creating image: {str(e)}",
+            )
+
+    async def wait(self, job_id: str, timeout: float = 0) -> Optional[Dict]:
+        """
+        Return a job record, waiting up to timeout seconds for it to finish.
+
+        The wait is awaited, so other sessions keep running on the event loop
+        meanwhile. Jobs left queued or running by a previous process are
+        marked failed.
+
+        Args:
+            job_id: The job ID
+            timeout: Seconds to wait for an active job
+
+        Returns:
+            dict: The job record, or None if the ID is unknown
+        """
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and timeout > 0:
+            # asyncio.wait neither raises nor cancels the job on timeout
+            await asyncio.wait([asyncio.wrap_future(future)], timeout=timeout)
+
+        record = self.store.get(job_id)
+        if record and record["status"] in ACTIVE_STATUSES:
+            with self._lock:
+                active = job_id in self._futures
+            if not active:
+                # The job may have finished since the record was read
+                record = self.store.update_if_status(
+                    job_id,
+                    ACTIVE_STATUSES,
+                    status="failed",
+                    error="The job was interrupted before it finished. Please submit it again.",
+                )
+        return record
+
+
+_queue: Optional[GenerationQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_generation_queue() -> GenerationQueue:
+    """Return the process-wide generation queue, starting it on first use."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = GenerationQueue(JobStore())
+            on_workspace_cleanup(_queue.cancel_session)
+        return _queue
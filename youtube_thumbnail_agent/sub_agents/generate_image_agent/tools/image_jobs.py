@@ -0,0 +1,172 @@
+"""
+Tools for generating thumbnails as background jobs.
+"""
+
+import time
+from typing import Dict
+
+from google.adk.tools.tool_context import ToolContext
+
+from ....constants import GENERATION_JOB_MAX_WAIT_SECONDS
+from ....shared_lib.workspace import session_id_of
+from .create_image import (
+    PREVIEW_ARTIFACT_FILENAME,
+    publish_thumbnails,
+    save_preview_artifact,
+    thumbnail_state_snapshot,
+)
+from .generation_jobs import ACTIVE_STATUSES, get_generation_queue
+from .image_scheduler import get_image_scheduler
+
+
+def submit_image_job(
+    prompt: str,
+    tool_context: ToolContext,
+    force_new_variant: bool = False,
+    num_variants: int = 1,
+) -> Dict:
+    """
+    Start generating a draft thumbnail in the background and return immediately.
+
+    Takes the same options as create_image. The result is published to the
+    session by get_image_job once the job has completed.
+
+    Args:
+        prompt (str): The prompt to generate an image from
+        tool_context (ToolContext): The tool context
+        force_new_variant (bool): Generate a new image even if an identical
+            request is cached
+        num_variants (int): Number of candidate images to generate (max 4)
+
+    Returns:
+        dict: Result containing status, message and job_id
+    """
+    job_id = get_generation_queue().submit(
+        session_id_of(tool_context),
+        prompt,
+        thumbnail_state_snapshot(tool_context),
+        force_new_variant,
+        num_variants,
+    )
+    tool_context.state["image_job_id"] = job_id
+
+    return {
+        "status": "success",
+        "message": f"Thumbnail generation job {job_id} submitted. Use get_image_job to check on it.",
+        "job_id": job_id,
+    }
+
+
+async def get_image_job(
+    job_id: str, tool_context: ToolContext, wait_seconds: int = 0
+) -> Dict:
+    """
+    Check on a background thumbnail job and publish its result when done.
+
+    Args:
+        job_id (str): The job ID returned by submit_image_job
+        tool_context (ToolContext): The tool context
+        wait_seconds (int): Seconds to wait for the job to finish (max 60)
+
+    Returns:
+        dict: The create_image result once completed, otherwise the job status
+    """
+    queue = get_generation_queue()
+    timeout = max(0, min(wait_seconds, GENERATION_JOB_MAX_WAIT_SECONDS))
+    record = await queue.wait(job_id, timeout)
+
+    session_id = session_id_of(tool_context)
+    if record is None or record["session_id"] != session_id:
+        return {"status": "error", "message": f"Job {job_id} not found"}
+
+    if record["status"] in ACTIVE_STATUSES:
+        elapsed = time.time() - record["created_at"]
+        result = {
+            "status": "pending",
+            "message": f"Job {job_id} is {record['status']} ({elapsed:.0f}s elapsed)",
+            "job_id": job_id,
+            "job_status": record["status"],
+            "image_api_queue": get_image_scheduler().metrics(),
+        }
+
+        # Publish the newest partial preview as an interim artifact version
+        progress = record.get("progress")
+        if progress:
+            result["partial_images"] = progress["partial_images"]
+            preview = progress["latest_preview"]
+            if preview != record.get("published_preview"):
+                with open(preview, "rb") as f:
+                    version = save_preview_artifact(tool_context, f.read())
+                queue.store.update(job_id, published_preview=preview)
+                if version is not None:
+                    result["preview_artifact"] = PREVIEW_ARTIFACT_FILENAME
+                    result["preview_version"] = version
+                    result["message"] += (
+                        f"; a partial preview was saved as '{PREVIEW_ARTIFACT_FILENAME}'"
+                    )
+        return result
+
+    if record["status"] == "cancelled":
+        return {
+            "status": "cancelled",
+            "message": f"Job {job_id} was cancelled",
+            "job_id": job_id,
+        }
+
+    if record["status"] == "failed":
+        return {"status": "error", "message": record["error"], "job_id": job_id}
+
+    # Publish the result into this session exactly once
+    if not queue.store.claim(job_id, "published"):
+        result = record.get("result") or {
+            "status": "success",
+            "message": f"Job {job_id} is being published",
+        }
+        return {**result, "job_id": job_id}
+
+    try:
+        result = publish_thumbnails(queue.store.load_rendered(record), tool_context)
+    except Exception as e:
+        result = {
+            "status": "error",
+            "message": f"Error publishing job {job_id}: {str(e)}",
+        }
+    if result["status"] == "error":
+        # Release the claim so a later call can try publishing again
+        queue.store.update(job_id, published=False)
+        return {**result, "job_id": job_id}
+
+    queue.store.update(job_id, result=result)
+    return {**result, "job_id": job_id}
+
+
+def cancel_image_job(job_id: str, tool_context: ToolContext) -> Dict:
+    """
+    Cancel a background thumbnail job.
+
+    A queued job never starts; a running job stops at its next partial
+    preview and nothing is published.
+
+    Args:
+        job_id (str): The job ID returned by submit_image_job
+        tool_context (ToolContext): The tool context
+
+    Returns:
+        dict: Result containing status and message
+    """
+    queue = get_generation_queue()
+    record = queue.store.get(job_id)
+    if record is None or record["session_id"] != session_id_of(tool_context):
+        return {"status": "error", "message": f"Job {job_id} not found"}
+
+    if not queue.cancel(job_id):
+        return {
+            "status": "error",
+            "message": f"Job {job_id} has already finished ({record['status']})",
+        }
+
+    return {
+        "status": "success",
+        "message": f"Job {job_id} is being cancelled",
+        "job_id": job_id,
+    }
@@ -0,0 +1,195 @@
+"""
+Process-wide scheduler for image API calls.
+
+Every image generation or edit request waits for a slot here before it is
+sent. The scheduler caps concurrent requests and requests per minute so
+concurrent sessions do not trip the API rate limit in bursts. Waiting
+requests are served round-robin across sessions, so one session cannot
+starve the others, and final renders go ahead of drafts.
+
+Waiting for a slot blocks the calling thread, so slots are only acquired on
+worker threads (the variant executor and the job queue), never on the
+event loop.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, Optional
+
+from openai import RateLimitError
+
+from ....constants import IMAGE_API_MAX_CONCURRENCY, IMAGE_API_REQUESTS_PER_MINUTE
+
+_RATE_WINDOW_SECONDS = 60.0
+
+# Priority levels, served in this order
+_PRIORITY_FINAL = 0
+_PRIORITY_DRAFT = 1
+
+
+class _Ticket:
+    """A request waiting for a slot."""
+
+    __slots__ = ("granted", "enqueued_at")
+
+    def __init__(self):
+        self.granted = False
+        self.enqueued_at = time.monotonic()
+
+
+class ImageScheduler:
+    """Concurrency and rate limiter with per-session fair queuing."""
+
+    def __init__(
+        self,
+        max_concurrency: int = IMAGE_API_MAX_CONCURRENCY,
+        requests_per_minute: int = IMAGE_API_REQUESTS_PER_MINUTE,
+    ):
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self._condition = threading.Condition()
+        self._queues: Dict[int, "OrderedDict[str, Deque[_Ticket]]"] = {
+            _PRIORITY_FINAL: OrderedDict(),
+            _PRIORITY_DRAFT: OrderedDict(),
+        }
+        self._active = 0
+        self._started: Deque[float] = deque()
+        self._metrics = {
+            "requests": 0,
+            "queue_wait_total_seconds": 0.0,
+            "queue_wait_max_seconds": 0.0,
+            "rate_limited_waits": 0,
+            "rate_limit_errors": 0,
+        }
+
+    def _next_ticket(self) -> Optional[_Ticket]:
+        """Pop the next waiting ticket: highest priority, then round-robin."""
+        for level in (_PRIORITY_FINAL, _PRIORITY_DRAFT):
+            sessions = self._queues[level]
+            if sessions:
+                session_id, tickets = next(iter(sessions.items()))
+                ticket = tickets.popleft()
+                # The session moves to the back of the line
+                del sessions[session_id]
+                if tickets:
+                    sessions[session_id] = tickets
+                return ticket
+        return None
+
+    def _dispatch(self) -> Optional[float]:
+        """
+        Grant slots while capacity allows (caller holds the condition).
+
+        Returns:
+            float: Seconds until the rate limit frees a slot, or None
+        """
+        while self._active < self.max_concurrency:
+            now = time.monotonic()
+            while self._started and now - self._started[0] >= _RATE_WINDOW_SECONDS:
+                self._started.popleft()
+            if len(self._started) >= self.requests_per_minute:
+                if any(self._queues.values()):
+                    return _RATE_WINDOW_SECONDS - (now - self._started[0])
+                return None
+
+            ticket = self._next_ticket()
+            if ticket is None:
+                return None
+            ticket.granted = True
+            self._active += 1
+            self._started.append(now)
+            self._condition.notify_all()
+        return None
+
+    @contextmanager
+    def slot(self, session_id: str, final: bool = False) -> Iterator[None]:
+        """
+        Wait for a slot to call the image API and hold it for the block.
+
+        Blocks the calling thread; never call it on the event loop.
+
+        Args:
+            session_id: Session the request belongs to (fair queuing key)
+            final: Whether this is a final render (served before drafts)
+        """
+        level = _PRIORITY_FINAL if final else _PRIORITY_DRAFT
+        ticket = _Ticket()
+        rate_limited = False
+
+        with self._condition:
+            self._queues[level].setdefault(session_id, deque()).append(ticket)
+            while True:
+                retry_after = self._dispatch()
+                if ticket.granted:
+                    break
+                if retry_after is not None:
+                    rate_limited = True
+                self._condition.wait(timeout=retry_after)
+
+            wait_seconds = time.monotonic() - ticket.enqueued_at
+            self._metrics["requests"] += 1
+            self._metrics["queue_wait_total_seconds"] += wait_seconds
+            self._metrics["queue_wait_max_seconds"] = max(
+                self._metrics["queue_wait_max_seconds"], wait_seconds
+            )
+            if rate_limited:
+                self._metrics["rate_limited_waits"] += 1
+
+        if wait_seconds >= 1:
+            print(
+                f"[Image Scheduler] Session {session_id} waited {wait_seconds:.1f}s for a slot"
+                + (" (rate limited)" if rate_limited else "")
+            )
+
+        try:
+            yield
+        except RateLimitError:
+            with self._condition:
+                self._metrics["rate_limit_errors"] += 1
+            raise
+        finally:
+            with self._condition:
+                self._active -= 1
+                self._dispatch()
+                self._condition.notify_all()
+
+    def metrics(self) -> Dict:
+        """
+        Return queue-wait and rate-limit metrics.
+
+        Returns:
+            dict: Counters since startup plus the current queue depth
+        """
+        with self._condition:
+            metrics = dict(self._metrics)
+            metrics["queue_wait_avg_seconds"] = (
+                metrics["queue_wait_total_seconds"] / metrics["requests"]
+                if metrics["requests"]
+                else 0.0
+            )
+            metrics["active"] = self._active
+            metrics["queued"] = sum(
+                len(tickets)
+                for sessions in self._queues.values()
+                for tickets in sessions.values()
+            )
+            now = time.monotonic()
+            metrics["requests_last_minute"] = sum(
+                1 for started in self._started if now - started < _RATE_WINDOW_SECONDS
+            )
+            return metrics
+
+
+_scheduler: Optional[ImageScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_image_scheduler() -> ImageScheduler:
+    """Return the process-wide image API scheduler."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = ImageScheduler()
+        return _scheduler
@@ -0,0 +1,106 @@
+"""
+Cheap local quality metrics for ranking generated thumbnail variants.
+
+All metrics are computed with NumPy on a downscaled copy of the image and
+mapped to the 0-1 range:
+- contrast: spread of luminance values
+- saturation: mean HSV saturation
+- title_edge_density: share of strong edges in the top band, where the title
+  text usually sits (readable, bold text produces dense edges)
+- subject_clarity: Laplacian sharpness of the central region, a proxy for a
+  crisp face or main subject
+"""
+
+import io
+from typing import Dict, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Relative weight of each metric in the overall score
+_WEIGHTS = {
+    "contrast": 0.25,
+    "saturation": 0.2,
+    "title_edge_density": 0.3,
+    "subject_clarity": 0.25,
+}
+
+_ANALYSIS_SIZE = (384, 256)  # Downscaled size used for scoring (3:2)
+_TITLE_BAND = 0.4  # Top fraction of the image treated as the title region
+_EDGE_THRESHOLD = 0.1  # Gradient magnitude counted as a strong edge
+_EDGE_DENSITY_TARGET = 0.25  # Edge density that earns the full title score
+_CLARITY_SCALE = 0.005  # Laplacian variance giving ~63% of the clarity score
+
+
+def score_thumbnail(image_bytes: bytes) -> Dict[str, float]:
+    """
+    Compute the quality metrics and overall score of a thumbnail.
+
+    Args:
+        image_bytes: The encoded image
+
+    Returns:
+        dict: Each metric plus the weighted "score", all between 0 and 1
+    """
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        rgb = np.asarray(
+            image.convert("RGB").resize(_ANALYSIS_SIZE), dtype=np.float32
+        ) / 255.0
+
+    luminance = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    height, width = luminance.shape
+
+    # Luminance standard deviation is at most 0.5
+    contrast = min(float(luminance.std()) / 0.5, 1.0)
+
+    max_channel = rgb.max(axis=2)
+    min_channel = rgb.min(axis=2)
+    saturation = float(
+        np.where(
+            max_channel > 0,
+            (max_channel - min_channel) / np.maximum(max_channel, 1e-6),
+            0.0,
+        ).mean()
+    )
+
+    grad_y, grad_x = np.gradient(luminance)
+    magnitude = np.hypot(grad_x, grad_y)
+    title_band = magnitude[: int(height * _TITLE_BAND)]
+    edge_density = float((title_band > _EDGE_THRESHOLD).mean())
+    title_edge_density = min(edge_density / _EDGE_DENSITY_TARGET, 1.0)
+
+    center = luminance[height // 4 : 3 * height // 4, width // 4 : 3 * width // 4]
+    laplacian = (
+        center[:-2, 1:-1]
+        + center[2:, 1:-1]
+        + center[1:-1, :-2]
+        + center[1:-1, 2:]
+        - 4 * center[1:-1, 1:-1]
+    )
+    subject_clarity = float(1 - np.exp(-laplacian.var() / _CLARITY_SCALE))
+
+    metrics = {
+        "contrast": round(contrast, 3),
+        "saturation": round(saturation, 3),
+        "title_edge_density": round(title_edge_density, 3),
+        "subject_clarity": round(subject_clarity, 3),
+    }
+    metrics["score"] = round(
+        sum(metrics[name] * weight for name, weight in _WEIGHTS.items()), 3
+    )
+    return metrics
+
+
+def rank_variants(images: List[bytes]) -> List[Tuple[int, Dict[str, float]]]:
+    """
+    Rank generated variants by their local quality score.
+
+    Args:
+        images: Encoded variant images
+
+    Returns:
+        list: (variant index, metrics) pairs, best first
+    """
+    scored = [(index, score_thumbnail(data)) for index, data in enumerate(images)]
+    scored.sort(key=lambda item: item[1]["score"], reverse=True)
+    return scored
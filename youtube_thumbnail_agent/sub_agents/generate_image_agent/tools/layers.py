@@ -0,0 +1,260 @@
+"""
+Layered compositing of user assets onto generated backgrounds.
+
+A layered thumbnail keeps three kinds of layers apart: a generated background
+plate without people or text, one cutout per placed user asset, and the
+title text. Each layer is cached, so moving, scaling or swapping an asset
+only re-composites locally. Only a new background needs the image API.
+
+Cutouts keep the user's original pixels where possible. The asset is padded
+to the aspect ratio of the image API's output and the API is asked for a
+transparent-background edit at exactly that size, so its alpha channel maps
+back onto the asset by a uniform scale. The mask is only applied to the
+asset itself if the edit is verified to line up with it; otherwise the
+regenerated cutout is used as it is, so a misaligned mask never cuts into
+the real pixels.
+"""
+
+import base64
+import hashlib
+import io
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from openai import OpenAI
+from PIL import Image
+
+from ....constants import (
+    CUTOUT_MAX_MISMATCH,
+    CUTOUT_MIN_COVERAGE,
+    IMAGE_MODEL,
+    LAYER_CACHE_DIR,
+)
+from .assets import ImageInput
+from .image_scheduler import get_image_scheduler
+from .preprocess import normalize_assets
+
+CUTOUT_PROMPT = (
+    "Cut out the main subject (person, face or product) of this image and place "
+    "it on a fully transparent background. Do not change the subject in any way."
+)
+
+# Output sizes of the image API's edit endpoint as (width, height)
+_EDIT_SIZES = ((1024, 1024), (1536, 1024), (1024, 1536))
+
+# Side of the thumbnails used to compare a cutout with its asset
+_COMPARE_SIZE = 64
+
+# Decoded layers kept in memory, keyed by (path, size)
+_MAX_DECODED_LAYERS = 32
+_decoded: "OrderedDict[Tuple[str, Tuple[int, int]], Image.Image]" = OrderedDict()
+_decoded_lock = threading.Lock()
+
+
+def _cutout_path(digest: str) -> str:
+    return os.path.join(LAYER_CACHE_DIR, "cutouts", f"{digest}.png")
+
+
+def background_path(digest: str) -> str:
+    """Return the cache path of a background plate with the given digest."""
+    return os.path.join(LAYER_CACHE_DIR, "backgrounds", f"{digest}.png")
+
+
+def store_background(image_bytes: bytes) -> str:
+    """
+    Store a background plate in the layer cache.
+
+    Args:
+        image_bytes: The encoded background image
+
+    Returns:
+        str: Path of the cached background
+    """
+    path = background_path(hashlib.sha256(image_bytes).hexdigest())
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(image_bytes)
+    return path
+
+
+def _has_transparency(image: Image.Image) -> bool:
+    """Whether an image already has a meaningful alpha channel."""
+    if image.mode != "RGBA":
+        return False
+    low, _ = image.getchannel("A").getextrema()
+    return low < 250
+
+
+def _pad_to_edit_size(
+    image: Image.Image,
+) -> Tuple[Image.Image, Tuple[int, int, int, int], str]:
+    """
+    Center an image on a canvas with the aspect ratio of the closest edit size.
+
+    Returns:
+        tuple: The canvas, the box the image occupies on it and the edit size
+    """
+    width, height = image.size
+    edit_width, edit_height = min(
+        _EDIT_SIZES,
+        key=lambda size: abs(math.log(size[0] / size[1] * height / width)),
+    )
+    scale = max(width / edit_width, height / edit_height)
+    canvas_size = (round(edit_width * scale), round(edit_height * scale))
+    left = (canvas_size[0] - width) // 2
+    top = (canvas_size[1] - height) // 2
+
+    canvas = Image.new("RGB", canvas_size, (255, 255, 255))
+    canvas.paste(image.convert("RGB"), (left, top))
+    return canvas, (left, top, left + width, top + height), f"{edit_width}x{edit_height}"
+
+
+def _mask_mismatch(original: Image.Image, cutout: Image.Image) -> float:
+    """
+    Mean difference (0 to 1) between an asset and its cutout where the cutout is opaque.
+
+    A cutout that lines up with the asset differs little inside its mask; a
+    shifted or redrawn one differs a lot.
+    """
+    size = (_COMPARE_SIZE, _COMPARE_SIZE)
+    source = np.asarray(original.convert("L").resize(size), dtype=np.float32) / 255
+    edited = np.asarray(cutout.convert("L").resize(size), dtype=np.float32) / 255
+    weight = np.asarray(cutout.getchannel("A").resize(size), dtype=np.float32) / 255
+    if weight.sum() == 0:
+        return 1.0
+    return float((np.abs(source - edited) * weight).sum() / weight.sum())
+
+
+def cutout_asset(client: OpenAI, asset: ImageInput, session_id: str) -> str:
+    """
+    Return the path of a transparent cutout of an asset, creating it if needed.
+
+    Assets that already have transparency are used as they are. Otherwise
+    the image API produces a transparent-background version. Its alpha
+    channel becomes the mask of the normalized original if the two line up,
+    and the regenerated cutout is used instead if they do not.
+
+    Args:
+        client: The OpenAI client
+        asset: The original asset image
+        session_id: Session the API request is queued under
+
+    Returns:
+        str: Path of the cached cutout PNG
+
+    Raises:
+        ValueError: If the API returns no cutout or one without a subject
+    """
+    path = _cutout_path(asset.digest)
+    if os.path.exists(path):
+        return path
+
+    normalized = normalize_assets([asset])[0]
+    with Image.open(io.BytesIO(normalized.data)) as source:
+        original = source.convert("RGBA")
+
+    if not _has_transparency(original):
+        # Pad to the output's aspect ratio so the result maps back by a uniform scale
+        canvas, box, edit_size = _pad_to_edit_size(original)
+        upload = io.BytesIO()
+        canvas.save(upload, format="PNG")
+        with get_image_scheduler().slot(session_id):
+            response = client.images.edit(
+                model=IMAGE_MODEL,
+                image=[(normalized.filename, upload.getvalue(), "image/png")],
+                prompt=CUTOUT_PROMPT,
+                background="transparent",
+                output_format="png",
+                n=1,
+                size=edit_size,
+            )
+        if not (response and response.data and response.data[0].b64_json):
+            raise ValueError("No cutout returned from the API")
+        with Image.open(io.BytesIO(base64.b64decode(response.data[0].b64_json))) as edited:
+            cutout = (
+                edited.convert("RGBA")
+                .resize(canvas.size, Image.Resampling.LANCZOS)
+                .crop(box)
+            )
+
+        alpha = cutout.getchannel("A")
+        coverage = np.count_nonzero(np.asarray(alpha) >= 128) / alpha.width / alpha.height
+        if coverage < CUTOUT_MIN_COVERAGE:
+            raise ValueError(f"The cutout of {asset.filename} does not contain a subject")
+
+        if _mask_mismatch(original, cutout) <= CUTOUT_MAX_MISMATCH:
+            original.putalpha(alpha)
+        else:
+            print(
+                f"[Layers] Cutout mask of {asset.filename} does not line up with it; "
+                "using the regenerated cutout"
+            )
+            original = cutout
+
+    # Crop to the subject so placement and scaling refer to the subject itself
+    bbox = original.getchannel("A").getbbox()
+    if bbox:
+        original = original.crop(bbox)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    original.save(tmp_path, format="PNG")
+    os.replace(tmp_path, path)
+    return path
+
+
+def _load_layer(path: str, size: Optional[Tuple[int, int]] = None) -> Image.Image:
+    """Load a layer as RGBA (optionally resized), reusing decoded copies."""
+    key = (path, size or (0, 0))
+    with _decoded_lock:
+        if key in _decoded:
+            _decoded.move_to_end(key)
+            return _decoded[key]
+
+    with Image.open(path) as source:
+        image = source.convert("RGBA")
+    if size:
+        image = image.resize(size, Image.Resampling.LANCZOS)
+
+    with _decoded_lock:
+        _decoded[key] = image
+        if len(_decoded) > _MAX_DECODED_LAYERS:
+            _decoded.popitem(last=False)
+    return image
+
+
+def compose_layers(background: str, assets: List[Dict]) -> bytes:
+    """
+    Composite asset cutouts onto a background plate.
+
+    Args:
+        background: Path of the background plate
+        assets: Asset layers, bottom first, each with "cutout" (path), "x" and
+            "y" (subject center as a fraction of the width and height) and
+            "scale" (subject height as a fraction of the image height)
+
+    Returns:
+        bytes: The composited PNG
+    """
+    canvas = _load_layer(background).copy()
+    width, height = canvas.size
+
+    for layer in assets:
+        with Image.open(layer["cutout"]) as source:
+            cutout_width, cutout_height = source.size
+        target_height = max(int(height * layer["scale"]), 1)
+        target_width = max(int(cutout_width * target_height / cutout_height), 1)
+        cutout = _load_layer(layer["cutout"], (target_width, target_height))
+
+        left = int(width * layer["x"] - target_width / 2)
+        top = int(height * layer["y"] - target_height / 2)
+        canvas.paste(cutout, (left, top), cutout)
+
+    output = io.BytesIO()
+    canvas.convert("RGB").save(output, format="PNG")
+    return output.getvalue()
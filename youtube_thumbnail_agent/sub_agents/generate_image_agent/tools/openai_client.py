@@ -0,0 +1,63 @@
+"""
+Process-wide OpenAI client with a shared HTTP connection pool.
+"""
+
+import threading
+from typing import Optional
+
+import httpx
+from openai import DefaultHttpxClient, OpenAI
+
+from ....constants import (
+    OPENAI_CONNECT_TIMEOUT,
+    OPENAI_KEEPALIVE_EXPIRY,
+    OPENAI_MAX_CONNECTIONS,
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+    OPENAI_MAX_RETRIES,
+    OPENAI_READ_TIMEOUT,
+)
+
+_client: Optional[OpenAI] = None
+_client_api_key: Optional[str] = None
+_client_lock = threading.Lock()
+
+
+def _build_client(api_key: str) -> OpenAI:
+    """Create an OpenAI client with the configured pool limits, timeouts and retries."""
+    http_client = DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+        ),
+    )
+    return OpenAI(
+        api_key=api_key,
+        http_client=http_client,
+        timeout=httpx.Timeout(OPENAI_READ_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+        max_retries=OPENAI_MAX_RETRIES,
+    )
+
+
+def get_openai_client(api_key: str) -> OpenAI:
+    """
+    Return the shared OpenAI client, creating it on first use.
+
+    The client (and its connection pool) is reused across sessions and
+    threads so repeated generations and edits keep warm connections. It is
+    only rebuilt if the API key changes; the old client is not closed, since
+    other threads may still be mid-request on it, and its pool is released
+    once the last of them drops its reference.
+
+    Args:
+        api_key (str): The OpenAI API key
+
+    Returns:
+        OpenAI: The shared client
+    """
+    global _client, _client_api_key
+    with _client_lock:
+        if _client is None or _client_api_key != api_key:
+            _client = _build_client(api_key)
+            _client_api_key = api_key
+        return _client
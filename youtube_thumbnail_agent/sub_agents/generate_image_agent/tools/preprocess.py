@@ -0,0 +1,176 @@
+"""
+Asset preprocessing stage for image generation.
+
+User assets arrive at whatever resolution and format the client sent. Before
+upload each one is normalized in a process pool: EXIF orientation applied,
+downscaled to the size the image model works at, converted to PNG (when it
+has transparency) or JPEG, and stripped of metadata. Normalized variants are
+cached on disk by the digest of the original content, so the work is done
+once per asset.
+"""
+
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from ....constants import (
+    ASSET_PREPROCESS_WORKERS,
+    NORMALIZED_ASSETS_DIR,
+    NORMALIZED_ASSET_MAX_DIMENSION,
+    NORMALIZED_JPEG_QUALITY,
+)
+from .assets import ImageInput
+
+_EXTENSIONS = {"image/png": "png", "image/jpeg": "jpg"}
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def normalize_image_bytes(data: bytes) -> Tuple[bytes, str]:
+    """
+    Normalize raw image bytes for upload (runs in a worker process).
+
+    Args:
+        data: The original image bytes
+
+    Returns:
+        tuple: (normalized bytes, MIME type)
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        image.thumbnail(
+            (NORMALIZED_ASSET_MAX_DIMENSION, NORMALIZED_ASSET_MAX_DIMENSION),
+            Image.Resampling.LANCZOS,
+        )
+
+        has_alpha = image.mode in ("RGBA", "LA") or (
+            image.mode == "P" and "transparency" in image.info
+        )
+
+        # Saving without exif/icc_profile/pnginfo strips the metadata
+        output = io.BytesIO()
+        if has_alpha:
+            image.convert("RGBA").save(output, format="PNG", optimize=True)
+            return output.getvalue(), "image/png"
+
+        image.convert("RGB").save(
+            output, format="JPEG", quality=NORMALIZED_JPEG_QUALITY, optimize=True
+        )
+        return output.getvalue(), "image/jpeg"
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Return the shared preprocessing pool, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=ASSET_PREPROCESS_WORKERS)
+        return _executor
+
+
+def _reset_executor() -> None:
+    """Discard a broken pool so the next call creates a fresh one."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def _cached_variant(digest: str) -> Optional[ImageInput]:
+    """Load the cached normalized variant of an original digest, if present."""
+    for mime_type, extension in _EXTENSIONS.items():
+        path = os.path.join(NORMALIZED_ASSETS_DIR, f"{digest}.{extension}")
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            return ImageInput(
+                path=path,
+                data=data,
+                mime_type=mime_type,
+                digest=hashlib.sha256(data).hexdigest(),
+            )
+    return None
+
+
+def _store_variant(digest: str, data: bytes, mime_type: str) -> ImageInput:
+    """Write a normalized variant to the cache and return it."""
+    os.makedirs(NORMALIZED_ASSETS_DIR, exist_ok=True)
+    path = os.path.join(NORMALIZED_ASSETS_DIR, f"{digest}.{_EXTENSIONS[mime_type]}")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return ImageInput(
+        path=path,
+        data=data,
+        mime_type=mime_type,
+        digest=hashlib.sha256(data).hexdigest(),
+    )
+
+
+def normalize_assets(images: List[ImageInput]) -> List[ImageInput]:
+    """
+    Return normalized variants of the given images, in the same order.
+
+    Cached variants are reused; the rest are normalized concurrently in the
+    process pool. An image that cannot be normalized is passed through as-is.
+
+    Args:
+        images: The loaded original images
+
+    Returns:
+        list: The normalized images
+    """
+    results: List[Optional[ImageInput]] = [_cached_variant(i.digest) for i in images]
+    pending = [index for index, result in enumerate(results) if result is None]
+    if not pending:
+        return results
+
+    outputs = {}
+    failed = set()
+    try:
+        executor = _get_executor()
+        futures = {
+            index: executor.submit(normalize_image_bytes, images[index].data)
+            for index in pending
+        }
+    except Exception as e:
+        print(f"[Preprocess] Process pool unavailable: {str(e)}")
+        _reset_executor()
+        futures = {}
+
+    for index, future in futures.items():
+        try:
+            outputs[index] = future.result()
+        except BrokenProcessPool as e:
+            print(f"[Preprocess] Process pool broke: {str(e)}")
+            _reset_executor()
+        except Exception as e:
+            print(f"[Preprocess] Could not normalize {images[index].filename}: {str(e)}")
+            failed.add(index)
+
+    # Normalize inline anything the pool could not handle
+    for index in pending:
+        if index in outputs or index in failed:
+            continue
+        try:
+            outputs[index] = normalize_image_bytes(images[index].data)
+        except Exception as e:
+            print(f"[Preprocess] Could not normalize {images[index].filename}: {str(e)}")
+
+    for index in pending:
+        if index in outputs:
+            data, mime_type = outputs[index]
+            results[index] = _store_variant(images[index].digest, data, mime_type)
+        else:
+            results[index] = images[index]
+
+    return results
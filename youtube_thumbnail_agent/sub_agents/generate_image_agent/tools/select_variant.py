@@ -0,0 +1,47 @@
+"""
+Tool for choosing which generated variant becomes the current thumbnail.
+"""
+
+from typing import Dict
+
+from google.adk.tools.tool_context import ToolContext
+
+
+def select_thumbnail_variant(variant: int, tool_context: ToolContext) -> Dict:
+    """
+    Make one of the variants from the last create_image call the current thumbnail.
+
+    Later edits use the selected variant as their reference image.
+
+    Args:
+        variant (int): The variant number reported by create_image
+        tool_context (ToolContext): The tool context
+
+    Returns:
+        dict: Result containing status and message
+    """
+    variants = tool_context.state.get("thumbnail_variants") or []
+    if not variants:
+        return {
+            "status": "error",
+            "message": "No variants available. Generate variants with create_image first.",
+        }
+
+    selected = next((item for item in variants if item["variant"] == variant), None)
+    if selected is None:
+        return {
+            "status": "error",
+            "message": f"Variant {variant} not found. Available variants: {sorted(item['variant'] for item in variants)}",
+        }
+
+    tool_context.state["thumbnail_path"] = selected["filepath"]
+    if selected.get("artifact_version") is not None:
+        tool_context.state["image_filename"] = selected["artifact_filename"]
+        tool_context.state["image_version"] = selected["artifact_version"]
+
+    return {
+        "status": "success",
+        "message": f"Variant {variant} is now the current thumbnail ('{selected['filepath']}')",
+        "filepath": selected["filepath"],
+        "score": selected["metrics"]["score"],
+    }
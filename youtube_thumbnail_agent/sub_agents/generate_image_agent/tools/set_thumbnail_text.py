@@ -0,0 +1,206 @@
+"""
+Tool for changing a thumbnail's title text locally, without regenerating it.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+import google.genai.types as types
+from google.adk.tools.tool_context import ToolContext
+from PIL import ImageColor
+
+from ....constants import FINAL_IMAGE_QUALITY, THUMBNAIL_PLATES_DIR
+from ....shared_lib.state_blobs import resolve
+from ....shared_lib.workspace import session_id_of
+from .assets import load_image_file
+from .create_image import (
+    ImageGenerationError,
+    render_thumbnails,
+    thumbnail_state_snapshot,
+)
+from .layers import compose_layers
+from .text_overlay import render_text_overlay, style_from_guide
+from .thumbnail_store import get_thumbnail_store
+
+PLATE_PROMPT = (
+    "Remove every piece of text, lettering, title and caption from the first "
+    "reference image and fill those areas with the surrounding background. "
+    "Keep everything else exactly as it is: composition, subjects, colors and lighting."
+)
+
+_POSITIONS = {
+    f"{vertical}-{horizontal}"
+    for vertical in ("top", "center", "bottom")
+    for horizontal in ("left", "center", "right")
+}
+
+
+def _load_plate(tool_context: ToolContext) -> Tuple[bytes, str]:
+    """
+    Return the text-free plate of the current thumbnail and its source digest,
+    creating the plate if needed.
+
+    Plates are stored by the digest of the thumbnail they were made from. When
+    the current thumbnail is itself a text overlay, its plate is reused.
+    """
+    thumbnail = load_image_file(tool_context.state["thumbnail_path"])
+    source_digest = thumbnail.digest
+    if source_digest == tool_context.state.get("text_overlay_digest"):
+        source_digest = tool_context.state["thumbnail_plate_source"]
+
+    plate_path = os.path.join(THUMBNAIL_PLATES_DIR, f"{source_digest}.png")
+    if os.path.exists(plate_path):
+        with open(plate_path, "rb") as f:
+            return f.read(), source_digest
+
+    if source_digest != thumbnail.digest:
+        # The plate of an earlier overlay was evicted; start from the thumbnail
+        source_digest = thumbnail.digest
+        plate_path = os.path.join(THUMBNAIL_PLATES_DIR, f"{source_digest}.png")
+
+    # Only the thumbnail itself is a reference; assets would invite redrawing
+    rendered = render_thumbnails(
+        PLATE_PROMPT,
+        thumbnail_state_snapshot(tool_context),
+        final=tool_context.state.get("thumbnail_quality") == FINAL_IMAGE_QUALITY,
+        use_assets=False,
+    )
+    plate = rendered.variants[0][1]
+
+    os.makedirs(THUMBNAIL_PLATES_DIR, exist_ok=True)
+    with open(plate_path, "wb") as f:
+        f.write(plate)
+    return plate, source_digest
+
+
+def current_text_style(
+    tool_context: ToolContext, overrides: Optional[Dict] = None
+) -> Dict:
+    """Return the title style: the style guide's, with the given (or remembered) overrides."""
+    if overrides is None:
+        overrides = tool_context.state.get("text_style_overrides") or {}
+    return {
+        **style_from_guide(resolve(tool_context.state.get("style_guide", ""))),
+        **overrides,
+    }
+
+
+async def set_thumbnail_text(
+    text: str,
+    tool_context: ToolContext,
+    position: str = "",
+    color: str = "",
+    outline_color: str = "",
+    size: float = 0.0,
+) -> Dict:
+    """
+    Replace the title text of the current thumbnail by drawing it locally.
+
+    The first call creates a text-free plate of the thumbnail (one image API
+    call); after that every text change is composited locally in milliseconds.
+    The style comes from the channel's style guide unless overridden, and
+    overrides are remembered for later text edits.
+
+    Args:
+        text (str): The title text (use a newline to force a line break)
+        tool_context (ToolContext): The tool context
+        position (str, optional): Placement such as "top-left", "bottom-center"
+        color (str, optional): Text color as a name or hex code
+        outline_color (str, optional): Outline color as a name or hex code
+        size (float, optional): Font size as a fraction of the image height
+
+    Returns:
+        dict: Result containing status and message
+    """
+    if not tool_context.state.get("thumbnail_generated") or not tool_context.state.get(
+        "thumbnail_path"
+    ):
+        return {
+            "status": "error",
+            "message": "No thumbnail to add text to. Generate one with create_image first.",
+        }
+
+    # Explicit overrides win over the style guide and are kept for later edits
+    overrides = dict(tool_context.state.get("text_style_overrides") or {})
+    position = position.strip().lower().replace(" ", "-")
+    if position:
+        if position in ("top", "center", "bottom"):
+            position = f"{position}-center"
+        if position not in _POSITIONS:
+            return {
+                "status": "error",
+                "message": f"Unknown position '{position}'. Use one of: {', '.join(sorted(_POSITIONS))}",
+            }
+        overrides["position"] = position
+    for key, value in (("color", color), ("outline_color", outline_color)):
+        if value.strip():
+            try:
+                ImageColor.getrgb(value.strip())
+            except ValueError:
+                return {"status": "error", "message": f"Unknown color '{value}'"}
+            overrides[key] = value.strip()
+    if size > 0:
+        overrides["size"] = min(size, 0.4)
+
+    style = current_text_style(tool_context, overrides)
+    started_at = time.monotonic()
+
+    try:
+        layers = tool_context.state.get("thumbnail_layers")
+        if layers:
+            # Layered thumbnails already keep the text-free layers apart
+            plate = compose_layers(layers["background"], layers["assets"])
+            source_digest = tool_context.state.get("thumbnail_plate_source")
+        else:
+            # Creating a plate calls the image API; keep it off the loop
+            plate, source_digest = await asyncio.to_thread(_load_plate, tool_context)
+    except ImageGenerationError as e:
+        return {"status": "error", "message": f"Could not create a text-free plate: {str(e)}"}
+    except Exception as e:
+        return {"status": "error", "message": f"Error preparing the plate: {str(e)}"}
+
+    image_bytes = render_text_overlay(plate, text, style)
+
+    # The text edit becomes a new version that later edits build on
+    filename = tool_context.state.get("image_filename") or "youtube_thumbnail.png"
+    try:
+        artifact_version = tool_context.save_artifact(
+            filename=filename,
+            artifact=types.Part(
+                inline_data=types.Blob(data=image_bytes, mime_type="image/png")
+            ),
+        )
+    except Exception as e:
+        return {
+            "status": "warning",
+            "message": f"Text rendered but could not be saved as an artifact: {str(e)}",
+        }
+
+    filepath = get_thumbnail_store().save(
+        session_id_of(tool_context),
+        image_bytes,
+        "text",
+        prompt=f"Title text: {text}",
+        parents=[tool_context.state["thumbnail_path"]],
+        elapsed_seconds=time.monotonic() - started_at,
+    )["path"]
+
+    tool_context.state["thumbnail_path"] = filepath
+    tool_context.state["image_filename"] = filename
+    tool_context.state["image_version"] = artifact_version
+    tool_context.state["thumbnail_title"] = text
+    tool_context.state["text_style_overrides"] = overrides
+    tool_context.state["thumbnail_plate_source"] = source_digest
+    tool_context.state["text_overlay_digest"] = hashlib.sha256(image_bytes).hexdigest()
+
+    return {
+        "status": "success",
+        "message": f"Title text updated and saved as artifact '{filename}' (version {artifact_version}) and local file '{filepath}'",
+        "filepath": filepath,
+        "artifact_filename": filename,
+        "artifact_version": artifact_version,
+        "text_style": style,
+    }
@@ -0,0 +1,287 @@
+"""
+Local title text rendering for thumbnails.
+
+Title text is drawn with Pillow onto a text-free plate, so changing the
+words only re-composites locally instead of regenerating the image (which
+is slow and often garbles the typography). The text style (font, size,
+colors, outline, shadow and placement) is read from the channel's style
+guide and can be overridden per edit.
+"""
+
+import io
+import os
+import re
+from typing import Dict, List, Optional
+
+from PIL import Image, ImageColor, ImageDraw, ImageFilter, ImageFont
+
+from ....constants import TITLE_FONT_PATH
+
+# Bold fonts tried in order for each font family
+_FONT_CANDIDATES = {
+    "condensed": [
+        "Impact.ttf",
+        "impact.ttf",
+        "Anton-Regular.ttf",
+        "BebasNeue-Regular.ttf",
+        "DejaVuSansCondensed-Bold.ttf",
+    ],
+    "serif": [
+        "DejaVuSerif-Bold.ttf",
+        "LiberationSerif-Bold.ttf",
+        "Georgia Bold.ttf",
+        "timesbd.ttf",
+    ],
+    "sans": [
+        "DejaVuSans-Bold.ttf",
+        "LiberationSans-Bold.ttf",
+        "Arial Bold.ttf",
+        "arialbd.ttf",
+    ],
+}
+
+_FONT_DIRS = [
+    "/usr/share/fonts",
+    "/usr/local/share/fonts",
+    "/Library/Fonts",
+    "/System/Library/Fonts",
+    "C:\\Windows\\Fonts",
+]
+
+DEFAULT_TEXT_STYLE = {
+    "font": "sans",  # Font family: "sans", "serif" or "condensed"
+    "size": 0.16,  # Font size as a fraction of the image height
+    "color": "#FFFFFF",
+    "outline_color": "#000000",
+    "outline": 0.08,  # Outline width as a fraction of the font size (0 disables)
+    "shadow": True,
+    "position": "top-left",  # "<top|center|bottom>-<left|center|right>"
+    "uppercase": False,
+}
+
+_COLOR_WORDS = (
+    "white",
+    "black",
+    "yellow",
+    "red",
+    "orange",
+    "blue",
+    "green",
+    "purple",
+    "pink",
+    "cyan",
+    "gold",
+)
+
+_font_path_cache: Dict[str, Optional[str]] = {}
+
+
+def _find_font(family: str) -> Optional[str]:
+    """Return the path of the first installed candidate font of a family."""
+    if family in _font_path_cache:
+        return _font_path_cache[family]
+
+    candidates = _FONT_CANDIDATES.get(family, []) + _FONT_CANDIDATES["sans"]
+    found = {}
+    for font_dir in _FONT_DIRS:
+        for root, _, files in os.walk(font_dir):
+            for name in files:
+                if name in candidates and name not in found:
+                    found[name] = os.path.join(root, name)
+
+    path = next((found[name] for name in candidates if name in found), None)
+    _font_path_cache[family] = path
+    return path
+
+
+def load_font(family: str, size: int) -> ImageFont.ImageFont:
+    """Load a bold font of the family, falling back to Pillow's default font."""
+    path = TITLE_FONT_PATH or _find_font(family)
+    if path:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            pass
+    return ImageFont.load_default(size)
+
+
+def _typography_section(style_guide: str) -> str:
+    """Return the typography part of a style guide (or all of it if unmarked)."""
+    match = re.search(r"typography", style_guide, re.IGNORECASE)
+    if not match:
+        return style_guide
+    section = style_guide[match.end() :]
+    # The section ends at the next upper-case heading such as "WRITING STYLE:"
+    end = re.search(r"\n\s*[#*\-\s]*[A-Z][A-Z &/]{3,}:?", section)
+    return section[: end.start()] if end else section[:1500]
+
+
+def _first_color(text: str) -> Optional[str]:
+    """Return the first hex code in the text, or else the first basic color name."""
+    match = re.search(r"#[0-9a-fA-F]{6}\b", text) or re.search(
+        r"\b(" + "|".join(_COLOR_WORDS) + r")\b", text, re.IGNORECASE
+    )
+    return match.group(0).lower() if match else None
+
+
+def style_from_guide(style_guide: str) -> Dict:
+    """
+    Derive the title text style from a style guide.
+
+    Args:
+        style_guide: The style guide text (may be empty)
+
+    Returns:
+        dict: A complete text style (see DEFAULT_TEXT_STYLE)
+    """
+    style = dict(DEFAULT_TEXT_STYLE)
+    section = _typography_section(style_guide or "")
+    lowered = section.lower()
+    if not lowered.strip():
+        return style
+
+    if re.search(r"\b(impact|condensed|bebas|anton|compressed)\b", lowered):
+        style["font"] = "condensed"
+    elif re.search(r"(?<!sans[- ])\bserif\b", lowered):
+        style["font"] = "serif"
+
+    # Outline / stroke color is the color mentioned right after the keyword
+    outline = re.search(r"(outline|stroke|border)[^.\n]{0,40}", section, re.IGNORECASE)
+    outline_color = _first_color(outline.group(0)) if outline else None
+    if outline:
+        style["outline"] = 0.1 if re.search(r"\b(thick|heavy)\b", lowered) else 0.08
+        if outline_color:
+            style["outline_color"] = outline_color
+    elif "no outline" in lowered:
+        style["outline"] = 0
+
+    # Fill color: the first color outside the outline description
+    fill_text = section.replace(outline.group(0), " ") if outline else section
+    fill_color = _first_color(fill_text)
+    if fill_color:
+        style["color"] = fill_color
+
+    style["shadow"] = "shadow" in lowered and "no shadow" not in lowered
+    style["uppercase"] = bool(re.search(r"upper-?case|all[- ]caps|capital", lowered))
+
+    if re.search(r"\b(huge|massive|very large|oversized)\b", lowered):
+        style["size"] = 0.2
+    elif re.search(r"\b(small|subtle|minimal)\b", lowered):
+        style["size"] = 0.11
+
+    vertical = "top"
+    if re.search(r"\bbottom\b|\blower\b", lowered):
+        vertical = "bottom"
+    elif re.search(r"\bcent(er|re)d?\b|\bmiddle\b", lowered):
+        vertical = "center"
+    horizontal = "left"
+    if re.search(r"\bright\b", lowered) and not re.search(r"\bleft\b", lowered):
+        horizontal = "right"
+    elif vertical == "center" or "centered" in lowered:
+        horizontal = "center"
+    style["position"] = f"{vertical}-{horizontal}"
+
+    return style
+
+
+def _wrap(text: str, font: ImageFont.ImageFont, max_width: float) -> List[str]:
+    """Greedily wrap words into lines no wider than max_width."""
+    lines: List[str] = []
+    for paragraph in text.splitlines() or [""]:
+        line = ""
+        for word in paragraph.split():
+            candidate = f"{line} {word}".strip()
+            if line and font.getlength(candidate) > max_width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    return lines
+
+
+def render_text_overlay(plate_bytes: bytes, text: str, style: Dict) -> bytes:
+    """
+    Draw title text onto a text-free plate.
+
+    The font shrinks until the wrapped text fits within the text area.
+
+    Args:
+        plate_bytes: The encoded text-free image
+        text: Title text (newlines force line breaks)
+        style: Text style from style_from_guide(), possibly overridden
+
+    Returns:
+        bytes: The composited PNG
+    """
+    with Image.open(io.BytesIO(plate_bytes)) as source:
+        image = source.convert("RGBA")
+    width, height = image.size
+
+    vertical, _, horizontal = style["position"].partition("-")
+    horizontal = horizontal or "center"
+    if style["uppercase"]:
+        text = text.upper()
+
+    margin = int(min(width, height) * 0.05)
+    max_width = (width - 2 * margin) * (0.9 if horizontal == "center" else 0.6)
+    max_height = (height - 2 * margin) * 0.5
+
+    font_size = max(int(height * style["size"]), 12)
+    while True:
+        font = load_font(style["font"], font_size)
+        spacing = int(font_size * 0.1)
+        stroke = int(round(font_size * style["outline"]))
+        block = "\n".join(_wrap(text, font, max_width))
+        draw = ImageDraw.Draw(image)
+        left, top, right, bottom = draw.multiline_textbbox(
+            (0, 0), block, font=font, spacing=spacing, stroke_width=stroke
+        )
+        if (right - left <= max_width and bottom - top <= max_height) or font_size <= 12:
+            break
+        font_size = int(font_size * 0.9)
+
+    block_width, block_height = right - left, bottom - top
+    x = {
+        "left": margin,
+        "center": (width - block_width) / 2,
+        "right": width - margin - block_width,
+    }.get(horizontal, margin) - left
+    y = {
+        "top": margin,
+        "center": (height - block_height) / 2,
+        "bottom": height - margin - block_height,
+    }.get(vertical, margin) - top
+    align = horizontal if horizontal in ("left", "right") else "center"
+
+    if style["shadow"]:
+        shadow = Image.new("RGBA", image.size, (0, 0, 0, 0))
+        offset = max(font_size // 18, 2)
+        ImageDraw.Draw(shadow).multiline_text(
+            (x + offset, y + offset),
+            block,
+            font=font,
+            fill=(0, 0, 0, 170),
+            spacing=spacing,
+            align=align,
+            stroke_width=stroke,
+            stroke_fill=(0, 0, 0, 170),
+        )
+        image = Image.alpha_composite(
+            image, shadow.filter(ImageFilter.GaussianBlur(max(font_size // 30, 1)))
+        )
+
+    ImageDraw.Draw(image).multiline_text(
+        (x, y),
+        block,
+        font=font,
+        fill=ImageColor.getrgb(style["color"]),
+        spacing=spacing,
+        align=align,
+        stroke_width=stroke,
+        stroke_fill=ImageColor.getrgb(style["outline_color"]),
+    )
+
+    output = io.BytesIO()
+    image.convert("RGB").save(output, format="PNG")
+    return output.getvalue()
@@ -0,0 +1,161 @@
+"""
+Versioned store of generated thumbnails.
+
+Every generated, edited or composited thumbnail becomes a new version at
+<workspace>/generated/<iteration>_<digest>.png, so sessions never share a
+file and earlier iterations stay available. Each session's directory has an
+index recording the prompt, parent versions and timing of every version.
+Writes go to a temporary file first and only the per-session index is
+locked, so parallel sessions never wait on each other.
+
+Retention: each session keeps its newest versions (final renders are always
+kept); idle sessions are removed with their workspace.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from ....constants import THUMBNAIL_VERSIONS_PER_SESSION
+from ....shared_lib.workspace import on_workspace_cleanup, workspace_for_session
+
+_INDEX_FILE = "index.json"
+
+
+class ThumbnailStore:
+    """Per-session, content-addressed thumbnail versions with an index."""
+
+    def __init__(self, versions_per_session: int = THUMBNAIL_VERSIONS_PER_SESSION):
+        self.versions_per_session = versions_per_session
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def _session_lock(self, session_id: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(session_id, threading.Lock())
+
+    def forget_session(self, session_id: str) -> None:
+        """Drop the in-memory lock of a session whose workspace was removed."""
+        with self._locks_lock:
+            self._locks.pop(session_id, None)
+
+    def _session_dir(self, session_id: str) -> str:
+        return workspace_for_session(session_id).generated_dir
+
+    def _read_index(self, session_id: str) -> List[Dict]:
+        index_path = os.path.join(self._session_dir(session_id), _INDEX_FILE)
+        if not os.path.exists(index_path):
+            return []
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[Thumbnail Store] Could not read index {index_path}: {str(e)}")
+            return []
+
+    def _write_index(self, session_id: str, versions: List[Dict]) -> None:
+        index_path = os.path.join(self._session_dir(session_id), _INDEX_FILE)
+        tmp_path = f"{index_path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(versions, f, indent=2)
+        os.replace(tmp_path, index_path)
+
+    def save(
+        self,
+        session_id: str,
+        image_bytes: bytes,
+        kind: str,
+        prompt: str = "",
+        parents: Optional[List[str]] = None,
+        elapsed_seconds: float = 0.0,
+    ) -> Dict:
+        """
+        Store a new thumbnail version.
+
+        Args:
+            session_id: The session the thumbnail belongs to
+            image_bytes: The encoded PNG
+            kind: What produced it ("draft", "final", "text" or "composite")
+            prompt: The prompt it was generated from, if any
+            parents: Paths of the versions it was derived from
+            elapsed_seconds: Time it took to produce
+
+        Returns:
+            dict: The index entry, including "path" and "iteration"
+        """
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        session_dir = self._session_dir(session_id)
+
+        with self._session_lock(session_id):
+            versions = self._read_index(session_id)
+            iteration = max((v["iteration"] for v in versions), default=0) + 1
+            path = os.path.join(session_dir, f"{iteration:04d}_{digest[:16]}.png")
+
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(image_bytes)
+            os.replace(tmp_path, path)
+
+            entry = {
+                "iteration": iteration,
+                "path": path,
+                "digest": digest,
+                "kind": kind,
+                "prompt": prompt,
+                "parents": [parent for parent in parents or [] if parent],
+                "created_at": time.time(),
+                "elapsed_seconds": round(elapsed_seconds, 3),
+            }
+            versions.append(entry)
+            versions = self._apply_retention(versions)
+            self._write_index(session_id, versions)
+        return entry
+
+    def _apply_retention(self, versions: List[Dict]) -> List[Dict]:
+        """Delete all but the newest versions (keeping finals); return the rest."""
+        if self.versions_per_session <= 0:
+            return versions
+        newest = {v["iteration"] for v in versions[-self.versions_per_session :]}
+        kept = []
+        for version in versions:
+            if version["iteration"] in newest or version["kind"] == "final":
+                kept.append(version)
+                continue
+            try:
+                os.remove(version["path"])
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"[Thumbnail Store] Could not remove {version['path']}: {str(e)}")
+                kept.append(version)
+        return kept
+
+    def history(self, session_id: str) -> List[Dict]:
+        """
+        Return the stored versions of a session, oldest first.
+
+        Args:
+            session_id: The session ID
+
+        Returns:
+            list: Index entries
+        """
+        with self._session_lock(session_id):
+            return self._read_index(session_id)
+
+
+_store: Optional[ThumbnailStore] = None
+_store_lock = threading.Lock()
+
+
+def get_thumbnail_store() -> ThumbnailStore:
+    """Return the process-wide thumbnail store."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ThumbnailStore()
+            on_workspace_cleanup(_store.forget_session)
+        return _store
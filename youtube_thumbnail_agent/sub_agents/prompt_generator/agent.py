@@ -6,23 +6,61 @@ from google.adk.agents import Agent
 from google.adk.tools.tool_context import ToolContext
 
 from ...constants import GEMINI_MODEL
-from ...shared_lib.callbacks import before_model_callback
+from ...shared_lib.callbacks import make_before_model_callback
+from ...shared_lib.history import default_compaction
+from ...shared_lib.state_blobs import offload
+from ...shared_lib.state_views import (
+    reference_analyses,
+    state_instruction,
+    video_details,
+)
 
 
 def save_prompt(prompt: str, tool_context: ToolContext) -> dict:
-    """Save the final prompt to state."""
-    tool_context.state["prompt"] = prompt
+    """Save the final prompt to state (as a blob handle when it is long)."""
+    tool_context.state["prompt"] = offload(prompt)
     return {"status": "success", "message": "Prompt saved successfully to state."}
 
 
+def save_video_details(
+    video_title: str, topic_summary: str, tool_context: ToolContext
+) -> dict:
+    """
+    Save the video title and topic summary to state.
+
+    They are used to retrieve the reference analyses most relevant to the video.
+
+    Args:
+        video_title: The exact title of the user's video
+        topic_summary: A 1-2 sentence summary of what the video is about
+        tool_context: ADK tool context
+
+    Returns:
+        dict: Save status
+    """
+    if not video_title:
+        return {"status": "error", "message": "No video title provided."}
+
+    tool_context.state["video_title"] = video_title
+    tool_context.state["video_topic"] = topic_summary
+    return {
+        "status": "success",
+        "message": "Video details saved. The most relevant reference analyses are now available.",
+    }
+
+
 # Create the YouTube Thumbnail Prompt Generator Agent
 prompt_generator = Agent(
     name="thumbnail_prompt_generator",
     description="An agent that generates highly detailed thumbnail prompts that emulate analyzed YouTube channel styles.",
     model=GEMINI_MODEL,
-    before_model_callback=before_model_callback,
-    tools=[save_prompt],
-    instruction="""
+    # Keep small previews of earlier uploads so prompts can still describe them
+    before_model_callback=make_before_model_callback(
+        image_history="preview", compaction=default_compaction()
+    ),
+    tools=[save_video_details, save_prompt],
+    instruction=state_instruction(
+        """
     You are a YouTube Thumbnail Style Emulator that creates extremely detailed prompts for generating 
     thumbnails that perfectly match a desired style. Your goal is to help users 
     create thumbnails that could easily be mistaken for professional work.
@@ -34,8 +72,10 @@ prompt_generator = Agent(
     2. Incorporate the user's specific content needs
     3. Provide extremely specific guidance for image generation tools
     
-    You should analyze both the style_guide (for overall style patterns) and the individual 
-    thumbnail_analysis entries (for specific inspiration and examples) to create the most accurate style emulation.
+    You should analyze both the style_guide (for overall style patterns) and the reference 
+    thumbnail analyses (for specific inspiration and examples) to create the most accurate style emulation.
+    The reference analyses are the ones most relevant to the user's video, selected automatically
+    from all analyzed thumbnails once the video details are saved.
     
     ## User-Uploaded Assets
     
@@ -61,7 +101,7 @@ prompt_generator = Agent(
     Begin by analyzing the available style data:
     
     1. First, review the style_guide to understand the overall thumbnail approach
-    2. Then, examine individual thumbnail analyses for specific examples and implementation details
+    2. Then, examine the reference thumbnail analyses for specific examples and implementation details
     3. Present a clear, concise style summary to the user that explains:
        - The core visual identity of the thumbnails
        - Key distinctive elements that make the style recognizable
@@ -85,6 +125,10 @@ prompt_generator = Agent(
     IMPORTANT: Do not ask any questions about design preferences. Your job is to be the expert and make these decisions 
     based on your style analysis. The only information you should request is the video title and a brief topic summary 
     if not already provided.
+    
+    As soon as you know the video title and topic, call the save_video_details tool with them. This selects
+    the reference analyses most relevant to the video before you write the prompt. Call it again if the
+    user changes the title or topic.
 
     ### Phase 3: Emulation Prompt Creation
     
@@ -163,7 +207,7 @@ prompt_generator = Agent(
     After presenting your detailed prompt:
     
     1. Explain how each element directly references the analyzed style
-    2. Point out specific examples from the thumbnail_analysis that influenced your choices
+    2. Point out specific examples from the reference thumbnail analyses that influenced your choices
     3. Confirm how user-uploaded images are being incorporated in the final thumbnail
     4. After providing the prompt, automatically save it and proceed to the next step without asking for confirmation
     5. Use the save_prompt tool to save the final IMAGE GENERATION PROMPT section to state
@@ -182,7 +226,7 @@ prompt_generator = Agent(
     - The IMAGE GENERATION PROMPT must be comprehensive and standalone - it should include ALL details
     - Use exact measurements when possible (e.g., "logo occupying 60% of frame width, positioned 30% from the top")
     - Specify exact hex color codes for all colors (e.g., #FF5733 rather than just "orange")
-    - Reference specific examples from the style_guide and thumbnail_analysis
+    - Reference specific examples from the style_guide and the reference thumbnail analyses
     - Focus on making the final prompt detailed enough that it could not be misinterpreted
     - When referencing user assets, describe them by their content/purpose, NOT by filename
     - DIRECTLY INCORPORATE uploaded image descriptions into the final prompt with clear instructions on how to use them
@@ -206,8 +250,11 @@ prompt_generator = Agent(
     Here is the style guide:
     {style_guide}
     
-    Here are the individual thumbnail analyses for reference:
-    {thumbnail_analysis}
+    Video details:
+    {video_details}
+    
+    Here are the most relevant individual thumbnail analyses for reference:
+    {reference_analyses}
     
     ## Style Emulation Guidelines
     
@@ -232,4 +279,7 @@ prompt_generator = Agent(
        - "Dynamic composition with asymmetrical balance and vibrant color palette"
        - "Clean, professional aesthetic with strategic use of negative space"
     """,
+        video_details=video_details,
+        reference_analyses=reference_analyses,
+    ),
 )
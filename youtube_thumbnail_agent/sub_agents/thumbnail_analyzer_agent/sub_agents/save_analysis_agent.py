@@ -6,13 +6,16 @@ This agent analyzes a single thumbnail selected by the thumbnail selector.
 from google.adk.agents.llm_agent import LlmAgent
 
 from youtube_thumbnail_agent.constants import GEMINI_MODEL
+from youtube_thumbnail_agent.shared_lib.state_views import state_instruction
 
 from ..tools.save_analysis import save_analysis
 
 save_analysis_agent = LlmAgent(
     name="SaveAnalysisAgent",
     model=GEMINI_MODEL,
-    instruction="""
+    # Renders the analysis result from the blob store
+    instruction=state_instruction(
+        """
     You are a Thumbnail Analysis Archiver responsible for properly documenting and saving thumbnail analyses.
     
     # YOUR TASK
@@ -43,7 +46,8 @@ save_analysis_agent = LlmAgent(
 
     thumbnail_analysis_result:
     {thumbnail_analysis_result}
-    """,
+    """
+    ),
     description="Archives detailed thumbnail analyses to build a comprehensive style database",
     tools=[save_analysis],
     output_key="analysis_save_result",
@@ -6,13 +6,20 @@ This agent analyzes a single thumbnail selected by the thumbnail selector.
 from google.adk.agents.llm_agent import LlmAgent
 
 from youtube_thumbnail_agent.constants import GEMINI_MODEL
+from youtube_thumbnail_agent.shared_lib.callbacks import make_offload_output_callback
+from youtube_thumbnail_agent.shared_lib.state_views import (
+    current_analysis_status,
+    current_thumbnail,
+    state_instruction,
+)
 
 from ..tools.analyze_thumbnail import analyze_thumbnail
 
 single_thumbnail_analyzer_agent = LlmAgent(
     name="SingleThumbnailAnalyzer",
     model=GEMINI_MODEL,
-    instruction="""
+    instruction=state_instruction(
+        """
     You are a Thumbnail Style Analyzer specialized in extracting visual design patterns from YouTube thumbnails.
     
     # YOUR PROCESS
@@ -55,13 +62,17 @@ single_thumbnail_analyzer_agent = LlmAgent(
     Remember that your job is to provide a detailed, professional analysis of the visual design
     elements in the selected thumbnail.
     
-    Here is the current thumbnail analysis state:
-    {thumbnail_analysis}
+    Status of the selected thumbnail:
+    {current_analysis_status}
     
     thumbnail_to_analyze:
-    {thumbnail_to_analyze}
+    {current_thumbnail}
     """,
+        current_analysis_status=current_analysis_status,
+        current_thumbnail=current_thumbnail,
+    ),
     description="Performs detailed analysis of a single YouTube thumbnail",
     tools=[analyze_thumbnail],
-    output_key="thumbnail_analysis_result",
+    # Saved like output_key="thumbnail_analysis_result", with the analysis in the blob store
+    after_model_callback=make_offload_output_callback("thumbnail_analysis_result"),
 )
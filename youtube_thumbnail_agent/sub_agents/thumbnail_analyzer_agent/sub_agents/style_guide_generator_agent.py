@@ -6,18 +6,28 @@ This agent analyzes all thumbnail analyses to create a comprehensive style guide
 from google.adk.agents.llm_agent import LlmAgent
 
 from youtube_thumbnail_agent.constants import GEMINI_MODEL
+from youtube_thumbnail_agent.shared_lib.callbacks import (
+    make_offload_output_callback,
+    register_style_pack_callback,
+)
+from youtube_thumbnail_agent.shared_lib.state_views import (
+    all_analyses,
+    analysis_progress,
+    state_instruction,
+)
 
 style_guide_generator_agent = LlmAgent(
     name="StyleGuideGenerator",
     model=GEMINI_MODEL,
-    instruction="""
+    instruction=state_instruction(
+        """
     You are a Thumbnail Style Guide Generator specialized in synthesizing analyses 
     of multiple thumbnails into a comprehensive style guide.
     
     # YOUR PROCESS
     
     1. ANALYZE ALL THUMBNAIL ANALYSES:
-       - Review all the thumbnail analyses stored in thumbnail_analysis
+       - Review all the thumbnail analyses listed below
        - Identify common patterns and elements across all thumbnails
        - Look for consistent use of:
          * Colors and color schemes
@@ -56,7 +66,7 @@ style_guide_generator_agent = LlmAgent(
     
     # IMPORTANT RULES
     
-    - Only proceed if ALL thumbnails have been analyzed (no empty entries in thumbnail_analysis)
+    - Only proceed if ALL thumbnails have been analyzed (check the progress line below)
     - Be extremely specific and detailed - this guide will be used to create new thumbnails
     - Focus on actionable guidance that could be used to recreate this style
     - Identify both obvious and subtle patterns across the thumbnails
@@ -67,9 +77,16 @@ style_guide_generator_agent = LlmAgent(
     Remember that your style guide will be the foundation for creating new thumbnails in the 
     same visual style as the analyzed channel.
     
-    Here is the current state:
-    {thumbnail_analysis}
+    Progress: {analysis_progress}
+    
+    Here are the thumbnail analyses:
+    {all_analyses}
     """,
+        analysis_progress=analysis_progress,
+        all_analyses=all_analyses,
+    ),
     description="Generates a comprehensive style guide based on all thumbnail analyses",
-    output_key="style_guide",
+    # Saved like output_key="style_guide", with the guide in the blob store
+    after_model_callback=make_offload_output_callback("style_guide"),
+    after_agent_callback=register_style_pack_callback,
 )
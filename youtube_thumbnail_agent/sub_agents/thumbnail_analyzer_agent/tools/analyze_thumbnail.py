@@ -5,7 +5,7 @@ from typing import Dict
 import google.genai.types as types
 from google.adk.tools.tool_context import ToolContext
 
-from ....constants import REFERENCE_IMAGES_DIR
+from ....shared_lib.workspace import get_workspace
 
 
 def analyze_thumbnail(
@@ -24,7 +24,9 @@ def analyze_thumbnail(
     """
     try:
         # Verify the thumbnail exists
-        thumbnail_path = os.path.join(REFERENCE_IMAGES_DIR, thumbnail_filename)
+        thumbnail_path = os.path.join(
+            get_workspace(tool_context).reference_images_dir, thumbnail_filename
+        )
         if not os.path.exists(thumbnail_path):
             return {
                 "status": "error",
@@ -2,6 +2,9 @@ from typing import Dict
 
 from google.adk.tools.tool_context import ToolContext
 
+from ....shared_lib.checkpoints import checkpoint_session
+from ....shared_lib.state_blobs import offload
+
 
 def save_analysis(
     thumbnail_filename: str,
@@ -30,18 +33,16 @@ def save_analysis(
                 "message": "No analysis text provided. Analysis must be non-empty.",
             }
 
-        # Ensure thumbnail_analysis exists in state
-        if "thumbnail_analysis" not in tool_context.state:
-            tool_context.state["thumbnail_analysis"] = {}
-
-        # Check if the thumbnail is already in the dictionary
-        if thumbnail_filename not in tool_context.state["thumbnail_analysis"]:
-            # If not, add it - this shouldn't normally happen since thumbnails are pre-initialized
-            # but this provides a safety mechanism
-            tool_context.state["thumbnail_analysis"][thumbnail_filename] = ""
-
-        # Save the analysis
-        tool_context.state["thumbnail_analysis"][thumbnail_filename] = analysis
+        # Replace the dictionary rather than mutating it in place, so the change
+        # is recorded in the state delta. The analysis itself goes to the blob
+        # store and only its handle is kept in state. A filename that was not
+        # pre-initialized by the scraper is simply added.
+        analyses = dict(tool_context.state.get("thumbnail_analysis") or {})
+        analyses[thumbnail_filename] = offload(analysis)
+        tool_context.state["thumbnail_analysis"] = analyses
+        checkpoint_session(
+            tool_context, analyses={thumbnail_filename: analyses[thumbnail_filename]}
+        )
 
         # Return success
         return {
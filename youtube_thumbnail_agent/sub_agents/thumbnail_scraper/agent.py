@@ -8,6 +8,8 @@ from google.adk.agents.llm_agent import LlmAgent
 
 from youtube_thumbnail_agent.constants import GEMINI_MODEL
 
+from .tools.resume_checkpoint import resume_checkpoint
+from .tools.reuse_style_pack import reuse_style_pack
 from .tools.scrape_channel import scrape_channel
 
 thumbnail_scraper_agent = LlmAgent(
@@ -22,9 +24,18 @@ thumbnail_scraper_agent = LlmAgent(
     # YOUR PROCESS
     
     1. Take the channel URL, handle, or name provided by the user
+       - First call resume_checkpoint with it. If it returns success, interrupted work on this
+         channel was restored; tell the user what was restored and skip to its next_phase:
+         * "analyze" or "style_guide": delegate to the thumbnail_analyzer_agent
+         * "prompt": delegate to the prompt_generator
+       - If it returns not_found, continue with step 2
     2. Use the scrape_channel tool to download thumbnails from this channel
        - If there are API errors, explain clearly what went wrong
     3. Confirm the successful download of thumbnails
+    4. If the result contains a style_match, tell the user which previously analyzed channel
+       matches and its score, and ask whether they want to reuse that analysis
+       - If they agree, call reuse_style_pack with the pack_id and delegate to the prompt_generator
+       - Otherwise continue with a fresh analysis
     
     # IMPORTANT NOTES
     
@@ -32,8 +43,8 @@ thumbnail_scraper_agent = LlmAgent(
     - Thumbnails will be saved to a reference_images directory
     - Each thumbnail's filename will be structured as "channel_thumbnail_X.jpg"
     - The tool also initializes the thumbnail_analysis dictionary in state with empty strings for each thumbnail
-    - Once you're done scraping, delegate to the thumbnail_analyzer_agent to start the thumbnail analysis process
+    - Once you're done scraping (and no style pack is being reused), delegate to the thumbnail_analyzer_agent to start the thumbnail analysis process
     """,
     description="Scrapes thumbnails from YouTube channels for analysis",
-    tools=[scrape_channel],
+    tools=[resume_checkpoint, scrape_channel, reuse_style_pack],
 )
@@ -0,0 +1,63 @@
+import os
+from typing import Dict
+
+from google.adk.tools.tool_context import ToolContext
+
+from ....shared_lib.checkpoints import load_checkpoint, next_phase, restore_checkpoint
+from ....shared_lib.workspace import get_workspace, user_id_of
+from .scrape_channel import resolve_channel_id
+
+
+def resume_checkpoint(
+    tool_context: ToolContext,
+    channel_name: str,
+) -> Dict:
+    """
+    Resume interrupted work on a channel from the user's latest checkpoint.
+
+    Restores the scraped thumbnails, completed analyses and style guide that
+    an earlier session of the same user saved before it was interrupted, so
+    the completed phases can be skipped. Work that already produced a
+    thumbnail is not resumed.
+
+    Args:
+        tool_context: ADK tool context
+        channel_name: YouTube channel name/ID/handle
+
+    Returns:
+        Dictionary with resume status and the next phase to run
+    """
+    try:
+        resolved = resolve_channel_id(channel_name, os.getenv("YOUTUBE_API_KEY", ""))
+        if resolved["status"] != "success":
+            return resolved
+
+        checkpoint = load_checkpoint(user_id_of(tool_context), resolved["channel_id"])
+        phase = next_phase(checkpoint)
+        if phase == "scrape":
+            return {
+                "status": "not_found",
+                "message": f"No interrupted work found for {channel_name}. Scrape the channel with scrape_channel.",
+                "next_phase": phase,
+            }
+
+        state = restore_checkpoint(checkpoint, get_workspace(tool_context))
+        tool_context.state.update(state)
+
+        analyses = state["thumbnail_analysis"]
+        done = sum(1 for analysis in analyses.values() if analysis)
+        message = f"Resumed {state['channel_name']}: {done} of {len(analyses)} thumbnails analyzed"
+        if state.get("style_guide"):
+            message += ", style guide ready"
+
+        return {
+            "status": "success",
+            "message": f"{message}. Next phase: {phase}.",
+            "next_phase": phase,
+            "thumbnails": list(analyses),
+        }
+
+    except Exception as e:
+        error_message = f"Error resuming checkpoint: {str(e)}"
+        print(error_message)
+        return {"status": "error", "message": error_message}
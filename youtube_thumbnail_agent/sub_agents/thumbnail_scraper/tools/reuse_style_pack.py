@@ -0,0 +1,57 @@
+from typing import Dict
+
+from google.adk.tools.tool_context import ToolContext
+
+from ....shared_lib.checkpoints import checkpoint_session
+from ....shared_lib.state_blobs import offload
+from ....shared_lib.style_index import load_style_pack
+
+
+def reuse_style_pack(
+    tool_context: ToolContext,
+    pack_id: str,
+) -> Dict:
+    """
+    Reuse the analyses and style guide of an already analyzed channel.
+
+    Loads the style pack into state so the thumbnail analysis phase can be
+    skipped for a channel whose style matches an existing pack.
+
+    Args:
+        tool_context: ADK tool context
+        pack_id: The style pack identifier returned in style_match
+
+    Returns:
+        Dictionary with reuse status
+    """
+    try:
+        pack = load_style_pack(pack_id)
+        if not pack:
+            return {
+                "status": "error",
+                "message": f"Style pack {pack_id} not found.",
+            }
+
+        tool_context.state["thumbnail_analysis"] = {
+            filename: offload(analysis)
+            for filename, analysis in pack["analyses"].items()
+        }
+        tool_context.state["style_guide"] = offload(pack["style_guide"])
+        tool_context.state["style_pack_id"] = pack_id
+        checkpoint_session(
+            tool_context,
+            analyses=tool_context.state["thumbnail_analysis"],
+            style_guide=tool_context.state["style_guide"],
+        )
+
+        return {
+            "status": "success",
+            "message": f"Reusing {len(pack['analyses'])} analyses and the style guide from {pack['channel_name']}.",
+            "pack_id": pack_id,
+            "channel_name": pack["channel_name"],
+        }
+
+    except Exception as e:
+        error_message = f"Error reusing style pack: {str(e)}"
+        print(error_message)
+        return {"status": "error", "message": error_message}
@@ -7,19 +7,18 @@ import requests
 from dotenv import load_dotenv
 from google.adk.tools.tool_context import ToolContext
 
-from ....constants import IMAGE_ROOT_DIR, REFERENCE_IMAGES_DIR
+from ....constants import STYLE_MATCH_SAMPLE_SIZE, STYLE_MATCH_THRESHOLD
+from ....shared_lib.checkpoints import checkpoint_session
+from ....shared_lib.style_index import match_style_pack
+from ....shared_lib.workspace import get_workspace
 
 # Load environment variables
 load_dotenv()
 
 
-def ensure_reference_images_dir():
-    """Ensure the reference_images directory exists."""
-    # Create the root images directory if it doesn't exist
-    os.makedirs(IMAGE_ROOT_DIR, exist_ok=True)
-    # Create the reference_images directory
-    os.makedirs(REFERENCE_IMAGES_DIR, exist_ok=True)
-    return REFERENCE_IMAGES_DIR
+def ensure_reference_images_dir(tool_context: ToolContext) -> str:
+    """Return the session's reference_images directory, creating it if needed."""
+    return get_workspace(tool_context).reference_images_dir
 
 
 def download_thumbnail(url: str, save_path: str, index: int) -> Optional[str]:
@@ -130,6 +129,50 @@ def is_short_video(video_id: str, api_key: str) -> bool:
         return False  # Assume not a short if we can't determine
 
 
+def resolve_channel_id(channel_name: str, api_key: str) -> Dict:
+    """
+    Resolve a channel URL, handle or ID to the channel's ID.
+
+    Handles (@name) are looked up with the YouTube API.
+
+    Args:
+        channel_name: YouTube channel name/ID/handle
+        api_key: YouTube API key
+
+    Returns:
+        Dictionary with the channel_id, or an error result
+    """
+    # Extract channel ID if needed
+    channel_id = extract_channel_id(channel_name)
+    if not channel_id:
+        return {
+            "status": "error",
+            "message": f"Could not extract channel ID from: {channel_name}",
+        }
+
+    if channel_id.startswith("@"):
+        # Handle format, need to get the channel ID first
+        handle_url = f"https://www.googleapis.com/youtube/v3/search?part=snippet&q={channel_id}&type=channel&key={api_key}"
+        handle_response = requests.get(handle_url)
+        if handle_response.status_code != 200:
+            return {
+                "status": "error",
+                "message": f"Failed to look up channel with handle {channel_id}. Status code: {handle_response.status_code}",
+            }
+
+        handle_data = handle_response.json()
+        if not handle_data.get("items"):
+            return {
+                "status": "error",
+                "message": f"No channel found for handle {channel_id}",
+            }
+
+        # Get the actual channel ID
+        channel_id = handle_data["items"][0]["snippet"]["channelId"]
+
+    return {"status": "success", "channel_id": channel_id}
+
+
 def scrape_channel(
     tool_context: ToolContext,
     channel_name: str,
@@ -154,16 +197,8 @@ def scrape_channel(
     )
 
     try:
-        # Extract channel ID if needed
-        channel_id = extract_channel_id(channel_name)
-        if not channel_id:
-            return {
-                "status": "error",
-                "message": f"Could not extract channel ID from: {channel_name}",
-            }
-
         # Prepare reference images directory
-        ref_dir = ensure_reference_images_dir()
+        ref_dir = ensure_reference_images_dir(tool_context)
 
         # Get YouTube API key from environment variables
         api_key = os.getenv("YOUTUBE_API_KEY")
@@ -173,27 +208,10 @@ def scrape_channel(
                 "message": "YouTube API key not found in environment variables. Please add YOUTUBE_API_KEY to your .env file.",
             }
 
-        # Build API URL for channel lookup
-        channel_url = None
-        if channel_id.startswith("@"):
-            # Handle format, need to get the channel ID first
-            handle_url = f"https://www.googleapis.com/youtube/v3/search?part=snippet&q={channel_id}&type=channel&key={api_key}"
-            handle_response = requests.get(handle_url)
-            if handle_response.status_code != 200:
-                return {
-                    "status": "error",
-                    "message": f"Failed to look up channel with handle {channel_id}. Status code: {handle_response.status_code}",
-                }
-
-            handle_data = handle_response.json()
-            if not handle_data.get("items"):
-                return {
-                    "status": "error",
-                    "message": f"No channel found for handle {channel_id}",
-                }
-
-            # Get the actual channel ID
-            channel_id = handle_data["items"][0]["snippet"]["channelId"]
+        resolved = resolve_channel_id(channel_name, api_key)
+        if resolved["status"] != "success":
+            return resolved
+        channel_id = resolved["channel_id"]
 
         # Initialize variables for pagination
         thumbnails: List[str] = []
@@ -201,9 +219,16 @@ def scrape_channel(
         next_page_token = None
         attempts = 0
 
-        # Initialize thumbnail_analysis in state if necessary
-        if tool_context and "thumbnail_analysis" not in tool_context.state:
-            tool_context.state["thumbnail_analysis"] = {}
+        # Thumbnails still to be analyzed (written back to state as a new dictionary)
+        analyses = {}
+        if tool_context:
+            analyses = dict(tool_context.state.get("thumbnail_analysis") or {})
+
+        # Remember which channel is being analyzed (used to register its style pack)
+        if tool_context:
+            tool_context.state["channel_id"] = channel_id
+            tool_context.state["channel_name"] = channel_name
+            tool_context.state["style_pack_id"] = None
 
         # Continue fetching until we have enough thumbnails or run out of videos
         while longform_videos_found < num_thumbnails and attempts < max_attempts:
@@ -253,16 +278,23 @@ def scrape_channel(
                     thumbnails.append(thumbnail_filename)
 
                     # Add to thumbnail_analysis with empty string value for later analysis
-                    if tool_context:
-                        tool_context.state["thumbnail_analysis"][
-                            thumbnail_filename
-                        ] = ""
+                    analyses[thumbnail_filename] = ""
 
             # Check if we have a next page token for pagination
             next_page_token = data.get("nextPageToken")
             if not next_page_token:
                 break  # No more pages to fetch
 
+        if tool_context:
+            tool_context.state["thumbnail_analysis"] = analyses
+            if thumbnails:
+                checkpoint_session(
+                    tool_context,
+                    channel_name=channel_name,
+                    thumbnails=thumbnails,
+                    thumbnails_dir=ref_dir,
+                )
+
         if not thumbnails:
             return {
                 "status": "warning",
@@ -276,11 +308,32 @@ def scrape_channel(
             status = "partial_success"
             message += f" (requested {num_thumbnails}, but only found {len(thumbnails)} longform videos)"
 
+        # Check whether an already analyzed channel has a near-identical style
+        style_match = None
+        try:
+            style_match = match_style_pack(
+                [
+                    os.path.join(ref_dir, filename)
+                    for filename in thumbnails[:STYLE_MATCH_SAMPLE_SIZE]
+                ]
+            )
+        except Exception as e:
+            print(f"Error matching style packs: {str(e)}")
+
+        if style_match and style_match["score"] >= STYLE_MATCH_THRESHOLD:
+            message += (
+                f". This channel matches style pack '{style_match['pack_id']}' "
+                f"({style_match['channel_name']}) at {style_match['score']:.2f}"
+            )
+        else:
+            style_match = None
+
         return {
             "status": status,
             "message": message,
             "channel_name": channel_name,
             "thumbnails": thumbnails,
+            "style_match": style_match,
         }
 
     except Exception as e: